@@ -1,9 +1,9 @@
 from pathlib import Path
 
 # Sentinel-5P quality filters
-SENTINEL5P_QA_THRESHOLD_BRONZE = 0.1   # Bronze: permissive (exploration)
-SENTINEL5P_QA_THRESHOLD_SILVER = 0.5   # Silver: high quality (analysis)
-SENTINEL5P_QA_THRESHOLD_GOLD = 0.7     # Gold: very high quality (reporting)
+SENTINEL5P_QA_THRESHOLD_BRONZE = 0.1  # Bronze: permissive (exploration)
+SENTINEL5P_QA_THRESHOLD_SILVER = 0.5  # Silver: high quality (analysis)
+SENTINEL5P_QA_THRESHOLD_GOLD = 0.7  # Gold: very high quality (reporting)
 
 # CH4 valid range (ppb)
 CH4_MIN_VALID = 1700.0
@@ -11,22 +11,21 @@ CH4_MAX_VALID = 2100.0
 
 
 # Alberta bounding box
-ALBERTA_BBOX = {
-    "min_lon": -120.0,
-    "min_lat": 49.0,
-    "max_lon": -110.0,
-    "max_lat": 60.0
-}
+ALBERTA_BBOX = {"min_lon": -120.0, "min_lat": 49.0, "max_lon": -110.0, "max_lat": 60.0}
+
+# Calgary 50 km radius (test_spatial_queries Test 4) as a lat/lon box
+CALGARY_BBOX = {"min_lon": -114.794, "min_lat": 50.594, "max_lon": -113.350, "max_lat": 51.495}
 
 # Spatial analysis parameters
 FACILITY_BUFFER_DISTANCE_M = 10000  # 10km buffer around facilities
-H3_RESOLUTION = 6                   # H3 resolution (~36km²)
-GRID_RESOLUTION_DEGREES = 0.1       # Fallback grid (if h3 unavailable)
+H3_RESOLUTION = 6  # H3 resolution (~36km²)
+GRID_RESOLUTION_DEGREES = 0.1  # Fallback grid (if h3 unavailable)
+METRIC_CRS = "EPSG:3400"  # NAD83 / Alberta 10-TM (Forest), metres for areas/buffers
 
 
 # Preferred data collection period (best QA)
-PREFERRED_START_MONTH = 6   # June
-PREFERRED_END_MONTH = 8     # August
+PREFERRED_START_MONTH = 6  # June
+PREFERRED_END_MONTH = 8  # August
 
 # Data retention
 DATA_RETENTION_DAYS = 365
@@ -49,21 +48,45 @@ REPORTS_DIR = OUTPUT_DIR / "reports"
 # DuckDB settings
 DUCKDB_MEMORY_LIMIT = "4GB"
 DUCKDB_THREADS = 4
+DUCKDB_TEMP_DIRECTORY = DATA_DIR / "duckdb_tmp"  # Spill files for larger-than-memory sorts/joins
+DUCKDB_EXTENSIONS = ("spatial",)  # Loaded on every connection
 
 # Table names
 TABLE_AER_FACILITIES = "bronze.aer_battery_monthly"
 TABLE_SENTINEL5P_RAW = "bronze.sentinel5p_raw"
 TABLE_SENTINEL5P_CLEANED = "silver.sentinel5p_ch4_cleaned"
+TABLE_SENTINEL5P_REMOVED_DAYS = "silver.sentinel5p_removed_days"
+TABLE_FACILITY_PIXEL_WEIGHTS = "silver.facility_pixel_weights"
+TABLE_CH4_DAILY_BACKGROUND = "silver.ch4_daily_background"
+TABLE_SENTINEL5P_ENHANCEMENT = "silver.sentinel5p_ch4_enhancement"
+TABLE_CH4_CELL_DAILY = "silver.ch4_cell_daily"
+TABLE_FACILITY_DIM = "silver.aer_facilities"
+TABLE_FACILITY_MONTHLY = "silver.aer_facility_monthly"
+TABLE_AER_OPERATORS = "silver.aer_operators"
+TABLE_AER_FACILITY_TYPES = "silver.aer_facility_types"
 TABLE_CH4_HOTSPOTS = "gold.regional_ch4_hotspots"
+TABLE_COPERNICUS_PRODUCTS = "bronze.copernicus_products"
+TABLE_COPERNICUS_SYNC_LOG = "bronze.copernicus_sync_log"
+TABLE_ATS_GRID = "bronze.ats_lsd_grid"
+TABLE_INGESTION_LEDGER = "bronze.ingestion_ledger"
+TABLE_PIPELINE_WATERMARKS = "silver.pipeline_watermarks"
+
+# Recurring battery locations resolved through the Python API
+ATS_LRU_CACHE_SIZE = 65536
 
 
 # Copernicus CDSE
 COPERNICUS_TOKEN_EXPIRY_MINUTES = 9  # Safety margin
 COPERNICUS_MAX_PRODUCTS_PER_QUERY = 50
 COPERNICUS_PRODUCT_TYPE = "L2__CH4___"
+COPERNICUS_SEARCH_WORKERS = 4  # Parallel per-day catalogue queries
+COPERNICUS_SYNC_OVERLAP_MINUTES = 60  # Re-ask this far back on delta syncs
 
 # Minimum pixels per grid cell for aggregation
 MIN_PIXELS_PER_CELL = 5
+HOTSPOT_SIGMA = 2.0  # Cell mean above regional background by this many regional std devs
+BACKGROUND_QUANTILE = 0.5  # Daily regional background = this quantile of QA-filtered CH4
+ROLLING_WINDOW_DAYS = 7  # Per-cell rolling mean / enhancement window
 
 
 # Expected data ranges for validation tests
@@ -0,0 +1,109 @@
+"""
+Benchmark AER ST60 loading: pandas path vs native DuckDB read_csv path
+
+Loads the same files both ways into a scratch database (bronze tables and
+ATS grid are created there first) and checks the loaded rows match.
+
+Usage:
+    python -m scripts.benchmark.benchmark_aer_loading "data/raw/ST60_*.csv"
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import tempfile
+import time
+
+from config.constants import TABLE_AER_FACILITIES, TABLE_INGESTION_LEDGER
+from scripts.ingest.load_aer_facilities import load_aer_data, load_aer_data_duckdb
+from scripts.lib.db import connect
+from scripts.setup.create_ats_grid import create_ats_grid_table
+from scripts.setup.create_bronze_tables import create_aer_facilities_table
+
+COMPARED_COLUMNS = """
+    row_id, facility_id, licence, operator, facility_type, facility_description,
+    reporting_month, source_file, bty_location_raw, latitude, longitude,
+    oil_prod_m3, gas_prod_1000m3, gas_flared_1000m3, gas_vented_1000m3,
+    water_prod_m3, total_wells
+"""
+
+
+def prepare_scratch_db(db_path) -> None:
+    con = connect(db_path)
+    con.execute("CREATE SCHEMA IF NOT EXISTS bronze;")
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_aer_facilities_table(con)
+        create_ats_grid_table(con)
+    con.close()
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("csv_glob", help="ST60 CSV file or glob")
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(args.csv_glob))
+    if not files:
+        print(f"No files match {args.csv_glob}")
+        return False
+
+    print("=" * 60)
+    print(f"AER loading benchmark: {len(files)} file(s)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.duckdb")
+        prepare_scratch_db(db_path)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for path in files:
+                load_aer_data(path, db_path)
+        pandas_seconds = time.perf_counter() - start
+
+        # Forget the pandas loads so the ledger doesn't skip every file
+        con = connect(db_path)
+        con.execute(
+            "CREATE TABLE bronze.aer_pandas AS SELECT * FROM bronze.aer_battery_monthly;"
+            "DELETE FROM bronze.aer_battery_monthly;"
+        )
+        con.execute(
+            f"DELETE FROM {TABLE_INGESTION_LEDGER} WHERE source_table = ?", [TABLE_AER_FACILITIES]
+        )
+        con.close()
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            load_aer_data_duckdb(args.csv_glob, db_path)
+        duckdb_seconds = time.perf_counter() - start
+
+        con = connect(db_path)
+        pandas_rows = con.execute("SELECT COUNT(*) FROM bronze.aer_pandas").fetchone()[0]
+        duckdb_rows = con.execute("SELECT COUNT(*) FROM bronze.aer_battery_monthly").fetchone()[0]
+        differing = con.execute(f"""
+            SELECT COUNT(*) FROM (
+                (SELECT {COMPARED_COLUMNS} FROM bronze.aer_pandas
+                 EXCEPT ALL
+                 SELECT {COMPARED_COLUMNS} FROM bronze.aer_battery_monthly)
+                UNION ALL
+                (SELECT {COMPARED_COLUMNS} FROM bronze.aer_battery_monthly
+                 EXCEPT ALL
+                 SELECT {COMPARED_COLUMNS} FROM bronze.aer_pandas)
+            )
+        """).fetchone()[0]
+        con.close()
+
+    print(f"  pandas: {pandas_rows:>10,} rows  {pandas_seconds:7.2f} s")
+    print(f"  duckdb: {duckdb_rows:>10,} rows  {duckdb_seconds:7.2f} s")
+    print(f"Speedup: {pandas_seconds / duckdb_seconds:.1f}x")
+    print(f"Differing rows: {differing} - {'PASSED' if differing == 0 else 'FAILED'}")
+
+    return differing == 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,73 @@
+"""
+Benchmark Sentinel-5P pixel extraction: xarray reference vs NumPy/Arrow path
+
+Usage:
+    python -m scripts.benchmark.benchmark_extraction path/to/S5P_OFFL_L2__CH4____*.nc
+"""
+
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+from scripts.ingest.process_netcdf_to_bronze import EXTRACTORS
+
+
+def run_extractor(name: str, nc_path: Path, repeat: int) -> tuple[pd.DataFrame, float, float]:
+    """
+    Return (rows as DataFrame, best wall time in s, peak traced memory in MB)
+    """
+    extractor = EXTRACTORS[name]
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = extractor(nc_path)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    extractor(nc_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    df = rows if isinstance(rows, pd.DataFrame) else rows.to_pandas()
+    return df.reset_index(drop=True), best, peak / 1024 / 1024
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("nc_path", type=Path, help="Sentinel-5P L2 CH4 orbit file")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Extraction benchmark: {args.nc_path.name}")
+    print("=" * 60)
+
+    results = {}
+    for name in ("xarray", "numpy"):
+        df, seconds, peak_mb = run_extractor(name, args.nc_path, args.repeat)
+        results[name] = (df, seconds)
+        print(f"{name:>8}: {len(df):>8,} rows  {seconds:7.3f} s  peak {peak_mb:8.1f} MB")
+
+    reference, ref_seconds = results["xarray"]
+    candidate, new_seconds = results["numpy"]
+
+    try:
+        # The NumPy path also carries the footprint corners, which xarray does not extract
+        pd.testing.assert_frame_equal(candidate[reference.columns], reference)
+        print("\nRows identical: PASSED")
+    except AssertionError as e:
+        print(f"\nRows identical: FAILED\n{e}")
+        return False
+
+    print(f"Speedup: {ref_seconds / new_seconds:.1f}x")
+    return True
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,118 @@
+"""
+Benchmark the grid-bucketed proximity join at realistic scale
+
+Random pixels and facilities over the Alberta bbox (in memory, no database
+needed). The bucketed join is checked against a brute-force cross join on
+a pixel subsample, then timed on the full set.
+
+Usage:
+    python -m scripts.benchmark.benchmark_proximity_join --pixels 2000000 --facilities 20000
+"""
+
+import argparse
+import time
+
+from config.constants import ALBERTA_BBOX, FACILITY_BUFFER_DISTANCE_M
+from scripts.lib.db import connect
+from scripts.lib.proximity import proximity_join_sql, register_haversine
+
+
+def create_points(con, table, n, seed) -> None:
+    bbox = ALBERTA_BBOX
+    con.execute(f"SELECT setseed({seed})")
+    con.execute(f"""
+        CREATE OR REPLACE TABLE {table} AS
+        SELECT
+            range AS id,
+            {bbox["min_lat"]} + random() * {bbox["max_lat"] - bbox["min_lat"]} AS latitude,
+            {bbox["min_lon"]} + random() * {bbox["max_lon"] - bbox["min_lon"]} AS longitude
+        FROM range({n})
+    """)
+
+
+def main() -> bool:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pixels", type=int, default=2_000_000)
+    parser.add_argument("--facilities", type=int, default=20_000)
+    parser.add_argument(
+        "--check-pixels",
+        type=int,
+        default=5_000,
+        help="Pixel subsample compared against the brute-force join",
+    )
+    args = parser.parse_args()
+
+    con = connect(":memory:", extensions=())
+    register_haversine(con)
+
+    create_points(con, "pixels", args.pixels, 0.1)
+    create_points(con, "facilities", args.facilities, 0.2)
+    con.execute(f"CREATE TABLE pixel_sample AS SELECT * FROM pixels LIMIT {args.check_pixels}")
+
+    print("=" * 60)
+    print(
+        f"Proximity join: {args.pixels:,} pixels x {args.facilities:,} facilities, "
+        f"{FACILITY_BUFFER_DISTANCE_M / 1000:.0f} km"
+    )
+    print("=" * 60)
+
+    sample_pairs = proximity_join_sql(
+        "(SELECT id AS pixel_id, latitude, longitude FROM pixel_sample)",
+        "(SELECT id AS facility_id, latitude, longitude FROM facilities)",
+        "pixel_id",
+        "facility_id",
+    )
+
+    start = time.perf_counter()
+    brute = con.execute(f"""
+        SELECT p.id, f.id FROM pixel_sample p, facilities f
+        WHERE haversine_m(p.latitude, p.longitude, f.latitude, f.longitude)
+              <= {FACILITY_BUFFER_DISTANCE_M}
+        EXCEPT ALL
+        SELECT pixel_id, facility_id FROM {sample_pairs}
+    """).fetchall()
+    missing = len(brute)
+    extra = con.execute(f"""
+        SELECT COUNT(*) FROM (
+            SELECT pixel_id, facility_id FROM {sample_pairs}
+            EXCEPT ALL
+            SELECT p.id, f.id FROM pixel_sample p, facilities f
+            WHERE haversine_m(p.latitude, p.longitude, f.latitude, f.longitude)
+                  <= {FACILITY_BUFFER_DISTANCE_M}
+        )
+    """).fetchone()[0]
+    brute_seconds = time.perf_counter() - start
+    print(
+        f"Check on {args.check_pixels:,} pixels: {missing} missing, {extra} extra pairs "
+        f"(brute force {brute_seconds:.1f} s)"
+    )
+
+    full_pairs = proximity_join_sql(
+        "(SELECT id AS pixel_id, latitude, longitude FROM pixels)",
+        "(SELECT id AS facility_id, latitude, longitude FROM facilities)",
+        "pixel_id",
+        "facility_id",
+    )
+
+    start = time.perf_counter()
+    n_pairs, n_pixels = con.execute(
+        f"SELECT COUNT(*), COUNT(DISTINCT pixel_id) FROM {full_pairs}"
+    ).fetchone()
+    seconds = time.perf_counter() - start
+
+    print(
+        f"Bucketed join: {n_pairs:,} pairs, {n_pixels:,} pixels near a facility in {seconds:.2f} s"
+    )
+
+    est = brute_seconds / 2 * args.pixels / args.check_pixels
+    print(f"Brute force extrapolated to full set: ~{est:,.0f} s")
+
+    ok = missing == 0 and extra == 0
+    print("PASSED" if ok else "FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(0 if main() else 1)
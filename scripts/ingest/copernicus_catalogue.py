@@ -0,0 +1,144 @@
+"""
+Local cache of Copernicus catalogue product metadata
+One row per (product, search bbox) (Id, Name, ContentDate, ContentLength,
+Checksum, Footprint) plus a per-day sync log, so repeated searches only ask
+the catalogue for products published since the last sync of that day. A
+product found by searches over several bboxes is cached once for each.
+"""
+
+import json
+from datetime import date, datetime
+
+from config.constants import TABLE_COPERNICUS_PRODUCTS, TABLE_COPERNICUS_SYNC_LOG
+from scripts.lib.db import connect
+
+
+class ProductCatalogue:
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+        with self._connect() as con:
+            con.execute(f"CREATE SCHEMA IF NOT EXISTS {TABLE_COPERNICUS_PRODUCTS.split('.')[0]}")
+            self._drop_single_bbox_cache(con)
+            con.execute(f"""
+                CREATE TABLE IF NOT EXISTS {TABLE_COPERNICUS_PRODUCTS} (
+                    product_id VARCHAR,
+                    product_name VARCHAR,
+                    content_start VARCHAR,         -- ISO string as returned by OData
+                    content_end VARCHAR,
+                    content_day DATE,
+                    content_length BIGINT,
+                    checksum VARCHAR,              -- JSON list from the catalogue
+                    footprint VARCHAR,             -- OData geography literal
+                    bbox_key VARCHAR,
+                    cached_at TIMESTAMP,
+                    PRIMARY KEY (product_id, bbox_key)
+                )
+            """)
+            con.execute(f"""
+                CREATE TABLE IF NOT EXISTS {TABLE_COPERNICUS_SYNC_LOG} (
+                    content_day DATE,
+                    bbox_key VARCHAR,
+                    synced_at TIMESTAMP,           -- UTC, catalogue queried up to here
+                    PRIMARY KEY (content_day, bbox_key)
+                )
+            """)
+
+    def _connect(self):
+        return connect(self.db_path, extensions=())
+
+    @staticmethod
+    def _drop_single_bbox_cache(con) -> None:
+        """
+        Caches keyed on product_id alone lost products to later bboxes while
+        the sync log still marked their days as done; drop both so they resync.
+        """
+        schema, table = TABLE_COPERNICUS_PRODUCTS.split(".")
+        row = con.execute(
+            """
+            SELECT constraint_column_names FROM duckdb_constraints()
+            WHERE schema_name = ? AND table_name = ? AND constraint_type = 'PRIMARY KEY'
+            """,
+            [schema, table],
+        ).fetchone()
+
+        if row and list(row[0]) == ["product_id"]:
+            print("Rebuilding catalogue cache keyed on (product_id, bbox_key)")
+            con.execute(f"DROP TABLE {TABLE_COPERNICUS_PRODUCTS}")
+            con.execute(f"DROP TABLE IF EXISTS {TABLE_COPERNICUS_SYNC_LOG}")
+
+    def last_sync(self, day: date, bbox_key: str) -> datetime | None:
+        with self._connect() as con:
+            row = con.execute(
+                f"""
+                SELECT synced_at FROM {TABLE_COPERNICUS_SYNC_LOG}
+                WHERE content_day = ? AND bbox_key = ?
+                """,
+                [day, bbox_key],
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def store(self, day: date, bbox_key: str, products: list[dict], synced_at: datetime) -> None:
+        """
+        Upsert the products found for one day and record the sync time,
+        in one transaction.
+        """
+        rows = [
+            (
+                p["Id"],
+                p["Name"],
+                p["ContentDate"]["Start"],
+                p["ContentDate"].get("End"),
+                day,
+                p.get("ContentLength"),
+                json.dumps(p.get("Checksum") or []),
+                p.get("Footprint"),
+                bbox_key,
+                synced_at,
+            )
+            for p in products
+        ]
+
+        with self._connect() as con:
+            con.execute("BEGIN TRANSACTION")
+            if rows:
+                con.executemany(
+                    f"INSERT OR REPLACE INTO {TABLE_COPERNICUS_PRODUCTS} "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+            con.execute(
+                f"INSERT OR REPLACE INTO {TABLE_COPERNICUS_SYNC_LOG} VALUES (?, ?, ?)",
+                [day, bbox_key, synced_at],
+            )
+            con.execute("COMMIT")
+
+    def products(self, start_day: date, end_day: date, bbox_key: str) -> list[dict]:
+        """
+        Cached products in [start_day, end_day], newest first, shaped like
+        catalogue search results.
+        """
+        with self._connect() as con:
+            rows = con.execute(
+                f"""
+                SELECT product_id, product_name, content_start, content_end,
+                       content_length, checksum, footprint
+                FROM {TABLE_COPERNICUS_PRODUCTS}
+                WHERE content_day BETWEEN ? AND ? AND bbox_key = ?
+                ORDER BY content_start DESC
+                """,
+                [start_day, end_day, bbox_key],
+            ).fetchall()
+
+        return [
+            {
+                "Id": product_id,
+                "Name": name,
+                "ContentDate": {"Start": start, "End": end},
+                "ContentLength": length,
+                "Checksum": json.loads(checksum),
+                "Footprint": footprint,
+            }
+            for product_id, name, start, end, length, checksum, footprint in rows
+        ]
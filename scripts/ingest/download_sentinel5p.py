@@ -1,11 +1,56 @@
+import hashlib
 import os
-from datetime import datetime, timedelta
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from config.constants import (
+    COPERNICUS_MAX_PRODUCTS_PER_QUERY,
+    COPERNICUS_PRODUCT_TYPE,
+    COPERNICUS_SEARCH_WORKERS,
+    COPERNICUS_SYNC_OVERLAP_MINUTES,
+)
+from scripts.ingest.copernicus_catalogue import ProductCatalogue
 
 load_dotenv()
 
+DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024  # 4 MB
+DOWNLOAD_WORKERS = 4
+PART_SUFFIX = ".part"
+
+
+class DownloadVerificationError(Exception):
+    """Downloaded file does not match the catalogue size or checksum"""
+
+
+def expected_checksum(product) -> tuple[str, str] | tuple[None, None]:
+    """
+    (algorithm, hex digest) from a catalogue product's Checksum list,
+    restricted to algorithms hashlib provides (MD5, SHA256...).
+    """
+    for entry in product.get("Checksum") or []:
+        algorithm = str(entry.get("Algorithm", "")).lower()
+        value = entry.get("Value")
+
+        if value and algorithm in hashlib.algorithms_available:
+            return algorithm, value.lower()
+
+    return None, None
+
+
+def file_digest(path, algorithm) -> str:
+    digest = hashlib.new(algorithm)
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
 
 class CopernicusDownloader:
     def __init__(self):
@@ -16,8 +61,27 @@ class CopernicusDownloader:
         self.download_url = "https://zipper.dataspace.copernicus.eu/odata/v1/Products"
         self.token = None
         self.token_expiry = None
+        self.catalogue_db = os.getenv("DUCKDB_DATABASE_PATH", "./emissions_ghg.duckdb")
+        self._catalogue = None
+        self._token_lock = threading.Lock()
+
+        # One pooled session shared by all download threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=DOWNLOAD_WORKERS, pool_maxsize=DOWNLOAD_WORKERS)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @property
+    def catalogue(self):
+        if self._catalogue is None:
+            self._catalogue = ProductCatalogue(self.catalogue_db)
+        return self._catalogue
 
     def get_token(self):
+        with self._token_lock:
+            return self._get_token()
+
+    def _get_token(self):
         if self.token and self.token_expiry and datetime.now() < self.token_expiry:
             print("Using cached token")
             return self.token
@@ -30,8 +94,7 @@ class CopernicusDownloader:
             "grant_type": "password",
         }
 
-
-        response = requests.post(self.token_url, data=data, timeout=30)
+        response = self.session.post(self.token_url, data=data, timeout=30)
         response.raise_for_status()
 
         token_data = response.json()
@@ -41,17 +104,83 @@ class CopernicusDownloader:
         print("SUCCESS: Token obtained")
         return self.token
 
-    def search_products(self, start_date, end_date, bbox=None, max_results=10):
+    def search_products(self, start_date, end_date, bbox=None, max_results=None, use_cache=True):
+        """
+        All CH4 products whose sensing start falls on a day in
+        [start_date, end_date], newest first.
+
+        The range is split into one query per day, run in parallel, each
+        following @odata.nextLink until exhausted. With use_cache, product
+        metadata is kept in the local catalogue table and days synced
+        before only ask for products published since their last sync.
+        """
         if bbox is None:
             bbox = (-120, 49, -110, 60)
 
+        bbox_key = ",".join(str(v) for v in bbox)
+        days = [
+            start_date.date() + timedelta(days=i)
+            for i in range((end_date.date() - start_date.date()).days + 1)
+        ]
+
+        catalogue = self.catalogue if use_cache else None
+
+        with ThreadPoolExecutor(max_workers=COPERNICUS_SEARCH_WORKERS) as pool:
+            futures = {}
+            for day in days:
+                since = catalogue.last_sync(day, bbox_key) if catalogue else None
+                futures[day] = pool.submit(self._search_day, day, bbox, since)
+
+            fetched = {day: future.result() for day, future in futures.items()}
+
+        if catalogue:
+            for day, (products, synced_at) in fetched.items():
+                catalogue.store(day, bbox_key, products, synced_at)
+            products = catalogue.products(days[0], days[-1], bbox_key)
+            new = sum(len(found) for found, _ in fetched.values())
+            print(f"\nCatalogue returned {new} new product(s)")
+        else:
+            products = sorted(
+                (p for found, _ in fetched.values() for p in found),
+                key=lambda p: p["ContentDate"]["Start"],
+                reverse=True,
+            )
+
+        if max_results is not None:
+            products = products[:max_results]
+
+        print(f"\nFound {len(products)} products")
+
+        for i, product in enumerate(products, 1):
+            print(f"\n[{i}] {product['Name']}")
+            print(f"ID: {product['Id']}")
+            print(f"Date: {product['ContentDate']['Start']}")
+            print(f"Size: {product['ContentLength'] / 1024 / 1024:.1f} MB")
+
+        return products
+
+    def _search_day(self, day, bbox, published_since=None):
+        """
+        Every product sensed on `day`, paging through @odata.nextLink.
+        Returns (products, sync timestamp to record for the day).
+        """
+        synced_at = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+            minutes=COPERNICUS_SYNC_OVERLAP_MINUTES
+        )
+        next_day = day + timedelta(days=1)
+
         filter_parts = [
             "Collection/Name eq 'SENTINEL-5P'",
-            "contains(Name,'L2__CH4___')",
-            f"ContentDate/Start gt {start_date.strftime('%Y-%m-%dT00:00:00.000Z')}",
-            f"ContentDate/Start lt {end_date.strftime('%Y-%m-%dT23:59:59.999Z')}",
+            f"contains(Name,'{COPERNICUS_PRODUCT_TYPE}')",
+            f"ContentDate/Start ge {day.strftime('%Y-%m-%dT00:00:00.000Z')}",
+            f"ContentDate/Start lt {next_day.strftime('%Y-%m-%dT00:00:00.000Z')}",
         ]
 
+        if published_since is not None:
+            filter_parts.append(
+                f"PublicationDate gt {published_since.strftime('%Y-%m-%dT%H:%M:%S.000Z')}"
+            )
+
         min_lon, min_lat, max_lon, max_lat = bbox
         polygon = f"POLYGON(({min_lon} {min_lat},{max_lon} {min_lat}, \
             {max_lon} {max_lat},{min_lon} {max_lat},{min_lon} {min_lat}))"
@@ -61,57 +190,156 @@ class CopernicusDownloader:
 
         params = {
             "$filter": filter_query,
-            "$top": max_results,
+            "$top": COPERNICUS_MAX_PRODUCTS_PER_QUERY,
             "$orderby": "ContentDate/Start desc",
         }
 
-        response = requests.get(self.catalogue_url, params=params, timeout=60)
-        response.raise_for_status()
+        products = []
+        url = self.catalogue_url
+
+        while url:
+            response = self.session.get(url, params=params, timeout=60)
+            response.raise_for_status()
+
+            data = response.json()
+            products.extend(data.get("value", []))
+
+            # nextLink already carries the query string
+            url = data.get("@odata.nextLink")
+            params = None
+
+        return products, synced_at
+
+    def download_product(
+        self,
+        product_id,
+        product_name,
+        output_dir="./data/raw/sentinel5p",
+        expected_size=None,
+        checksum=(None, None),
+        show_progress=True,
+    ):
+        """
+        Download one product to output_dir/product_name.
+
+        Bytes go to a .part file first. An interrupted .part is resumed
+        with a Range request; the file is checked against expected_size and
+        checksum (algorithm, hex digest) before being renamed into place,
+        so a final file is only ever a complete one.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, product_name)
+        part_path = output_path + PART_SUFFIX
 
-        data = response.json()
-        products = data.get("value", [])
+        if os.path.exists(output_path):
+            if expected_size is None or os.path.getsize(output_path) == expected_size:
+                print(f"File already exists: {output_path}")
+                return output_path
 
-        print(f"\nFound {len(products)} products")
+            print(f"Size mismatch, re-downloading: {output_path}")
+            os.remove(output_path)
 
-        for i, product in enumerate(products, 1):
-            print(f"\n[{i}] {product['Name']}")
-            print(f"ID: {product['Id']}")
-            print(f"Date: {product['ContentDate']['Start']}")
-            print(f"Size: {product['ContentLength'] / 1024 / 1024:.1f} MB")
+        downloaded = os.path.getsize(part_path) if os.path.exists(part_path) else 0
 
-        return products
+        if expected_size is None or downloaded < expected_size:
+            downloaded = self._fetch(product_id, part_path, downloaded, show_progress)
 
-    def download_product(self, product_id, product_name, output_dir="./data/raw/sentinel5p"):
-        os.makedirs(output_dir, exist_ok=True)
-        output_path = os.path.join(output_dir, product_name)
+        self._verify(part_path, expected_size, checksum)
+        os.replace(part_path, output_path)
 
-        if os.path.exists(output_path):
-            print(f"File already exists: {output_path}")
-            return output_path
+        print(f"\nDownloaded to {output_path}")
+        return output_path
 
+    def _fetch(self, product_id, part_path, offset, show_progress):
         token = self.get_token()
         url = f"{self.download_url}({product_id})/$value"
 
         headers = {"Authorization": f"Bearer {token}"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
 
-        response = requests.get(url, headers=headers, stream=True, timeout=300)
-        response.raise_for_status()
+        with self.session.get(url, headers=headers, stream=True, timeout=300) as response:
+            if response.status_code == 416:
+                # Range not satisfiable: the .part already holds every byte
+                return offset
 
-        total_size = int(response.headers.get("content-length", 0))
-        downloaded = 0
+            response.raise_for_status()
 
-        with open(output_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
+            if offset and response.status_code != 206:
+                print(f"Server ignored Range, restarting {os.path.basename(part_path)}")
+                offset = 0
 
-                    if total_size > 0:
-                        percent = (downloaded / total_size) * 100
-                        print(f"\rProgress: {percent:.1f}%", end="")
+            total_size = int(response.headers.get("content-length", 0)) + offset
+            downloaded = offset
 
-        print(f"\nDownloaded to {output_path}")
-        return output_path
+            with open(part_path, "ab" if offset else "wb") as f:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if chunk:
+                        f.write(chunk)
+                        downloaded += len(chunk)
+
+                        if show_progress and total_size > 0:
+                            percent = (downloaded / total_size) * 100
+                            print(f"\rProgress: {percent:.1f}%", end="")
+
+        return downloaded
+
+    @staticmethod
+    def _verify(part_path, expected_size, checksum):
+        size = os.path.getsize(part_path)
+
+        if expected_size is not None and size != expected_size:
+            if size > expected_size:
+                os.remove(part_path)
+            raise DownloadVerificationError(
+                f"{os.path.basename(part_path)}: {size} bytes, expected {expected_size}"
+            )
+
+        algorithm, value = checksum
+        if algorithm is None:
+            return
+
+        actual = file_digest(part_path, algorithm)
+        if actual != value:
+            os.remove(part_path)
+            raise DownloadVerificationError(
+                f"{os.path.basename(part_path)}: {algorithm} {actual}, expected {value}"
+            )
+
+    def download_products(
+        self, products, output_dir="./data/raw/sentinel5p", max_workers=DOWNLOAD_WORKERS
+    ):
+        """
+        Download catalogue products concurrently over the pooled session.
+
+        Returns (downloaded paths, {product name: error}). A failed product
+        keeps its .part file so the next run resumes it.
+        """
+        downloaded, failed = [], {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(
+                    self.download_product,
+                    product_id=product["Id"],
+                    product_name=product["Name"],
+                    output_dir=output_dir,
+                    expected_size=product.get("ContentLength"),
+                    checksum=expected_checksum(product),
+                    show_progress=False,
+                ): product["Name"]
+                for product in products
+            }
+
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    downloaded.append(future.result())
+                except (requests.RequestException, OSError, DownloadVerificationError) as e:
+                    print(f"ERROR: Failed to download {name}: {e}")
+                    failed[name] = str(e)
+
+        return sorted(downloaded), failed
 
 
 def main():
@@ -122,30 +350,17 @@ def main():
     search_date = datetime(2025, 7, 14)
 
     products = downloader.search_products(
-        start_date=search_date,
-        end_date=search_date + timedelta(days=1),
-        max_results=20
+        start_date=search_date, end_date=search_date + timedelta(days=1), max_results=20
     )
 
     if not products:
         print("No products found.")
         return False
 
-    downloaded_files = []
-
-    for i, product in enumerate(products, 1):
-        print(f"\n[{i}/{len(products)}] Processing: {product['Name']}")
-
-        try:
-            output_path = downloader.download_product(
-                product_id=product['Id'],
-                product_name=product['Name']
-            )
-            downloaded_files.append(output_path)
+    downloaded_files, failed = downloader.download_products(products)
 
-        except Exception as e:
-            print(f"ERROR: Failed to download product {i}: {e}")
-            continue
+    if failed:
+        print(f"\n{len(failed)} product(s) failed, rerun to resume them")
 
     if downloaded_files:
         print("\nDownloaded files:")
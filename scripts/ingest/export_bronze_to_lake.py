@@ -0,0 +1,128 @@
+"""
+Export bronze tables to partitioned Parquet on the warehouse bucket
+
+bronze.sentinel5p_raw is partitioned by observation_date/orbit_number and
+bronze.aer_battery_monthly by reporting_month (see scripts.lib.lake).
+Only partitions holding files loaded since the last export (per the
+ingestion ledger) are rewritten; each partition is a single file that a
+re-export overwrites in place. Also (re)creates the bronze.*_lake views.
+
+Usage:
+    python -m scripts.ingest.export_bronze_to_lake [--full]
+"""
+
+import argparse
+import os
+
+from dotenv import load_dotenv
+
+from config.constants import TABLE_INGESTION_LEDGER
+from scripts.lib.db import connect
+from scripts.lib.lake import LAKE_TABLES, connect_lake, create_lake_views, lake_path
+from scripts.setup.create_silver_tables import create_pipeline_watermarks_table
+from scripts.transform.watermarks import get_watermark, set_watermark
+
+load_dotenv()
+
+
+def export_table(con, table, full=False) -> int:
+    """
+    Rewrite the lake partitions touched by files loaded since the last
+    export; returns the number of partitions written.
+    """
+    spec = LAKE_TABLES[table]
+    path = lake_path(table)
+    partitions = ", ".join(spec["partitions"])
+    derived = f", {spec['derived']}" if spec["derived"] else ""
+
+    since = None if full else get_watermark(con, path)
+
+    new_watermark = con.execute(
+        f"""
+        SELECT MAX(loaded_at) FROM {TABLE_INGESTION_LEDGER}
+        WHERE source_table = $table AND ($since IS NULL OR loaded_at > $since)
+        """,
+        {"table": table, "since": since},
+    ).fetchone()[0]
+
+    if new_watermark is None:
+        print(f"  {table}: up to date")
+        return 0
+
+    source = f"(SELECT *{derived} FROM {table})"
+
+    con.execute(
+        f"""
+        CREATE OR REPLACE TEMP TABLE lake_partitions AS
+        SELECT DISTINCT {partitions}
+        FROM {source}
+        WHERE {spec["source_file"]} IN (
+            SELECT source_file FROM {TABLE_INGESTION_LEDGER}
+            WHERE source_table = $table AND ($since IS NULL OR loaded_at > $since)
+        )
+        """,
+        {"table": table, "since": since},
+    )
+
+    written = con.execute("SELECT COUNT(*) FROM lake_partitions").fetchone()[0]
+
+    if "://" not in path:
+        os.makedirs(path, exist_ok=True)
+
+    try:
+        con.execute(f"""
+            COPY (
+                SELECT * FROM {source}
+                SEMI JOIN lake_partitions USING ({partitions})
+            )
+            TO '{path}' (
+                FORMAT parquet,
+                COMPRESSION zstd,
+                PARTITION_BY ({partitions}),
+                OVERWRITE_OR_IGNORE,
+                FILENAME_PATTERN 'data_{{i}}'
+            )
+        """)
+    finally:
+        con.execute("DROP TABLE IF EXISTS lake_partitions")
+
+    set_watermark(con, path, new_watermark)
+    print(f"  {table}: {written:,} partition(s) written to {path}")
+
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--full", action="store_true", help="Rewrite every partition, not only those with new files"
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Bronze export to partitioned Parquet")
+    print("=" * 60)
+
+    con = connect()
+    connect_lake(con)
+
+    create_pipeline_watermarks_table(con)
+
+    for table in LAKE_TABLES:
+        export_table(con, table, full=args.full)
+
+    views = create_lake_views(con)
+    print(f"\nViews: {', '.join(views) or 'none'}")
+
+    con.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
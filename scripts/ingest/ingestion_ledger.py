@@ -0,0 +1,92 @@
+"""
+Ingestion ledger: one row per (bronze table, source file) already loaded,
+with its checksum, row count and load time. Loaders use it to skip files
+they have seen and to replace files whose content changed.
+"""
+
+import hashlib
+import os
+
+import duckdb
+
+from config.constants import TABLE_INGESTION_LEDGER
+from scripts.lib.db import connect
+
+
+def create_ingestion_ledger(con, replace=False) -> None:
+    if replace:
+        con.execute(f"DROP TABLE IF EXISTS {TABLE_INGESTION_LEDGER};")
+
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_INGESTION_LEDGER} (
+            source_table VARCHAR,          -- e.g. bronze.sentinel5p_raw
+            source_file VARCHAR,           -- file name as stored in the table
+            checksum VARCHAR,
+            row_count BIGINT,
+            loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source_table, source_file)
+        );
+    """)
+
+
+def ingested_checksums(con, source_table) -> dict[str, str]:
+    rows = con.execute(
+        f"SELECT source_file, checksum FROM {TABLE_INGESTION_LEDGER} WHERE source_table = ?",
+        [source_table],
+    ).fetchall()
+    return dict(rows)
+
+
+def ingested_files(db_path, source_table) -> set[str]:
+    """
+    Source files already loaded into source_table, read without holding a
+    write lock. Empty if the database or the ledger does not exist yet.
+    """
+    if not os.path.exists(db_path):
+        return set()
+
+    con = connect(db_path, read_only=True, extensions=())
+    try:
+        return set(ingested_checksums(con, source_table))
+    except duckdb.CatalogException:
+        return set()
+    finally:
+        con.close()
+
+
+def plan_loads(con, source_table, checksums: dict[str, str]) -> tuple[list[str], list[str]]:
+    """
+    Split {source_file: checksum} into (new files, changed files);
+    files with an identical ledger checksum are left out.
+    """
+    known = ingested_checksums(con, source_table)
+
+    new = sorted(f for f in checksums if f not in known)
+    changed = sorted(f for f in checksums if f in known and known[f] != checksums[f])
+
+    return new, changed
+
+
+def record_loads(con, source_table, loads: list[tuple[str, str, int]]) -> None:
+    """Upsert (source_file, checksum, row_count) rows for source_table"""
+    if not loads:
+        return
+
+    con.executemany(
+        f"""
+        INSERT OR REPLACE INTO {TABLE_INGESTION_LEDGER}
+            (source_table, source_file, checksum, row_count, loaded_at)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """,
+        [(source_table, f, checksum, count) for f, checksum, count in loads],
+    )
+
+
+def file_md5(path) -> str:
+    digest = hashlib.md5()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
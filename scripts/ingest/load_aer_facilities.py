@@ -1,12 +1,25 @@
+import argparse
+import csv
+import glob
 import math
 import os
 import re
 from datetime import datetime
+from functools import lru_cache
 
-import duckdb
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 
+from config.constants import ATS_LRU_CACHE_SIZE, TABLE_AER_FACILITIES, TABLE_ATS_GRID
+from scripts.ingest.ingestion_ledger import (
+    create_ingestion_ledger,
+    file_md5,
+    plan_loads,
+    record_loads,
+)
+from scripts.lib.db import connect
+
 load_dotenv()
 
 # ATS -> lat, lon
@@ -82,6 +95,7 @@ def ats_to_latlon(
     return round(lat, 6), round(lon, 6)
 
 
+@lru_cache(maxsize=ATS_LRU_CACHE_SIZE)
 def parse_bty_to_latlon(bty_location) -> tuple[None, None] | tuple:
     """
     Convert ATS (dashed or 10-digit) to lat/lon.
@@ -139,8 +153,283 @@ def parse_bty_to_latlon(bty_location) -> tuple[None, None] | tuple:
     return None, None
 
 
+# Vectorized ATS -> lat, lon
+
+DASHED_ATS_PATTERN = r"^(\d{1,2})-(\d{1,2})-(\d{1,3})-(\d{1,2})([WE])(\d)$"
+COMPACT_ATS_PATTERN = r"^(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})$"
+
+
+def round_like_python(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    Element-wise equivalent of Python's round(x, ndigits), bit for bit.
+
+    rint(x * 10**n) / 10**n matches round() except when the scaled value
+    lands within rounding error of a .5 tie; those few elements go
+    through round() itself.
+    """
+    scale = 10.0**ndigits
+    scaled = values * scale
+    rounded = np.rint(scaled) / scale
+
+    near_tie = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        rounded[i] = round(float(values[i]), ndigits)
+
+    return rounded
+
+
+def ats_to_latlon_vectorized(
+    lsd, section, township, range_num, direction, meridian
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Array version of ats_to_latlon(). Arguments are equal-length arrays
+    (direction as "W"/"E" strings); invalid rows come back as NaN.
+
+    Every float operation is done in the same order as the scalar
+    function, and cos() is evaluated with math.cos on the distinct
+    latitudes, so results are bit-for-bit equal to ats_to_latlon().
+    """
+    lsd = np.asarray(lsd, dtype=np.int64)
+    section = np.asarray(section, dtype=np.int64)
+    township = np.asarray(township, dtype=np.int64)
+    range_num = np.asarray(range_num, dtype=np.int64)
+    direction = np.asarray(direction, dtype=object)
+    meridian = np.asarray(meridian, dtype=np.int64)
+
+    valid = (
+        (lsd >= 1)
+        & (lsd <= 16)
+        & (section >= 1)
+        & (section <= 36)
+        & (township >= 1)
+        & (township <= 126)
+        & (range_num >= 1)
+        & (range_num <= 34)
+        & np.isin(meridian, (4, 5, 6))
+        & ((direction == "W") | (direction == "E"))
+    )
+
+    base_lat = 49.0
+    base_lon = np.select(
+        [meridian == 4, meridian == 5, meridian == 6], [-110.0, -114.0, -118.0], default=np.nan
+    )
+
+    MILE = 1609.344
+    TOWNSHIP = 6 * MILE
+    SECTION = 1 * MILE
+    LSD = SECTION / 4
+
+    sec_row = (section - 1) // 6
+    sec_col = (section - 1) % 6
+    sec_col = np.where(sec_row % 2 == 1, 5 - sec_col, sec_col)
+
+    lsd_row = (lsd - 1) // 4
+    lsd_col = (lsd - 1) % 4
+
+    north_m = township * TOWNSHIP + sec_row * SECTION + lsd_row * LSD
+    west_m = range_num * TOWNSHIP + sec_col * SECTION + lsd_col * LSD
+
+    lat = base_lat + north_m / 111320
+
+    unique_lat, inverse = np.unique(lat, return_inverse=True)
+    cos_lat = np.array([math.cos(math.radians(v)) for v in unique_lat.tolist()])
+    meters_per_degree_lon = 111320 * cos_lat[inverse.reshape(lat.shape)]
+
+    offset = west_m / meters_per_degree_lon
+    lon = np.where(direction == "W", base_lon - offset, base_lon + offset)
+
+    lat = np.where(valid, round_like_python(lat, 6), np.nan)
+    lon = np.where(valid, round_like_python(lon, 6), np.nan)
+
+    return lat, lon
+
+
+def extract_ats_fields(bty_location: pd.Series) -> dict[str, np.ndarray]:
+    """
+    Parse a column of dashed or 10-digit ATS strings into integer field
+    arrays (lsd, section, township, range_num, meridian), a direction array
+    and a `matched` mask for rows that fit either format.
+    """
+    values = bty_location.astype(str).str.strip().str.upper()
+
+    dashed = values.str.extract(DASHED_ATS_PATTERN)
+    compact = values.str.extract(COMPACT_ATS_PATTERN)
+
+    is_dashed = dashed[0].notna().to_numpy()
+    is_compact = ~is_dashed & compact[0].notna().to_numpy()
+
+    def field(frame, group, mask):
+        return np.where(mask, pd.to_numeric(frame[group]).fillna(0).to_numpy(np.int64), 0)
+
+    return {
+        "lsd": field(dashed, 0, is_dashed) + field(compact, 4, is_compact),
+        "section": field(dashed, 1, is_dashed) + field(compact, 3, is_compact),
+        "township": field(dashed, 2, is_dashed) + field(compact, 1, is_compact),
+        "range_num": field(dashed, 3, is_dashed) + field(compact, 2, is_compact),
+        # Compact format does NOT encode direction; Alberta ATS is always West
+        "direction": np.where(is_dashed, dashed[4].fillna("").to_numpy(object), "W"),
+        "meridian": field(dashed, 5, is_dashed) + field(compact, 0, is_compact),
+        "matched": is_dashed | is_compact,
+    }
+
+
+def parse_bty_series_to_latlon(bty_location: pd.Series) -> pd.DataFrame:
+    """
+    Vectorized parse_bty_to_latlon() over a whole column.
+
+    Returns a DataFrame with float latitude/longitude columns aligned on
+    the input index, NaN where the scalar function returns (None, None).
+    """
+    fields = extract_ats_fields(bty_location)
+    matched = fields.pop("matched")
+
+    lat, lon = ats_to_latlon_vectorized(**fields)
+
+    return pd.DataFrame(
+        {
+            "latitude": np.where(matched, lat, np.nan),
+            "longitude": np.where(matched, lon, np.nan),
+        },
+        index=bty_location.index,
+    )
+
+
+def normalize_ats(lsd, section, township, range_num, direction, meridian):
+    """
+    Normalized ATS key, e.g. 02-21-065-04W4 (the ats_lsd_grid key).
+    Works element-wise on pandas Series as well as on scalars.
+    """
+    if isinstance(lsd, pd.Series):
+        return (
+            lsd.astype(str).str.zfill(2)
+            + "-"
+            + section.astype(str).str.zfill(2)
+            + "-"
+            + township.astype(str).str.zfill(3)
+            + "-"
+            + range_num.astype(str).str.zfill(2)
+            + direction.astype(str)
+            + meridian.astype(str)
+        )
+
+    return f"{lsd:02d}-{section:02d}-{township:03d}-{range_num:02d}{direction}{meridian}"
+
+
+def normalize_bty_series(bty_location: pd.Series) -> pd.Series:
+    """Normalized ATS key per row, NaN where the string is not ATS"""
+    fields = extract_ats_fields(bty_location)
+    matched = fields.pop("matched")
+
+    keys = normalize_ats(**{k: pd.Series(v, index=bty_location.index) for k, v in fields.items()})
+    return keys.where(matched)
+
+
+def ats_grid_exists(con) -> bool:
+    schema, table = TABLE_ATS_GRID.split(".")
+    return (
+        con.execute(
+            """
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = ? AND table_name = ?
+        """,
+            [schema, table],
+        ).fetchone()[0]
+        > 0
+    )
+
+
+def resolve_bty_locations(con, bty_location: pd.Series) -> pd.DataFrame:
+    """
+    latitude/longitude for a column of ATS strings.
+
+    Distinct normalized keys are hash-joined to the precomputed
+    TABLE_ATS_GRID; keys missing from the grid (east-of-meridian or invalid
+    locations) fall back to the vectorized conversion. Without the grid
+    table everything goes through the vectorized conversion.
+    """
+    if not ats_grid_exists(con):
+        return parse_bty_series_to_latlon(bty_location)
+
+    keys = normalize_bty_series(bty_location)
+
+    distinct = pd.DataFrame({"ats_key": keys.dropna().unique()}, dtype=object)
+    con.register("bty_keys", distinct)
+    found = (
+        con.execute(f"""
+        SELECT k.ats_key, g.latitude, g.longitude
+        FROM bty_keys k
+        JOIN {TABLE_ATS_GRID} g USING (ats_key)
+    """)
+        .fetchdf()
+        .set_index("ats_key")
+    )
+    con.unregister("bty_keys")
+
+    coords = pd.DataFrame(
+        {
+            "latitude": keys.map(found["latitude"]).astype(float),
+            "longitude": keys.map(found["longitude"]).astype(float),
+        },
+        index=bty_location.index,
+    )
+
+    missing = keys.notna() & coords["latitude"].isna()
+    if missing.any():
+        coords.loc[missing] = parse_bty_series_to_latlon(bty_location[missing])
+
+    return coords
+
+
 # Ingestion
 
+# ST60 CSV header -> bronze column (pandas names the second BTY column BTY.1)
+AER_COLUMNS = {
+    "BATTERY": "facility_id",
+    "OPERATOR": "operator",
+    "BTY": "facility_type",
+    "BTY.1": "facility_description",
+    "GAS PROD": "gas_prod_1000m3",
+    "GAS FLARED": "gas_flared_1000m3",
+    "GAS VENTED": "gas_vented_1000m3",
+    "OIL PROD": "oil_prod_m3",
+    "WTR PROD": "water_prod_m3",
+    "TOTAL": "total_wells",
+    "BTY LOCATION EDIT": "bty_location_raw",
+    "LICENCE": "licence",
+}
+
+AER_NUMERIC_COLUMNS = {
+    "gas_prod_1000m3": "float",
+    "gas_flared_1000m3": "float",
+    "gas_vented_1000m3": "float",
+    "oil_prod_m3": "float",
+    "water_prod_m3": "float",
+    "total_wells": "Int64",  # Nullable integer
+}
+
+# pandas' default NA markers, so both loaders null the same cells
+PANDAS_NA_VALUES = [
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+]
+
 
 def extract_reporting_month_from_filename(path):
     """
@@ -160,7 +449,12 @@ def extract_reporting_month_from_filename(path):
     return datetime(year, month, 1).date()
 
 
-def load_aer_data(csv_path, db_path="./emissions_ghg.duckdb") -> None:
+def load_aer_data(csv_path, db_path="./emissions_ghg.duckdb") -> int:
+    """
+    Load one ST60 file through pandas. Files already in the ingestion
+    ledger with the same checksum are skipped; a changed file replaces its
+    previous rows in one transaction. Returns the number of rows inserted.
+    """
     print("Loading AER battery monthly dataset")
     print(f"File: {csv_path}")
 
@@ -168,53 +462,42 @@ def load_aer_data(csv_path, db_path="./emissions_ghg.duckdb") -> None:
         raise FileNotFoundError(csv_path)
 
     reporting_month = extract_reporting_month_from_filename(csv_path)
+    source_file = os.path.basename(csv_path)
+    checksum = file_md5(csv_path)
+
+    con = connect(db_path)
+
+    create_ingestion_ledger(con)
+    new, changed = plan_loads(con, TABLE_AER_FACILITIES, {source_file: checksum})
+
+    if not new and not changed:
+        print(f"Already ingested, skipping: {source_file}")
+        con.close()
+        return 0
 
     df = pd.read_csv(csv_path, skiprows=1, header=[0], low_memory=False)
     df = df.iloc[1:].reset_index(drop=True)
 
     if "BTY LOCATION EDIT" not in df.columns:
+        con.close()
         raise ValueError("Expected column 'BTY LOCATION EDIT' not found")
 
-    coords = df["BTY LOCATION EDIT"].apply(parse_bty_to_latlon)
-    df["latitude"] = coords.apply(lambda x: x[0])
-    df["longitude"] = coords.apply(lambda x: x[1])
+    coords = resolve_bty_locations(con, df["BTY LOCATION EDIT"])
+    df["latitude"] = coords["latitude"]
+    df["longitude"] = coords["longitude"]
 
     df = df.dropna(subset=["latitude", "longitude"]).copy()
 
     df["reporting_month"] = reporting_month
     df["ingestion_date"] = datetime.now().date()
-    df["source_file"] = os.path.basename(csv_path)
+    df["source_file"] = source_file
 
     df["row_id"] = range(1, len(df) + 1)
 
     # Rename columns to normalized schema
-    df = df.rename(
-        columns={
-            "BATTERY": "facility_id",
-            "OPERATOR": "operator",
-            "BTY": "facility_type",
-            "BTY.1": "facility_description",
-            "GAS PROD": "gas_prod_1000m3",
-            "GAS FLARED": "gas_flared_1000m3",
-            "GAS VENTED": "gas_vented_1000m3",
-            "OIL PROD": "oil_prod_m3",
-            "WTR PROD": "water_prod_m3",
-            "TOTAL": "total_wells",
-            "BTY LOCATION EDIT": "bty_location_raw",
-            "LICENCE": "licence",
-        }
-    )
-
-    numeric_cols = {
-        "gas_prod_1000m3": "float",
-        "gas_flared_1000m3": "float",
-        "gas_vented_1000m3": "float",
-        "oil_prod_m3": "float",
-        "water_prod_m3": "float",
-        "total_wells": "Int64",  # Nullable integer
-    }
+    df = df.rename(columns=AER_COLUMNS)
 
-    for col, dtype in numeric_cols.items():
+    for col, dtype in AER_NUMERIC_COLUMNS.items():
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce")
             if dtype == "Int64":
@@ -233,8 +516,6 @@ def load_aer_data(csv_path, db_path="./emissions_ghg.duckdb") -> None:
     # Verify
     print("\n=== Final dtypes (should be no 'str') ===")
     print(df.dtypes)
-    con = duckdb.connect(db_path)
-    con.execute("LOAD spatial;")
 
     con.register("df_aer", df)
 
@@ -243,52 +524,275 @@ def load_aer_data(csv_path, db_path="./emissions_ghg.duckdb") -> None:
         SELECT * FROM df_aer WHERE 1=0
     """)
 
-    con.execute("""
-        INSERT INTO bronze.aer_battery_monthly
-        SELECT
-            row_id,
-            facility_id,
-            facility_type,
-            licence,
-            operator,
-            facility_description,
-            reporting_month,
-            ingestion_date,
-            source_file,
-            bty_location_raw,
-            latitude,
-            longitude,
-            ST_Point(longitude, latitude) AS location,
-            oil_prod_m3,
-            gas_prod_1000m3,
-            gas_flared_1000m3,
-            gas_vented_1000m3,
-            water_prod_m3,
-            total_wells
-        FROM df_aer
-    """)
+    con.execute("BEGIN TRANSACTION")
+
+    try:
+        if changed:
+            con.execute(
+                "DELETE FROM bronze.aer_battery_monthly WHERE source_file = ?", [source_file]
+            )
+
+        con.execute("""
+            INSERT INTO bronze.aer_battery_monthly BY NAME
+            SELECT
+                row_id,
+                facility_id,
+                facility_type,
+                licence,
+                operator,
+                facility_description,
+                reporting_month,
+                ingestion_date,
+                source_file,
+                bty_location_raw,
+                latitude,
+                longitude,
+                ST_Point(longitude, latitude) AS location,
+                oil_prod_m3,
+                gas_prod_1000m3,
+                gas_flared_1000m3,
+                gas_vented_1000m3,
+                water_prod_m3,
+                total_wells
+            FROM df_aer
+        """)
+
+        record_loads(con, TABLE_AER_FACILITIES, [(source_file, checksum, len(df))])
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        con.close()
+        raise
+
+    print(f"Inserted {len(df)} records for {reporting_month}")
+
+    con.close()
+    return len(df)
+
+
+# Normalized ATS key (LL-SS-TTT-RRWM) in SQL, mirroring normalize_bty_series(),
+# and the reporting month from an ST60 filename
+ATS_KEY_MACROS = """
+    CREATE OR REPLACE TEMP MACRO ats_dashed(s) AS
+        regexp_extract(s, '__DASHED__', ['lsd', 'sec', 'twp', 'rge', 'dir', 'mer']);
+    CREATE OR REPLACE TEMP MACRO ats_compact(s) AS
+        regexp_extract(s, '__COMPACT__', ['mer', 'twp', 'rge', 'sec', 'lsd']);
+    CREATE OR REPLACE TEMP MACRO ats_key_clean(s) AS CASE
+        WHEN ats_dashed(s).lsd <> '' THEN printf(
+            '%02d-%02d-%03d-%02d%s%d',
+            ats_dashed(s).lsd::INTEGER, ats_dashed(s).sec::INTEGER,
+            ats_dashed(s).twp::INTEGER, ats_dashed(s).rge::INTEGER,
+            ats_dashed(s).dir, ats_dashed(s).mer::INTEGER)
+        WHEN ats_compact(s).lsd <> '' THEN printf(
+            '%02d-%02d-%03d-%02dW%d',
+            ats_compact(s).lsd::INTEGER, ats_compact(s).sec::INTEGER,
+            ats_compact(s).twp::INTEGER, ats_compact(s).rge::INTEGER,
+            ats_compact(s).mer::INTEGER)
+    END;
+    CREATE OR REPLACE TEMP MACRO ats_key(raw) AS
+        ats_key_clean(upper(regexp_replace(raw, '^\\s+|\\s+$', '', 'g')));
+    CREATE OR REPLACE TEMP MACRO reporting_month(filename) AS make_date(
+        regexp_extract(filename, '(\\d{4})[_-](\\d{2})', 1)::INTEGER,
+        regexp_extract(filename, '(\\d{4})[_-](\\d{2})', 2)::INTEGER,
+        1);
+    """.replace("__DASHED__", DASHED_ATS_PATTERN).replace("__COMPACT__", COMPACT_ATS_PATTERN)
+
+
+def read_st60_header(csv_path) -> list[str]:
+    """
+    Column names from the second line of an ST60 file, with repeated names
+    suffixed .1, .2... the way pandas does it (BTY, BTY.1).
+    """
+    with open(csv_path, newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.reader(f)
+        next(reader)
+        header = next(reader)
+
+    seen = {}
+    names = []
+    for name in header:
+        if name in seen:
+            seen[name] += 1
+            names.append(f"{name}.{seen[name]}")
+        else:
+            seen[name] = 0
+            names.append(name)
+
+    return names
+
+
+def load_aer_data_duckdb(csv_glob, db_path="./emissions_ghg.duckdb") -> int:
+    """
+    Load one or many ST60 files (a path or glob) in a single
+    INSERT ... SELECT over DuckDB's read_csv, without pandas.
+
+    Same skip rows, renames and numeric coercion as load_aer_data().
+    Coordinates come from a join to TABLE_ATS_GRID (run
+    scripts/setup/create_ats_grid.py first), so only west-of-meridian
+    locations are resolved. Files are checked against the ingestion
+    ledger like load_aer_data(); new and changed ones are loaded in one
+    transaction. Returns the number of rows inserted.
+    """
+    files = sorted(glob.glob(str(csv_glob)))
+    if not files:
+        raise FileNotFoundError(csv_glob)
+
+    header = read_st60_header(files[0])
+    for path in files[1:]:
+        if read_st60_header(path) != header:
+            raise ValueError(f"{os.path.basename(path)} has a different column layout")
+
+    if "BTY LOCATION EDIT" not in header:
+        raise ValueError("Expected column 'BTY LOCATION EDIT' not found")
+
+    checksums = {}
+    for path in files:
+        extract_reporting_month_from_filename(path)
+        checksums[os.path.basename(path)] = file_md5(path)
+
+    con = connect(db_path)
 
-    count = con.execute(
-        """
-        SELECT COUNT(*) FROM bronze.aer_battery_monthly
-        WHERE reporting_month = ?
-    """,
-        [reporting_month],
-    ).fetchone()[0]
+    if not ats_grid_exists(con):
+        con.close()
+        raise RuntimeError(f"{TABLE_ATS_GRID} missing, run scripts/setup/create_ats_grid.py")
 
-    print(f"Inserted {count} records for {reporting_month}")
+    create_ingestion_ledger(con)
+    new, changed = plan_loads(con, TABLE_AER_FACILITIES, checksums)
+    pending = set(new + changed)
+    to_load = [path for path in files if os.path.basename(path) in pending]
+
+    print(
+        f"{len(new)} new, {len(changed)} changed, "
+        f"{len(files) - len(to_load)} already ingested file(s)"
+    )
+
+    if not to_load:
+        con.close()
+        return 0
+
+    con.execute(ATS_KEY_MACROS)
+    con.execute("BEGIN TRANSACTION")
+
+    try:
+        if changed:
+            con.execute(
+                "DELETE FROM bronze.aer_battery_monthly WHERE list_contains(?, source_file)",
+                [changed],
+            )
+
+        inserted = _insert_st60_files(con, to_load, header)
+
+        record_loads(
+            con,
+            TABLE_AER_FACILITIES,
+            [(f, checksums[f], inserted.get(f, 0)) for f in new + changed],
+        )
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        con.close()
+        raise
+
+    total = sum(inserted.values())
+    print(f"Inserted {total} records from {len(to_load)} file(s)")
 
     con.close()
-    return
+    return total
+
+
+def _insert_st60_files(con, files, header) -> dict[str, int]:
+    """INSERT ... SELECT of the ST60 files; returns rows inserted per file"""
+
+    def source(name):
+        return f'"{name}"' if name in header else "NULL"
+
+    def numeric(name):
+        target = "DOUBLE" if AER_NUMERIC_COLUMNS[AER_COLUMNS[name]] == "float" else "INTEGER"
+        return f"TRY_CAST(TRY_CAST({source(name)} AS DOUBLE) AS {target})"
+
+    con.execute(
+        f"""
+        INSERT INTO bronze.aer_battery_monthly (
+            row_id, facility_id, licence, operator, facility_type, facility_description,
+            reporting_month, ingestion_date, source_file,
+            bty_location_raw, latitude, longitude, location,
+            oil_prod_m3, gas_prod_1000m3, gas_flared_1000m3, gas_vented_1000m3,
+            water_prod_m3, total_wells
+        )
+        WITH raw AS (
+            SELECT *, ats_key("BTY LOCATION EDIT") AS ats_key
+            FROM read_csv(
+                ?,
+                header = false,
+                skip = 3,               -- title line, header line, units line
+                names = ?,
+                all_varchar = true,
+                nullstr = ?,
+                filename = true
+            ) WITH ORDINALITY     -- data line number, in file order across the list
+        )
+        SELECT
+            -- Resolved rows numbered in file order, as in load_aer_data()
+            ROW_NUMBER() OVER (PARTITION BY raw.filename ORDER BY raw.ordinality) AS row_id,
+            {source("BATTERY")} AS facility_id,
+            {source("LICENCE")} AS licence,
+            {source("OPERATOR")} AS operator,
+            {source("BTY")} AS facility_type,
+            {source("BTY.1")} AS facility_description,
+            reporting_month(parse_filename(raw.filename)) AS reporting_month,
+            CURRENT_DATE AS ingestion_date,
+            parse_filename(raw.filename) AS source_file,
+            "BTY LOCATION EDIT" AS bty_location_raw,
+            g.latitude,
+            g.longitude,
+            ST_Point(g.longitude, g.latitude) AS location,
+            {numeric("OIL PROD")} AS oil_prod_m3,
+            {numeric("GAS PROD")} AS gas_prod_1000m3,
+            {numeric("GAS FLARED")} AS gas_flared_1000m3,
+            {numeric("GAS VENTED")} AS gas_vented_1000m3,
+            {numeric("WTR PROD")} AS water_prod_m3,
+            {numeric("TOTAL")} AS total_wells
+        FROM raw
+        JOIN {TABLE_ATS_GRID} g ON g.ats_key = raw.ats_key
+        """,
+        [files, header, PANDAS_NA_VALUES],
+    )
+
+    names = [os.path.basename(path) for path in files]
+    return dict(
+        con.execute(
+            """
+            SELECT source_file, COUNT(*) FROM bronze.aer_battery_monthly
+            WHERE list_contains(?, source_file)
+            GROUP BY source_file
+            """,
+            [names],
+        ).fetchall()
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load AER ST60 battery CSVs into bronze")
+    parser.add_argument(
+        "csv_path",
+        nargs="?",
+        default="./data/raw/ST60_2025-01.csv",
+        help="ST60 CSV file (the duckdb engine also accepts a glob)",
+    )
+    parser.add_argument("--engine", choices=["pandas", "duckdb"], default="pandas")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    # Path to your AER CSV file
-    csv_path = "./data/raw/ST60_2025-01.csv"
+    args = parse_args()
 
     try:
-        success = load_aer_data(csv_path)
-        exit(0 if success else 1)
+        # 0 rows inserted is a successful no-op: the ledger already has every file
+        if args.engine == "duckdb":
+            load_aer_data_duckdb(args.csv_path)
+        else:
+            load_aer_data(args.csv_path)
+        exit(0)
     except Exception as e:
         print(f"\nERROR: {e}")
         import traceback
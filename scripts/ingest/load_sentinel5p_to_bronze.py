@@ -1,52 +1,143 @@
-import os
 from pathlib import Path
 
-import duckdb
 from dotenv import load_dotenv
 
+from config.constants import TABLE_SENTINEL5P_RAW
+from scripts.ingest.ingestion_ledger import create_ingestion_ledger, plan_loads, record_loads
+from scripts.lib.db import connect
+
 load_dotenv()
 
 PARQUET_FILE = Path("./data/bronze/sentinel5p_ch4.parquet")
-DB_PATH = os.getenv("DUCKDB_DATABASE_PATH", "./emissions_ghg.duckdb")
+
+ROW_ID_SEQUENCE = "bronze.sentinel5p_row_id_seq"
+
+# Closed ring through the four pixel corners; NULL when the extract has no
+# (or NaN) bounds, e.g. files extracted with the xarray engine
+FOOTPRINT_SQL = """
+    CASE WHEN NOT isnan(list_sum(lat_bounds::DOUBLE[]) + list_sum(lon_bounds::DOUBLE[]))
+    THEN ST_MakePolygon(ST_MakeLine(list_transform(
+        [1, 2, 3, 4, 1],
+        lambda i: ST_Point((lon_bounds::DOUBLE[])[i], (lat_bounds::DOUBLE[])[i])
+    )))
+    END
+"""
+
+
+def ensure_row_id_sequence(con) -> None:
+    """
+    Sequence for row_id, started after the current maximum the first time
+    it is created (the only load that needs to scan the table).
+    """
+    exists = con.execute(
+        """
+        SELECT COUNT(*) FROM duckdb_sequences()
+        WHERE schema_name = 'bronze' AND sequence_name = 'sentinel5p_row_id_seq'
+        """
+    ).fetchone()[0]
+
+    if not exists:
+        start = con.execute(
+            f"SELECT COALESCE(MAX(row_id), 0) + 1 FROM {TABLE_SENTINEL5P_RAW}"
+        ).fetchone()[0]
+        con.execute(f"CREATE SEQUENCE {ROW_ID_SEQUENCE} START {start}")
 
 
 def load_to_bronze() -> None:
+    """
+    Load new and changed orbits from PARQUET_FILE into bronze.sentinel5p_raw.
+
+    Each source file is fingerprinted (row count + order-independent hash of
+    its rows) and compared with the ingestion ledger: unchanged files are
+    skipped, changed files are deleted and reloaded, all in one transaction.
+    """
     if not PARQUET_FILE.exists():
         raise FileNotFoundError(f"Parquet file not found: {PARQUET_FILE}")
 
-    con = duckdb.connect(DB_PATH)
-    con.execute("LOAD spatial")
+    con = connect()
 
-    existing = con.execute(
-        "SELECT COUNT(*) FROM bronze.sentinel5p_raw"
-    ).fetchone()[0]
+    create_ingestion_ledger(con)
+    ensure_row_id_sequence(con)
 
-    con.execute(
+    fingerprints = con.execute(
         """
-        INSERT INTO bronze.sentinel5p_raw
         SELECT
-            ROW_NUMBER() OVER () + ? AS row_id,
-            time::TIMESTAMP AS measurement_timestamp,
-            ch4::DOUBLE AS ch4_column,
-            NULL::DOUBLE AS ch4_column_precision,
-            qa::DOUBLE AS qa_value,
-            lat::DOUBLE AS latitude,
-            lon::DOUBLE AS longitude,
-            ST_Point(lon, lat) AS location,
-            orbit::INTEGER AS orbit_number,
-            'L2' AS processing_level,
-            'v02' AS product_version,
-            source_file::VARCHAR AS file_path,
-            CURRENT_TIMESTAMP AS ingestion_timestamp
+            source_file,
+            COUNT(*) AS row_count,
+            SUM(hash(time, lat, lon, ch4, qa, scanline, ground_pixel, orbit))::VARCHAR
         FROM read_parquet(?)
+        GROUP BY source_file
         """,
-        [existing, str(PARQUET_FILE)],
-    )
+        [str(PARQUET_FILE)],
+    ).fetchall()
+
+    checksums = {f: checksum for f, _, checksum in fingerprints}
+    counts = {f: count for f, count, _ in fingerprints}
+
+    parquet_columns = {
+        name
+        for name, *_ in con.execute(
+            "DESCRIBE SELECT * FROM read_parquet(?)", [str(PARQUET_FILE)]
+        ).fetchall()
+    }
+    if {"lat_bounds", "lon_bounds"} <= parquet_columns:
+        footprint = FOOTPRINT_SQL
+    else:
+        footprint = "NULL::GEOMETRY"
+
+    new, changed = plan_loads(con, TABLE_SENTINEL5P_RAW, checksums)
+    to_load = new + changed
+
+    skipped = len(checksums) - len(to_load)
+    print(f"{len(new)} new, {len(changed)} changed, {skipped} already ingested file(s)")
+
+    if not to_load:
+        con.close()
+        return
+
+    con.execute("BEGIN TRANSACTION")
+
+    try:
+        if changed:
+            con.execute(
+                f"DELETE FROM {TABLE_SENTINEL5P_RAW} WHERE list_contains(?, file_path)",
+                [changed],
+            )
+
+        con.execute(
+            f"""
+            INSERT INTO {TABLE_SENTINEL5P_RAW} BY NAME
+            SELECT
+                nextval('{ROW_ID_SEQUENCE}') AS row_id,
+                time::TIMESTAMP AS measurement_timestamp,
+                ch4::DOUBLE AS ch4_column,
+                NULL::DOUBLE AS ch4_column_precision,
+                qa::DOUBLE AS qa_value,
+                lat::DOUBLE AS latitude,
+                lon::DOUBLE AS longitude,
+                ST_Point(lon, lat) AS location,
+                {footprint} AS footprint,
+                orbit::INTEGER AS orbit_number,
+                scanline::INTEGER AS scanline,
+                ground_pixel::INTEGER AS ground_pixel,
+                'L2' AS processing_level,
+                'v02' AS product_version,
+                source_file::VARCHAR AS file_path,
+                CURRENT_TIMESTAMP AS ingestion_timestamp
+            FROM read_parquet(?)
+            WHERE list_contains(?, source_file)
+            """,
+            [str(PARQUET_FILE), to_load],
+        )
 
-    inserted = con.execute(
-        "SELECT COUNT(*) FROM bronze.sentinel5p_raw"
-    ).fetchone()[0] - existing
+        record_loads(con, TABLE_SENTINEL5P_RAW, [(f, checksums[f], counts[f]) for f in to_load])
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        con.close()
+        raise
 
+    inserted = sum(counts[f] for f in to_load)
     print(f"Inserted {inserted:,} rows into bronze.sentinel5p_raw")
 
     con.close()
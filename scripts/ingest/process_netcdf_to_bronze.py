@@ -1,10 +1,22 @@
+import argparse
+import os
 import re
+from collections import deque
+from collections.abc import Collection, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import xarray as xr
 
+from config.constants import TABLE_SENTINEL5P_RAW
+from scripts.ingest.ingestion_ledger import ingested_files
+
 INPUT_DIR = Path("./data/raw/sentinel5p")
 OUTPUT_FILE = Path("./data/bronze/sentinel5p_ch4.parquet")
 
@@ -14,6 +26,17 @@ QA_THRESHOLD = 0.1
 MIN_LON, MIN_LAT = -120, 49
 MAX_LON, MAX_LAT = -110, 60
 
+# Pixel vs sub-satellite latitude spread is a few degrees across the swath;
+# keep a wide margin so the coarse scanline window never clips the bbox
+SCANLINE_WINDOW_MARGIN_DEG = 10.0
+
+GEOLOCATIONS_GROUP = "PRODUCT/SUPPORT_DATA/GEOLOCATIONS"
+
+# Pixel corners. A variable-size list so the all-null column of products
+# without bounds reads back from Parquet (null fixed-size lists don't).
+CORNERS_TYPE = pa.list_(pa.float32())
+
+
 def extract_orbit_from_filename(filename: str) -> int:
     """
     Extract orbit number from Sentinel-5P filename
@@ -25,7 +48,7 @@ def extract_orbit_from_filename(filename: str) -> int:
     """
     # Pattern: match 5-6 digit orbit number after two timestamps
     # S5P_..._STARTTIME_ENDTIME_ORBIT_...
-    match = re.search(r'_(\d{8}T\d{6})_(\d{8}T\d{6})_(\d{5,6})_', filename)
+    match = re.search(r"_(\d{8}T\d{6})_(\d{8}T\d{6})_(\d{5,6})_", filename)
 
     if match:
         orbit = int(match.group(3))
@@ -45,12 +68,7 @@ def extract_file(nc_path: Path) -> pd.DataFrame:
     lat = ds["latitude"]
     lon = ds["longitude"]
 
-    bbox_mask = (
-        (lat >= MIN_LAT) &
-        (lat <= MAX_LAT) &
-        (lon >= MIN_LON) &
-        (lon <= MAX_LON)
-    )
+    bbox_mask = (lat >= MIN_LAT) & (lat <= MAX_LAT) & (lon >= MIN_LON) & (lon <= MAX_LON)
 
     data = xr.Dataset(
         {
@@ -64,11 +82,11 @@ def extract_file(nc_path: Path) -> pd.DataFrame:
     filtered = data.where(bbox_mask, drop=True)
 
     filtered = filtered.where(
-        (~np.isnan(filtered.ch4)) &
-        (~np.isnan(filtered.lat)) &
-        (~np.isnan(filtered.lon)) &
-        (filtered.qa >= QA_THRESHOLD),
-        drop=True
+        (~np.isnan(filtered.ch4))
+        & (~np.isnan(filtered.lat))
+        & (~np.isnan(filtered.lon))
+        & (filtered.qa >= QA_THRESHOLD),
+        drop=True,
     )
 
     if filtered.ch4.size == 0:
@@ -84,15 +102,7 @@ def extract_file(nc_path: Path) -> pd.DataFrame:
     df = stacked.to_dataframe().reset_index()
     df = df.dropna()
 
-    df = df[[
-        "time",
-        "lat",
-        "lon",
-        "ch4",
-        "qa",
-        "scanline",
-        "ground_pixel"
-    ]]
+    df = df[["time", "lat", "lon", "ch4", "qa", "scanline", "ground_pixel"]]
 
     orbit = extract_orbit_from_filename(nc_path.name)
 
@@ -107,32 +117,357 @@ def extract_file(nc_path: Path) -> pd.DataFrame:
     return df
 
 
-def process_all() -> pd.DataFrame:
+@contextmanager
+def open_geolocations(nc_path: Path) -> Iterator[xr.Dataset | None]:
+    """The GEOLOCATIONS group of nc_path, or None when the product lacks it"""
+    try:
+        geo = xr.open_dataset(nc_path, group=GEOLOCATIONS_GROUP)
+    except (OSError, KeyError):
+        yield None
+        return
+
+    with geo:
+        yield geo
+
+
+def coarse_scanline_window(geo: xr.Dataset | None) -> slice | None:
+    """
+    Candidate scanline range from the per-scanline sub-satellite latitude
+    in the GEOLOCATIONS group (a 1-D array, cheap to read).
+
+    Pixel latitudes sit within a few degrees of the sub-satellite point,
+    so SCANLINE_WINDOW_MARGIN_DEG keeps every scanline that could reach
+    the bbox. Returns slice(0, 0) if none can, None if the group or
+    variable is missing.
+    """
+    if geo is None or "satellite_latitude" not in geo:
+        return None
+
+    sat_lat = geo["satellite_latitude"].values.reshape(-1)
+
+    rows = np.flatnonzero(
+        (sat_lat >= MIN_LAT - SCANLINE_WINDOW_MARGIN_DEG)
+        & (sat_lat <= MAX_LAT + SCANLINE_WINDOW_MARGIN_DEG)
+    )
+
+    if rows.size == 0:
+        return slice(0, 0)
+
+    return slice(int(rows[0]), int(rows[-1]) + 1)
+
+
+def latitude_window(lat: np.ndarray) -> slice:
+    """
+    Tightest scanline range (relative to lat) holding any pixel inside
+    [MIN_LAT, MAX_LAT]. lat is (time, scanline, ground_pixel).
+    """
+    in_band = (lat >= MIN_LAT) & (lat <= MAX_LAT)
+    rows = np.flatnonzero(in_band.any(axis=(0, 2)))
+
+    if rows.size == 0:
+        return slice(0, 0)
+
+    return slice(int(rows[0]), int(rows[-1]) + 1)
+
+
+def footprint_bounds(
+    geo: xr.Dataset | None, window: slice, flat: np.ndarray
+) -> tuple[pa.Array, pa.Array]:
+    """
+    Pixel corner latitudes and longitudes (4 each, float32) for the
+    surviving pixels, from the GEOLOCATIONS latitude_bounds/longitude_bounds;
+    all-null columns when the product lacks them. The loader turns them
+    into the footprint polygon.
+    """
+    if geo is None or "latitude_bounds" not in geo or "longitude_bounds" not in geo:
+        return pa.nulls(flat.size, CORNERS_TYPE), pa.nulls(flat.size, CORNERS_TYPE)
+
+    # (time, scanline, ground_pixel, corner) -> one row of 4 corners per pixel
+    offsets = pa.array(np.arange(0, 4 * flat.size + 1, 4, dtype=np.int32))
+
+    return tuple(
+        pa.ListArray.from_arrays(
+            offsets,
+            pa.array(
+                geo[name]
+                .isel(scanline=window)
+                .values.reshape(-1, 4)[flat]
+                .astype(np.float32)
+                .ravel()
+            ),
+        )
+        for name in ("latitude_bounds", "longitude_bounds")
+    )
+
+
+def extract_file_arrow(nc_path: Path) -> pa.Table:
+    """
+    Same rows as extract_file(), without the xarray where/stack/to_dataframe
+    copies. Same columns too, plus each pixel's corner coordinates
+    (lat_bounds, lon_bounds), which the xarray reference path does not
+    extract.
+
+    Only the scanlines crossing the bbox latitudes are read from disk:
+    the window comes from the GEOLOCATIONS sub-satellite latitude (or the
+    latitude array itself when that is missing) and is tightened on the
+    pixel latitudes before lon/ch4/qa are read as hyperslabs. Inside the
+    window lat/lon/ch4/qa are combined into a single boolean mask and the
+    surviving pixels gathered with flat indices straight into Arrow
+    columns, in the same (time, scanline, ground_pixel) order.
+    """
+    with open_geolocations(nc_path) as geo, xr.open_dataset(nc_path, group="PRODUCT") as ds:
+        coarse = coarse_scanline_window(geo)
+
+        ch4_var = "methane_mixing_ratio_bias_corrected"
+        if ch4_var not in ds:
+            raise ValueError(f"{ch4_var} not found in {nc_path.name}")
+
+        if coarse is None:
+            coarse = slice(0, ds.sizes["scanline"])
+
+        lat = ds["latitude"].isel(scanline=coarse).values
+        fine = latitude_window(lat)
+        window = slice(coarse.start + fine.start, coarse.start + fine.stop)
+
+        if window.stop == window.start:
+            return pa.table({})
+
+        lat = lat[:, fine, :]
+        lon = ds["longitude"].isel(scanline=window).values
+        ch4 = ds[ch4_var].isel(scanline=window).values
+        qa = ds["qa_value"].isel(scanline=window).values
+
+        # NaN compares False, so the bbox and QA tests also drop missing values.
+        # In-place ANDs keep a single boolean array alive.
+        mask = lat >= MIN_LAT
+        mask &= lat <= MAX_LAT
+        mask &= lon >= MIN_LON
+        mask &= lon <= MAX_LON
+        mask &= qa >= QA_THRESHOLD
+        mask &= ~np.isnan(ch4)
+
+        flat = np.flatnonzero(mask)
+
+        if flat.size == 0:
+            return pa.table({})
+
+        t_idx, s_idx, p_idx = np.unravel_index(flat, mask.shape)
+
+        orbit = extract_orbit_from_filename(nc_path.name)
+
+        if orbit is None:
+            orbit = ds.attrs.get("orbit", None)
+
+        lat_bounds, lon_bounds = footprint_bounds(geo, window, flat)
+
+        return pa.table(
+            {
+                "time": ds["time"].values[t_idx],
+                "lat": lat.ravel()[flat],
+                "lon": lon.ravel()[flat],
+                "ch4": ch4.ravel()[flat],
+                "qa": qa.ravel()[flat],
+                "scanline": ds["scanline"].values[window][s_idx],
+                "ground_pixel": ds["ground_pixel"].values[p_idx],
+                "orbit": pa.array(np.full(flat.size, orbit), pa.int64()),
+                "source_file": pa.array(np.full(flat.size, nc_path.name), pa.string()),
+                "lat_bounds": lat_bounds,
+                "lon_bounds": lon_bounds,
+            }
+        )
+
+
+EXTRACTORS = {
+    "numpy": extract_file_arrow,
+    "xarray": extract_file,
+}
+
+
+def extract_file_or_error(
+    nc_path: Path, engine: str = "numpy"
+) -> tuple[pd.DataFrame | pa.Table | None, str | None]:
+    """
+    Run the selected extractor and return (rows, None), or (None, error
+    message) for files that should be skipped.
+
+    Errors are returned rather than printed so the parent process reports
+    them in file order, whichever worker hit them.
+    """
+    try:
+        return EXTRACTORS[engine](nc_path), None
+    except (OSError, ValueError, KeyError) as e:
+        return None, str(e)
+
+
+def list_input_files(skip_files: Collection[str] = ()) -> list[Path]:
+    """NetCDF files in INPUT_DIR, minus names in skip_files (already ingested)"""
     files = sorted(INPUT_DIR.glob("*.nc"))
 
     if not files:
         raise FileNotFoundError(f"No NetCDF files in {INPUT_DIR}")
 
-    frames = []
+    if skip_files:
+        kept = [f for f in files if f.name not in skip_files]
+        print(f"Skipping {len(files) - len(kept)} already ingested file(s)")
+        files = kept
+
+    return files
+
+
+def iter_frames(
+    files: list[Path], workers: int = 1, engine: str = "numpy"
+) -> Iterator[pd.DataFrame | pa.Table]:
+    """
+    Yield one non-empty DataFrame (xarray engine) or Arrow table (numpy
+    engine) per file, in file order.
+
+    With workers > 1 at most `workers` files are in flight at once, so a
+    consumer that writes each frame out holds only a handful of orbits in
+    memory, never the whole backfill.
+    """
+    if not files:
+        return
 
-    for file in files:
-        try:
-            df = extract_file(file)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+            pending = deque()
+            queue = iter(files)
 
-            if not df.empty:
-                frames.append(df)
+            for file in islice(queue, workers):
+                pending.append((file, pool.submit(extract_file_or_error, file, engine)))
 
-        except (OSError, ValueError, KeyError) as e:
-            print(f"Skipping {file.name}: {e}")
+            while pending:
+                file, future = pending.popleft()
+                result = future.result()
+
+                for nxt in islice(queue, 1):
+                    pending.append((nxt, pool.submit(extract_file_or_error, nxt, engine)))
+
+                yield from _frame_or_skip(file, result)
+    else:
+        for file in files:
+            yield from _frame_or_skip(file, extract_file_or_error(file, engine))
+
+
+def _frame_or_skip(file: Path, result) -> Iterator[pd.DataFrame | pa.Table]:
+    df, error = result
+
+    if error is not None:
+        print(f"Skipping {file.name}: {error}")
+        return
+
+    if len(df) > 0:
+        yield df
+
+
+def process_all(
+    workers: int = 1, engine: str = "numpy", skip_files: Collection[str] = ()
+) -> pd.DataFrame:
+    """
+    Extract every NetCDF file in INPUT_DIR.
+
+    workers > 1 spreads files over a process pool. Results are collected
+    in sorted file order, so the output is identical to the serial run.
+    """
+    frames = list(iter_frames(list_input_files(skip_files), workers, engine))
 
     if not frames:
         return pd.DataFrame()
 
+    if isinstance(frames[0], pa.Table):
+        return pa.concat_tables(frames, promote_options="default").to_pandas()
+
     return pd.concat(frames, ignore_index=True)
 
 
+def write_streaming(
+    output_file: Path,
+    workers: int = 1,
+    engine: str = "numpy",
+    skip_files: Collection[str] = (),
+) -> int:
+    """
+    Extract every NetCDF file in INPUT_DIR and append each file's rows to
+    output_file as its own row group(s).
+
+    Peak memory is bounded by the largest orbit(s) in flight instead of the
+    whole backfill. The first non-empty file fixes the schema; later files
+    are cast to it. Returns the number of rows written.
+    """
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+
+    writer = None
+    total = 0
+
+    try:
+        for rows in iter_frames(list_input_files(skip_files), workers, engine):
+            if isinstance(rows, pd.DataFrame):
+                rows = pa.Table.from_pandas(rows, preserve_index=False)
+
+            if writer is None:
+                writer = pq.ParquetWriter(output_file, rows.schema, compression="zstd")
+            else:
+                rows = rows.cast(writer.schema)
+
+            writer.write_table(rows)
+            total += len(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return total
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Extract Sentinel-5P NetCDF files to Parquet")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=f"Number of extraction processes (1 = serial, this machine has {os.cpu_count()})",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Append each file to the Parquet output as it is extracted (bounded memory)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=sorted(EXTRACTORS),
+        default="numpy",
+        help="Pixel extraction implementation (xarray is the original reference path)",
+    )
+    parser.add_argument(
+        "--only-new",
+        action="store_true",
+        help="Skip files already recorded in the ingestion ledger",
+    )
+    return parser.parse_args()
+
+
 def main():
-    df = process_all()
+    args = parse_args()
+
+    skip_files = ()
+    if args.only_new:
+        skip_files = ingested_files(
+            os.getenv("DUCKDB_DATABASE_PATH", "./emissions_ghg.duckdb"), TABLE_SENTINEL5P_RAW
+        )
+
+    if args.streaming:
+        total = write_streaming(
+            OUTPUT_FILE, workers=args.workers, engine=args.engine, skip_files=skip_files
+        )
+
+        if total == 0:
+            print("No data extracted")
+            OUTPUT_FILE.unlink(missing_ok=True)
+            return
+
+        print(f"Saved {total:,} rows to {OUTPUT_FILE}")
+        return
+
+    df = process_all(workers=args.workers, engine=args.engine, skip_files=skip_files)
 
     if df.empty:
         print("No data extracted")
@@ -140,12 +475,7 @@ def main():
 
     OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-    df.to_parquet(
-        OUTPUT_FILE,
-        engine="pyarrow",
-        compression="zstd",
-        index=False
-    )
+    df.to_parquet(OUTPUT_FILE, engine="pyarrow", compression="zstd", index=False)
 
     print(f"Saved {len(df):,} rows to {OUTPUT_FILE}")
 
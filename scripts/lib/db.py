@@ -0,0 +1,67 @@
+"""
+Shared DuckDB connection factory
+
+Every entry point opens the warehouse through connect(), so the memory
+limit, thread count, spill directory and extensions from config/constants.py
+(overridable through DUCKDB_MEMORY_LIMIT, DUCKDB_THREADS and
+DUCKDB_TEMP_DIRECTORY in the environment) apply to all of them. Read-only
+connections let several readers (tests, visualization) share the file
+while no writer holds it. Processes that open one connection each (e.g. a
+render pool) pass share=N so that together they stay within one budget.
+"""
+
+import os
+import re
+
+import duckdb
+from dotenv import load_dotenv
+
+from config.constants import (
+    DUCKDB_EXTENSIONS,
+    DUCKDB_MEMORY_LIMIT,
+    DUCKDB_TEMP_DIRECTORY,
+    DUCKDB_THREADS,
+)
+
+load_dotenv()
+
+DB_PATH = os.getenv("DUCKDB_DATABASE_PATH", "./emissions_ghg.duckdb")
+
+
+def split_memory_limit(memory_limit, share) -> str:
+    """memory_limit (e.g. '4GB', '1.5GiB') divided by share, in the same unit"""
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]i?B)\s*", memory_limit, re.IGNORECASE)
+    if not match or share <= 1:
+        return memory_limit
+    return f"{float(match.group(1)) / share:g}{match.group(2)}"
+
+
+def connection_config(share=1) -> dict[str, str]:
+    """
+    Connection settings; share > 1 gives 1/share of the thread and memory
+    budget (at least one thread).
+    """
+    temp_directory = os.getenv("DUCKDB_TEMP_DIRECTORY", str(DUCKDB_TEMP_DIRECTORY))
+    os.makedirs(temp_directory, exist_ok=True)
+
+    memory_limit = os.getenv("DUCKDB_MEMORY_LIMIT", DUCKDB_MEMORY_LIMIT)
+    threads = int(os.getenv("DUCKDB_THREADS", DUCKDB_THREADS))
+
+    return {
+        "memory_limit": split_memory_limit(memory_limit, share),
+        "threads": str(max(1, threads // share)),
+        "temp_directory": temp_directory,
+    }
+
+
+def connect(db_path=None, read_only=False, extensions=DUCKDB_EXTENSIONS, share=1):
+    """
+    Open db_path (default: DUCKDB_DATABASE_PATH) with the configured limits
+    (split share ways) and load the given extensions.
+    """
+    con = duckdb.connect(db_path or DB_PATH, read_only=read_only, config=connection_config(share))
+
+    for extension in extensions:
+        con.execute(f"LOAD {extension};")
+
+    return con
@@ -0,0 +1,93 @@
+"""
+Partitioned Parquet copies of bronze tables on the MinIO warehouse bucket
+
+Each table lives under <LAKE_ROOT>/<schema>/<table>/ as Hive-partitioned
+Parquet (one file per partition), so DuckDB only opens the partitions a
+filter on the partition columns can match. LAKE_ROOT defaults to the
+warehouse bucket; point it at a local directory for development.
+"""
+
+import os
+
+from config.constants import TABLE_AER_FACILITIES, TABLE_SENTINEL5P_RAW
+
+# Table -> (partition columns with their types, SQL deriving columns absent from the table)
+LAKE_TABLES = {
+    TABLE_SENTINEL5P_RAW: {
+        "partitions": {"observation_date": "DATE", "orbit_number": "INTEGER"},
+        "derived": "measurement_timestamp::DATE AS observation_date",
+        "source_file": "file_path",
+    },
+    TABLE_AER_FACILITIES: {
+        "partitions": {"reporting_month": "DATE"},
+        "derived": None,
+        "source_file": "source_file",
+    },
+}
+
+
+def lake_root() -> str:
+    root = os.getenv("LAKE_ROOT")
+    if root:
+        return root.rstrip("/")
+    return f"s3://{os.getenv('MINIO_BUCKET_WAREHOUSE', 'ghg-warehouse')}"
+
+
+def lake_path(table) -> str:
+    schema, name = table.split(".")
+    return f"{lake_root()}/{schema}/{name}"
+
+
+def configure_s3(con) -> None:
+    """httpfs + MinIO credentials from the environment (path-style, no SSL)"""
+    con.execute("LOAD httpfs;")
+    con.execute(f"""
+        SET s3_endpoint = '{os.getenv("MINIO_ENDPOINT")}';
+        SET s3_access_key_id = '{os.getenv("MINIO_ACCESS_KEY")}';
+        SET s3_secret_access_key = '{os.getenv("MINIO_SECRET_KEY")}';
+        SET s3_url_style = 'path';
+        SET s3_use_ssl = false;
+    """)
+
+
+def connect_lake(con) -> None:
+    """Prepare con for reading/writing the lake (S3 settings only when needed)"""
+    if lake_root().startswith("s3://"):
+        configure_s3(con)
+
+
+def read_lake_sql(table) -> str:
+    """read_parquet() over the table's partitions, with typed partition columns"""
+    hive_types = ", ".join(
+        f"'{col}': {col_type}" for col, col_type in LAKE_TABLES[table]["partitions"].items()
+    )
+    return (
+        f"read_parquet('{lake_path(table)}/**/*.parquet', "
+        f"hive_partitioning = true, hive_types = {{{hive_types}}})"
+    )
+
+
+def lake_has_files(con, table) -> bool:
+    """Whether the table has been exported, i.e. its lake path holds any Parquet file"""
+    return (
+        con.execute(f"SELECT COUNT(*) FROM glob('{lake_path(table)}/**/*.parquet')").fetchone()[0]
+        > 0
+    )
+
+
+def create_lake_views(con) -> list[str]:
+    """
+    <table>_lake views over the partitioned copies, e.g. bronze.sentinel5p_raw_lake;
+    tables never exported are skipped. Returns the views created.
+    """
+    views = []
+
+    for table in LAKE_TABLES:
+        if not lake_has_files(con, table):
+            print(f"  WARNING: no Parquet files under {lake_path(table)}, skipping {table}_lake")
+            continue
+
+        con.execute(f"CREATE OR REPLACE VIEW {table}_lake AS SELECT * FROM {read_lake_sql(table)}")
+        views.append(f"{table}_lake")
+
+    return views
@@ -0,0 +1,109 @@
+"""
+Lazy, filtered scans of Sentinel-5P pixels as Arrow record batches
+
+scan_pixels() builds one SELECT over bronze.sentinel5p_raw or
+silver.sentinel5p_ch4_cleaned. The date range, orbits, bbox and QA filters
+go into its WHERE clause, where DuckDB pushes them into the table scan
+(zone maps skip row groups that cannot match). Results are returned as a
+pyarrow RecordBatchReader, so callers iterate batches of at most
+batch_rows rows and never hold the full pixel table in memory:
+
+    reader = scan_pixels(con, start="2025-07-01", end="2025-08-01",
+                         bbox=ALBERTA_BBOX, min_qa=0.7)
+    for batch in reader:
+        ...
+"""
+
+from collections.abc import Iterable, Sequence
+from datetime import date, datetime
+
+import pyarrow as pa
+
+from config.constants import TABLE_SENTINEL5P_CLEANED, TABLE_SENTINEL5P_RAW
+
+PIXEL_SOURCES = {
+    "bronze": TABLE_SENTINEL5P_RAW,
+    "silver": TABLE_SENTINEL5P_CLEANED,
+}
+
+DEFAULT_COLUMNS = (
+    "orbit_number",
+    "scanline",
+    "ground_pixel",
+    "measurement_timestamp",
+    "latitude",
+    "longitude",
+    "ch4_column",
+    "qa_value",
+)
+
+PIXEL_BATCH_ROWS = 100_000
+
+
+def pixel_query(
+    source: str = "silver",
+    columns: Sequence[str] = DEFAULT_COLUMNS,
+    start: date | datetime | str | None = None,
+    end: date | datetime | str | None = None,
+    orbits: Iterable[int] | None = None,
+    bbox: dict[str, float] | None = None,
+    min_qa: float | None = None,
+) -> tuple[str, dict]:
+    """
+    (SQL, named parameters) selecting columns from the source table.
+
+    start is inclusive and end exclusive, both on measurement_timestamp;
+    bbox uses the ALBERTA_BBOX keys. Filters left as None are not applied.
+    """
+    if source not in PIXEL_SOURCES:
+        raise ValueError(f"Unknown pixel source {source!r}, expected one of {list(PIXEL_SOURCES)}")
+
+    predicates = []
+    params = {}
+
+    if start is not None:
+        predicates.append("measurement_timestamp >= $start::TIMESTAMP")
+        params["start"] = str(start)
+
+    if end is not None:
+        predicates.append("measurement_timestamp < $end::TIMESTAMP")
+        params["end"] = str(end)
+
+    if orbits is not None:
+        # Inlined as a constant IN list so the scan can prune on it
+        orbit_list = ", ".join(str(int(orbit)) for orbit in orbits)
+        predicates.append(f"orbit_number IN ({orbit_list})" if orbit_list else "FALSE")
+
+    if bbox is not None:
+        predicates.append("latitude BETWEEN $min_lat AND $max_lat")
+        predicates.append("longitude BETWEEN $min_lon AND $max_lon")
+        params.update(
+            {key: float(bbox[key]) for key in ("min_lat", "max_lat", "min_lon", "max_lon")}
+        )
+
+    if min_qa is not None:
+        predicates.append("qa_value >= $min_qa")
+        params["min_qa"] = float(min_qa)
+
+    where = " AND ".join(predicates) or "TRUE"
+
+    return (
+        f"SELECT {', '.join(columns)} FROM {PIXEL_SOURCES[source]} WHERE {where}",
+        params,
+    )
+
+
+def scan_pixels(con, batch_rows=PIXEL_BATCH_ROWS, **filters) -> pa.RecordBatchReader:
+    """
+    Stream the pixels matching filters (see pixel_query) as Arrow record
+    batches; nothing is read until the reader is iterated.
+    """
+    sql, params = pixel_query(**filters)
+    # to_arrow_reader() is DuckDB 1.5's name for fetch_record_batch()
+    return con.execute(sql, params).to_arrow_reader(batch_rows)
+
+
+def count_pixels(con, **filters) -> int:
+    """Number of pixels scan_pixels() would return, without fetching them"""
+    sql, params = pixel_query(columns=("1",), **filters)
+    return con.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
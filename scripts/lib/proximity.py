@@ -0,0 +1,140 @@
+"""
+Grid-bucketed proximity join between two point sets (pixels, facilities)
+
+Points are bucketed into lat/lon cells at least `distance_m` wide. The
+right side is expanded to its 3x3 neighbourhood, so candidate pairs come
+from an equi-join on the cell key; only those candidates get the exact
+haversine distance check. Cost is O(pixels + facilities + candidates)
+instead of O(pixels x facilities).
+
+space_time_join_sql() adds a monthly bucket to the key: pixels are
+truncated to their observation month and only meet facilities reporting
+that month, so monthly facility rows never fan out across a pixel's whole
+history.
+"""
+
+import math
+
+from config.constants import ALBERTA_BBOX, FACILITY_BUFFER_DISTANCE_M
+
+EARTH_RADIUS_M = 6371008.8  # Mean radius, as used by ST_Distance_Sphere
+
+
+def register_haversine(con) -> None:
+    """haversine_m(lat1, lon1, lat2, lon2): great-circle distance in metres"""
+    con.execute(f"""
+        CREATE OR REPLACE TEMP MACRO haversine_m(lat1, lon1, lat2, lon2) AS
+            2 * {EARTH_RADIUS_M} * asin(sqrt(
+                pow(sin(radians(lat2 - lat1) / 2), 2)
+                + cos(radians(lat1)) * cos(radians(lat2))
+                * pow(sin(radians(lon2 - lon1) / 2), 2)
+            ))
+    """)
+
+
+def cell_size_deg(distance_m: float, max_abs_lat: float) -> tuple[float, float]:
+    """
+    (lat, lon) cell size in degrees such that any two points within
+    distance_m of each other, both at |lat| <= max_abs_lat, fall in the
+    same or adjacent cells.
+    """
+    angle = distance_m / EARTH_RADIUS_M
+    dlat = math.degrees(angle)
+
+    # Widest longitude span of a distance_m circle occurs at the highest latitude
+    phi = math.radians(min(max_abs_lat + dlat, 89.9))
+    dlon = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(phi))))
+
+    return dlat, dlon
+
+
+def proximity_join_sql(
+    left: str,
+    right: str,
+    left_key: str,
+    right_key: str,
+    distance_m: float = FACILITY_BUFFER_DISTANCE_M,
+    max_abs_lat: float = ALBERTA_BBOX["max_lat"],
+) -> str:
+    """
+    SQL for all (left_key, right_key, distance_m) pairs within distance_m.
+
+    left and right are table names or parenthesised subqueries exposing
+    `latitude` and `longitude` columns; left_key / right_key are column
+    names (or comma-separated lists) carried through to the output.
+    Needs register_haversine() on the connection.
+    """
+    return _bucketed_join_sql(left, right, left_key, right_key, distance_m, max_abs_lat)
+
+
+def space_time_join_sql(
+    left: str,
+    right: str,
+    left_key: str,
+    right_key: str,
+    left_time: str = "measurement_timestamp",
+    right_time: str = "reporting_month",
+    distance_m: float = FACILITY_BUFFER_DISTANCE_M,
+    max_abs_lat: float = ALBERTA_BBOX["max_lat"],
+) -> str:
+    """
+    SQL for all (month, left_key, right_key, distance_m) pairs within
+    distance_m whose left_time and right_time fall in the same month.
+
+    Both sides are keyed on (month, cell_y, cell_x) before the equi-join,
+    so the candidate set grows with the rows per month rather than with
+    the product of both histories. Same inputs as proximity_join_sql(),
+    plus the time column of each side.
+    """
+    return _bucketed_join_sql(
+        left,
+        right,
+        left_key,
+        right_key,
+        distance_m,
+        max_abs_lat,
+        left_month=f"date_trunc('month', {left_time})::DATE",
+        right_month=f"date_trunc('month', {right_time})::DATE",
+    )
+
+
+def _bucketed_join_sql(
+    left, right, left_key, right_key, distance_m, max_abs_lat, left_month=None, right_month=None
+) -> str:
+    dlat, dlon = cell_size_deg(distance_m, max_abs_lat)
+
+    month = "month, " if left_month else ""
+    left_bucket = f"{left_month} AS month, " if left_month else ""
+    right_bucket = f"{right_month} AS month, " if right_month else ""
+
+    return f"""
+        (
+            WITH left_cells AS (
+                SELECT {left_bucket}{left_key}, latitude, longitude,
+                       floor(latitude / {dlat})::BIGINT AS cell_y,
+                       floor(longitude / {dlon})::BIGINT AS cell_x
+                FROM {left}
+                WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+            ),
+            right_cells AS (
+                SELECT {right_bucket}{right_key}, latitude, longitude,
+                       floor(latitude / {dlat})::BIGINT + dy AS cell_y,
+                       floor(longitude / {dlon})::BIGINT + dx AS cell_x
+                FROM {right},
+                     (SELECT unnest([-1, 0, 1]) AS dy),
+                     (SELECT unnest([-1, 0, 1]) AS dx)
+                WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+            )
+            SELECT
+                {month}{_qualified("l", left_key)},
+                {_qualified("r", right_key)},
+                haversine_m(l.latitude, l.longitude, r.latitude, r.longitude) AS distance_m
+            FROM left_cells l
+            JOIN right_cells r USING ({month}cell_y, cell_x)
+            WHERE haversine_m(l.latitude, l.longitude, r.latitude, r.longitude) <= {distance_m}
+        )
+    """
+
+
+def _qualified(alias: str, keys: str) -> str:
+    return ", ".join(f"{alias}.{key.strip()}" for key in keys.split(","))
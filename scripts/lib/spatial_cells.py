@@ -0,0 +1,63 @@
+"""
+Integer cell IDs for lat/lon points
+
+H3 cells at H3_RESOLUTION when the h3 package is available, otherwise a
+GRID_RESOLUTION_DEGREES lat/lon grid packed into one BIGINT. Either way
+aggregations and joins can group on an integer key instead of rounding
+coordinates per query.
+"""
+
+import numpy as np
+
+from config.constants import GRID_RESOLUTION_DEGREES, H3_RESOLUTION
+
+try:
+    from h3.api import basic_int as h3
+except ImportError:  # pragma: no cover - h3 is in requirements
+    h3 = None
+
+CELL_SCHEME = f"h3_r{H3_RESOLUTION}" if h3 is not None else f"grid_{GRID_RESOLUTION_DEGREES}"
+
+# Grid keys: row * GRID_ROW_STRIDE + column, both offset to stay non-negative
+GRID_ROW_STRIDE = 1_000_000
+
+
+def h3_cells(lat: np.ndarray, lon: np.ndarray, resolution: int = H3_RESOLUTION) -> np.ndarray:
+    """
+    H3 cell IDs (int64) for each point; each distinct point is indexed once.
+
+    h3-py has no vectorised latlng_to_cell, so this is one C call per
+    distinct point (about 2 us). fill_cells() passes one source file's
+    distinct coordinates, a few tens of thousands for an orbit clipped to
+    Alberta, so that is well under a second per file. The DuckDB h3
+    extension would batch it in SQL, but it is a community extension that
+    DUCKDB_EXTENSIONS does not load.
+    """
+    # lat + i*lon as a 1-D key: much cheaper to np.unique than (n, 2) rows
+    points = np.asarray(lat, dtype="float64") + 1j * np.asarray(lon, dtype="float64")
+    unique, inverse = np.unique(points, return_inverse=True)
+
+    cells = np.fromiter(
+        (h3.latlng_to_cell(p.real, p.imag, resolution) for p in unique),
+        dtype="uint64",
+        count=len(unique),
+    )
+
+    # H3 indexes keep the top bit clear, so they fit a signed BIGINT
+    return cells.astype("int64")[inverse.ravel()]
+
+
+def grid_cells(
+    lat: np.ndarray, lon: np.ndarray, resolution: float = GRID_RESOLUTION_DEGREES
+) -> np.ndarray:
+    """Degree-grid cell IDs (int64) for each point"""
+    row = np.floor((np.asarray(lat, dtype="float64") + 90.0) / resolution).astype("int64")
+    col = np.floor((np.asarray(lon, dtype="float64") + 180.0) / resolution).astype("int64")
+    return row * GRID_ROW_STRIDE + col
+
+
+def cell_ids(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Cell IDs under CELL_SCHEME"""
+    if h3 is not None:
+        return h3_cells(lat, lon)
+    return grid_cells(lat, lon)
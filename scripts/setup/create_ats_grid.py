@@ -0,0 +1,123 @@
+"""
+Create the ATS location lookup dimension (bronze.ats_lsd_grid)
+Every LSD of the Alberta ATS domain (16 LSDs x 36 sections x 126 townships
+x 34 ranges x W4/W5/W6) with its lat/lon, keyed by the normalized ATS
+string (e.g. 02-21-065-04W4). AER loads resolve locations with one join.
+"""
+
+import argparse
+import itertools
+import os
+from typing import Literal
+
+import numpy as np
+import pyarrow as pa
+from dotenv import load_dotenv
+
+from config.constants import BRONZE_DATA_DIR, TABLE_ATS_GRID
+from scripts.ingest.load_aer_facilities import ats_to_latlon_vectorized
+from scripts.lib.db import connect
+
+load_dotenv()
+
+MERIDIANS = (4, 5, 6)
+
+
+def ats_grid_batch(meridian: int) -> pa.Table:
+    """All (lsd, section, township, range) locations west of one meridian"""
+    lsd, section, township, range_num = (
+        np.array(column, dtype=np.int16)
+        for column in zip(
+            *itertools.product(range(1, 17), range(1, 37), range(1, 127), range(1, 35))
+        )
+    )
+    meridian_col = np.full(lsd.size, meridian, dtype=np.int16)
+    direction = np.full(lsd.size, "W", dtype=object)
+
+    lat, lon = ats_to_latlon_vectorized(lsd, section, township, range_num, direction, meridian_col)
+
+    return pa.table(
+        {
+            "lsd": lsd,
+            "section": section,
+            "township": township,
+            "range_num": range_num,
+            "meridian": meridian_col,
+            "latitude": lat,
+            "longitude": lon,
+        }
+    )
+
+
+def create_ats_grid_table(con) -> Literal[True]:
+    print("\n" + "=" * 60)
+    print(f"Creating {TABLE_ATS_GRID} Table")
+    print("=" * 60)
+
+    con.execute(f"DROP TABLE IF EXISTS {TABLE_ATS_GRID};")
+
+    con.execute(f"""
+        CREATE TABLE {TABLE_ATS_GRID} (
+            ats_key VARCHAR,                   -- LL-SS-TTT-RRWM
+            lsd TINYINT,
+            section TINYINT,
+            township SMALLINT,
+            range_num TINYINT,
+            meridian TINYINT,
+            latitude DOUBLE,
+            longitude DOUBLE
+        );
+    """)
+
+    for meridian in MERIDIANS:
+        batch = ats_grid_batch(meridian)
+        con.register("ats_batch", batch)
+        con.execute(f"""
+            INSERT INTO {TABLE_ATS_GRID}
+            SELECT
+                printf('%02d-%02d-%03d-%02dW%d', lsd, section, township, range_num, meridian),
+                lsd, section, township, range_num, meridian, latitude, longitude
+            FROM ats_batch
+        """)
+        con.unregister("ats_batch")
+        print(f"  W{meridian}: {batch.num_rows:,} locations")
+
+    total = con.execute(f"SELECT COUNT(*) FROM {TABLE_ATS_GRID}").fetchone()[0]
+    print(f"SUCCESS: Table '{TABLE_ATS_GRID}' created ({total:,} rows)")
+
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the ATS location lookup table")
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help=f"Also export the grid to {BRONZE_DATA_DIR / 'ats_lsd_grid.parquet'}",
+    )
+    args = parser.parse_args()
+
+    db_path = os.getenv("DUCKDB_DATABASE_PATH", "./emissions_ghg.duckdb")
+    print(f"\nConnecting to: {db_path}")
+    con = connect(db_path, extensions=())
+
+    create_ats_grid_table(con)
+
+    if args.parquet:
+        BRONZE_DATA_DIR.mkdir(parents=True, exist_ok=True)
+        path = BRONZE_DATA_DIR / "ats_lsd_grid.parquet"
+        con.execute(f"COPY {TABLE_ATS_GRID} TO '{path}' (FORMAT PARQUET, COMPRESSION ZSTD)")
+        print(f"Exported to {path}")
+
+    con.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
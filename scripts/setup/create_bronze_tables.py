@@ -6,9 +6,11 @@ Bronze = raw data, no constraints, append-only
 import os
 from typing import Literal
 
-import duckdb
 from dotenv import load_dotenv
 
+from scripts.ingest.ingestion_ledger import create_ingestion_ledger
+from scripts.lib.db import connect
+
 load_dotenv()
 
 
@@ -44,6 +46,7 @@ def create_aer_facilities_table(con) -> Literal[True]:
             latitude DOUBLE,
             longitude DOUBLE,
             location GEOMETRY,
+            cell_id BIGINT,              -- H3 / grid cell, see scripts.transform.assign_cells
 
             -- Monthly Volumes (from CSV)
             oil_prod_m3 DOUBLE,
@@ -70,6 +73,7 @@ def create_sentinel5p_table(con) -> Literal[True]:
     print("=" * 60)
 
     con.execute("DROP TABLE IF EXISTS bronze.sentinel5p_raw;")
+    con.execute("DROP SEQUENCE IF EXISTS bronze.sentinel5p_row_id_seq;")
 
     con.execute("""
         CREATE TABLE bronze.sentinel5p_raw (
@@ -81,7 +85,11 @@ def create_sentinel5p_table(con) -> Literal[True]:
             latitude DOUBLE,                   -- Pixel center latitude
             longitude DOUBLE,                  -- Pixel center longitude
             location GEOMETRY,                 -- ST_Point(lon, lat)
+            footprint GEOMETRY,                -- Pixel polygon from latitude/longitude_bounds
+            cell_id BIGINT,                    -- H3 / grid cell (assign_cells stage)
             orbit_number INTEGER,              -- Satellite orbit
+            scanline INTEGER,                  -- Along-track pixel index
+            ground_pixel INTEGER,              -- Across-track pixel index
             processing_level VARCHAR,          -- e.g., 'L2'
             product_version VARCHAR,           -- e.g., 'v02.06.00'
             file_path VARCHAR,                 -- Source NetCDF file
@@ -104,15 +112,16 @@ def main() -> None:
 
     db_path = os.getenv("DUCKDB_DATABASE_PATH", "./emissions_ghg.duckdb")
     print(f"\nConnecting to: {db_path}")
-    con = duckdb.connect(db_path)
-
     print("Loading extensions...")
-    con.execute("LOAD spatial;")
+    con = connect(db_path)
     print("DONE: Extensions loaded")
 
     create_aer_facilities_table(con)
     create_sentinel5p_table(con)
 
+    # Tables were recreated empty, so nothing has been ingested yet
+    create_ingestion_ledger(con, replace=True)
+
     # Simple verification - count tables
     print("\n" + "=" * 60)
     print("Verification")
@@ -125,7 +134,7 @@ def main() -> None:
     """).fetchone()[0]
 
     print(f"Tables in bronze schema: {count}")
-    print("Expected: 2 (aer_facilities, sentinel5p_raw)")
+    print("Expected: at least 3 (aer_facilities, sentinel5p_raw, ingestion_ledger)")
 
     con.close()
 
@@ -0,0 +1,89 @@
+"""
+Create Gold layer tables for medallion architecture
+Gold = small precomputed aggregates read by dashboards and reports
+"""
+
+import os
+from typing import Literal
+
+from dotenv import load_dotenv
+
+from config.constants import TABLE_CH4_HOTSPOTS
+from scripts.lib.db import connect
+
+load_dotenv()
+
+
+def create_ch4_hotspots_table(con, replace=False) -> Literal[True]:
+    """
+    Create gold.regional_ch4_hotspots table
+    One row per (period_type, period_start, cell_id); period_type is 'day' or 'month'
+    """
+    con.execute("CREATE SCHEMA IF NOT EXISTS gold;")
+
+    if replace:
+        con.execute(f"DROP TABLE IF EXISTS {TABLE_CH4_HOTSPOTS};")
+
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_CH4_HOTSPOTS} (
+            period_type VARCHAR,               -- 'day' or 'month'
+            period_start DATE,
+            cell_id BIGINT,                    -- H3 / grid cell
+
+            -- Mergeable running aggregates
+            pixel_count BIGINT,
+            ch4_sum DOUBLE,
+            ch4_sum_sq DOUBLE,
+            ch4_min DOUBLE,
+            ch4_max DOUBLE,
+            latitude DOUBLE,                   -- Mean pixel position
+            longitude DOUBLE,
+
+            -- Derived from the aggregates
+            ch4_mean DOUBLE,
+            ch4_std DOUBLE,
+            background_ch4 DOUBLE,             -- Regional mean over the period
+            background_std DOUBLE,
+            enhancement_ppb DOUBLE,            -- ch4_mean - background_ch4
+            is_hotspot BOOLEAN,
+
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+            PRIMARY KEY (period_type, period_start, cell_id)
+        );
+    """)
+
+    return True
+
+
+def main() -> None:
+    """
+    Main execution function
+    """
+    print("=" * 60)
+    print("Gold Layer Table Creation")
+    print("=" * 60)
+
+    db_path = os.getenv("DUCKDB_DATABASE_PATH", "./emissions_ghg.duckdb")
+    print(f"\nConnecting to: {db_path}")
+    con = connect(db_path, extensions=())
+
+    create_ch4_hotspots_table(con, replace=True)
+    print(f"SUCCESS: Table '{TABLE_CH4_HOTSPOTS}' created")
+
+    con.close()
+
+    print("\n" + "=" * 60)
+    print("SUCCESS: All Gold tables created")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
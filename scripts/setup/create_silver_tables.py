@@ -0,0 +1,328 @@
+"""
+Create Silver layer tables for medallion architecture
+Silver = cleaned, deduplicated, quality-filtered data
+"""
+
+import os
+from typing import Literal
+
+from dotenv import load_dotenv
+
+from config.constants import (
+    TABLE_AER_FACILITY_TYPES,
+    TABLE_AER_OPERATORS,
+    TABLE_CH4_CELL_DAILY,
+    TABLE_CH4_DAILY_BACKGROUND,
+    TABLE_FACILITY_DIM,
+    TABLE_FACILITY_MONTHLY,
+    TABLE_FACILITY_PIXEL_WEIGHTS,
+    TABLE_PIPELINE_WATERMARKS,
+    TABLE_SENTINEL5P_CLEANED,
+    TABLE_SENTINEL5P_ENHANCEMENT,
+    TABLE_SENTINEL5P_REMOVED_DAYS,
+)
+from scripts.lib.db import connect
+
+load_dotenv()
+
+
+def create_pipeline_watermarks_table(con, replace=False) -> None:
+    """High-water marks of the incremental silver/gold builders, one row per target table"""
+    con.execute("CREATE SCHEMA IF NOT EXISTS silver;")
+
+    if replace:
+        con.execute(f"DROP TABLE IF EXISTS {TABLE_PIPELINE_WATERMARKS};")
+
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_PIPELINE_WATERMARKS} (
+            target_table VARCHAR PRIMARY KEY,
+            watermark TIMESTAMP,              -- Last upstream timestamp processed
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+
+def create_sentinel5p_cleaned_table(con, replace=False) -> Literal[True]:
+    """
+    Create silver.sentinel5p_ch4_cleaned table
+    One row per TROPOMI pixel (orbit, scanline, ground_pixel)
+    """
+    con.execute("CREATE SCHEMA IF NOT EXISTS silver;")
+
+    if replace:
+        con.execute(f"DROP TABLE IF EXISTS {TABLE_SENTINEL5P_CLEANED};")
+        con.execute(f"DROP TABLE IF EXISTS {TABLE_SENTINEL5P_REMOVED_DAYS};")
+
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_SENTINEL5P_CLEANED} (
+            orbit_number INTEGER,
+            scanline INTEGER,
+            ground_pixel INTEGER,
+
+            measurement_timestamp TIMESTAMP,
+            measurement_date DATE,
+
+            latitude DOUBLE,
+            longitude DOUBLE,
+            location GEOMETRY,
+            cell_id BIGINT,                    -- From bronze, computed if still NULL there
+
+            ch4_column DOUBLE,                 -- ppb, within CH4_MIN_VALID..CH4_MAX_VALID
+            qa_value DOUBLE,                   -- >= SENTINEL5P_QA_THRESHOLD_SILVER
+
+            source_file VARCHAR,
+            bronze_row_id BIGINT,
+            bronze_ingestion_timestamp TIMESTAMP,
+            processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+            PRIMARY KEY (orbit_number, scanline, ground_pixel)
+        );
+    """)
+
+    # Days that lost rows when a reloaded file replaced its pixels, so
+    # downstream builders can refresh them even if no new row landed there
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_SENTINEL5P_REMOVED_DAYS} (
+            measurement_date DATE,
+            removed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    return True
+
+
+def create_facility_pixel_weights_table(con, replace=False) -> Literal[True]:
+    """
+    Create silver.facility_pixel_weights table
+    One row per (pixel, facility) whose FACILITY_BUFFER_DISTANCE_M zone
+    overlaps the pixel footprint; joins silver pixels on
+    (orbit_number, scanline, ground_pixel)
+    """
+    con.execute("CREATE SCHEMA IF NOT EXISTS silver;")
+
+    if replace:
+        con.execute(f"DROP TABLE IF EXISTS {TABLE_FACILITY_PIXEL_WEIGHTS};")
+
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_FACILITY_PIXEL_WEIGHTS} (
+            orbit_number INTEGER,
+            scanline INTEGER,
+            ground_pixel INTEGER,
+            facility_id VARCHAR,
+
+            measurement_date DATE,
+            overlap_km2 DOUBLE,                -- Footprint ∩ facility zone
+            weight DOUBLE,                     -- overlap_km2 / footprint area (0-1]
+            covers_facility BOOLEAN,           -- Facility point inside the footprint
+
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+            PRIMARY KEY (orbit_number, scanline, ground_pixel, facility_id)
+        );
+    """)
+
+    return True
+
+
+def create_facility_tables(con, replace=False) -> Literal[True]:
+    """
+    Create the AER facility star: silver.aer_facilities (one row per
+    facility_id, integer facility_key), silver.aer_facility_monthly (narrow
+    monthly volumes keyed by facility_key) and the operator / facility type
+    lookups the dimension stores as integer codes
+    """
+    con.execute("CREATE SCHEMA IF NOT EXISTS silver;")
+
+    if replace:
+        for table in (
+            TABLE_FACILITY_MONTHLY,
+            TABLE_FACILITY_DIM,
+            TABLE_AER_OPERATORS,
+            TABLE_AER_FACILITY_TYPES,
+        ):
+            con.execute(f"DROP TABLE IF EXISTS {table};")
+        for sequence in (
+            "aer_facility_key_seq",
+            "aer_operator_key_seq",
+            "aer_facility_type_key_seq",
+        ):
+            con.execute(f"DROP SEQUENCE IF EXISTS silver.{sequence};")
+
+    con.execute("CREATE SEQUENCE IF NOT EXISTS silver.aer_facility_key_seq;")
+    con.execute("CREATE SEQUENCE IF NOT EXISTS silver.aer_operator_key_seq;")
+    con.execute("CREATE SEQUENCE IF NOT EXISTS silver.aer_facility_type_key_seq;")
+
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_AER_OPERATORS} (
+            operator_key INTEGER DEFAULT nextval('silver.aer_operator_key_seq') PRIMARY KEY,
+            operator VARCHAR UNIQUE
+        );
+    """)
+
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_AER_FACILITY_TYPES} (
+            facility_type_key INTEGER
+                DEFAULT nextval('silver.aer_facility_type_key_seq') PRIMARY KEY,
+            facility_type VARCHAR UNIQUE
+        );
+    """)
+
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_FACILITY_DIM} (
+            facility_key INTEGER DEFAULT nextval('silver.aer_facility_key_seq') PRIMARY KEY,
+            facility_id VARCHAR UNIQUE,        -- ABBT code
+
+            -- Attributes as of last_reporting_month
+            licence VARCHAR,
+            operator_key INTEGER,              -- silver.aer_operators
+            facility_type_key INTEGER,         -- silver.aer_facility_types
+            facility_description VARCHAR,
+            bty_location_raw VARCHAR,
+            latitude DOUBLE,
+            longitude DOUBLE,
+            location GEOMETRY,
+            cell_id BIGINT,
+
+            first_reporting_month DATE,
+            last_reporting_month DATE,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_FACILITY_MONTHLY} (
+            reporting_month DATE,
+            facility_key INTEGER,
+
+            oil_prod_m3 DOUBLE,
+            gas_prod_1000m3 DOUBLE,
+            gas_flared_1000m3 DOUBLE,
+            gas_vented_1000m3 DOUBLE,
+            water_prod_m3 DOUBLE,
+            total_wells INTEGER,
+
+            source_file VARCHAR,
+
+            PRIMARY KEY (reporting_month, facility_key)
+        );
+    """)
+
+    return True
+
+
+def create_enhancement_tables(con, replace=False) -> Literal[True]:
+    """
+    Create the CH4 enhancement tables: silver.ch4_daily_background (one
+    row per day), silver.sentinel5p_ch4_enhancement (one row per silver
+    pixel) and silver.ch4_cell_daily (one row per day and cell, with
+    ROLLING_WINDOW_DAYS rolling means)
+    """
+    con.execute("CREATE SCHEMA IF NOT EXISTS silver;")
+
+    if replace:
+        for table in (
+            TABLE_CH4_DAILY_BACKGROUND,
+            TABLE_SENTINEL5P_ENHANCEMENT,
+            TABLE_CH4_CELL_DAILY,
+        ):
+            con.execute(f"DROP TABLE IF EXISTS {table};")
+
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_CH4_DAILY_BACKGROUND} (
+            measurement_date DATE PRIMARY KEY,
+            pixel_count BIGINT,
+            background_ch4 DOUBLE,             -- BACKGROUND_QUANTILE of the day's pixels
+            ch4_mean DOUBLE,
+            ch4_std DOUBLE,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_SENTINEL5P_ENHANCEMENT} (
+            orbit_number INTEGER,
+            scanline INTEGER,
+            ground_pixel INTEGER,
+
+            measurement_date DATE,
+            cell_id BIGINT,
+            ch4_column DOUBLE,
+            background_ch4 DOUBLE,
+            enhancement_ppb DOUBLE,            -- ch4_column - background_ch4
+
+            PRIMARY KEY (orbit_number, scanline, ground_pixel)
+        );
+    """)
+
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_CH4_CELL_DAILY} (
+            measurement_date DATE,
+            cell_id BIGINT,
+
+            pixel_count BIGINT,
+            ch4_sum DOUBLE,
+            enhancement_sum DOUBLE,
+
+            -- Over the ROLLING_WINDOW_DAYS days ending on measurement_date
+            rolling_pixel_count BIGINT,
+            rolling_ch4_mean DOUBLE,
+            rolling_enhancement_ppb DOUBLE,
+
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+            PRIMARY KEY (measurement_date, cell_id)
+        );
+    """)
+
+    return True
+
+
+def main() -> None:
+    """
+    Main execution function
+    """
+    print("=" * 60)
+    print("Silver Layer Table Creation")
+    print("=" * 60)
+
+    db_path = os.getenv("DUCKDB_DATABASE_PATH", "./emissions_ghg.duckdb")
+    print(f"\nConnecting to: {db_path}")
+    print("Loading extensions...")
+    con = connect(db_path)
+    print("DONE: Extensions loaded")
+
+    create_sentinel5p_cleaned_table(con, replace=True)
+    print(f"SUCCESS: Table '{TABLE_SENTINEL5P_CLEANED}' created")
+
+    create_facility_pixel_weights_table(con, replace=True)
+    print(f"SUCCESS: Table '{TABLE_FACILITY_PIXEL_WEIGHTS}' created")
+
+    create_facility_tables(con, replace=True)
+    print(f"SUCCESS: Tables '{TABLE_FACILITY_DIM}', '{TABLE_FACILITY_MONTHLY}' created")
+
+    create_enhancement_tables(con, replace=True)
+    print(
+        f"SUCCESS: Tables '{TABLE_CH4_DAILY_BACKGROUND}', '{TABLE_SENTINEL5P_ENHANCEMENT}', "
+        f"'{TABLE_CH4_CELL_DAILY}' created"
+    )
+
+    # Tables were recreated empty, so every builder starts from scratch
+    create_pipeline_watermarks_table(con, replace=True)
+    print(f"SUCCESS: Table '{TABLE_PIPELINE_WATERMARKS}' created")
+
+    con.close()
+
+    print("\n" + "=" * 60)
+    print("SUCCESS: All Silver tables created")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
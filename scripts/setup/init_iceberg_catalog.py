@@ -6,9 +6,10 @@ Creates schemas for medallion architecture (bronze/silver/gold)
 import os
 from typing import Literal
 
-import duckdb
 from dotenv import load_dotenv
 
+from scripts.lib.db import connect
+
 # Load environment variables
 load_dotenv()
 
@@ -24,7 +25,7 @@ def init_duckdb_iceberg() -> Literal[True]:
     # Connect to DuckDB (creates file if doesn't exist)
     db_path = os.getenv("DUCKDB_DATABASE_PATH", "./emissions_ghg.duckdb")
     print(f"\n Connecting to DuckDB: {db_path}")
-    con = duckdb.connect(db_path)
+    con = connect(db_path, extensions=())
     print("DONE: Connected")
 
     # Install and load extensions
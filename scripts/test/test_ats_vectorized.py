@@ -0,0 +1,127 @@
+"""
+Property test: vectorized ATS conversion is bit-for-bit equal to the
+scalar ats_to_latlon() over the full valid LSD/section/township/range/
+meridian domain (both directions), plus invalid edges and string parsing.
+"""
+
+import itertools
+import random
+
+import numpy as np
+import pandas as pd
+
+from scripts.ingest.load_aer_facilities import (
+    ats_to_latlon,
+    ats_to_latlon_vectorized,
+    parse_bty_series_to_latlon,
+    parse_bty_to_latlon,
+)
+
+
+def scalar_arrays(rows):
+    lat = np.empty(len(rows))
+    lon = np.empty(len(rows))
+
+    for i, row in enumerate(rows):
+        a, b = ats_to_latlon(*row)
+        lat[i] = np.nan if a is None else a
+        lon[i] = np.nan if b is None else b
+
+    return lat, lon
+
+
+def bits_equal(a, b) -> bool:
+    """Same NaN positions and identical float64 bit patterns elsewhere"""
+    nan_a, nan_b = np.isnan(a), np.isnan(b)
+    return bool(
+        np.array_equal(nan_a, nan_b)
+        and np.array_equal(a[~nan_a].view(np.int64), b[~nan_b].view(np.int64))
+    )
+
+
+def test_full_valid_domain():
+    lsds, sections = range(1, 17), range(1, 37)
+    townships, ranges = range(1, 127), range(1, 35)
+
+    for meridian, direction in itertools.product((4, 5, 6), ("W", "E")):
+        rows = [
+            (lsd, sec, twp, rge, direction, meridian)
+            for lsd, sec, twp, rge in itertools.product(lsds, sections, townships, ranges)
+        ]
+        expected_lat, expected_lon = scalar_arrays(rows)
+
+        columns = list(zip(*rows))
+        lat, lon = ats_to_latlon_vectorized(*columns)
+
+        assert bits_equal(lat, expected_lat) and bits_equal(lon, expected_lon), (
+            f"mismatch for meridian {meridian}{direction}"
+        )
+
+        print(f"  W{meridian}/{direction}: {len(rows):,} locations identical")
+
+
+def test_invalid_edges():
+    rows = [
+        (lsd, sec, twp, rge, direction, mer)
+        for lsd in (0, 1, 16, 17)
+        for sec in (0, 1, 36, 37)
+        for twp in (0, 1, 126, 127)
+        for rge in (0, 1, 34, 35)
+        for direction in ("W", "E", "N")
+        for mer in (3, 4, 6, 7)
+    ]
+    expected_lat, expected_lon = scalar_arrays(rows)
+    lat, lon = ats_to_latlon_vectorized(*zip(*rows))
+    assert bits_equal(lat, expected_lat), "latitude mismatch on invalid edges"
+    assert bits_equal(lon, expected_lon), "longitude mismatch on invalid edges"
+
+
+def test_string_parsing(samples: int = 200_000):
+    rng = random.Random(42)
+    values = [None, np.nan, "", "  ", "nan", "garbage", "02-21-065-04W4\n", "2-1-65-4w4"]
+
+    for _ in range(samples):
+        lsd, sec = rng.randint(0, 17), rng.randint(0, 37)
+        twp, rge, mer = rng.randint(0, 130), rng.randint(0, 36), rng.randint(3, 7)
+        kind = rng.random()
+
+        if kind < 0.5:
+            values.append(f"{lsd:02d}-{sec:02d}-{twp:03d}-{rge:02d}{rng.choice('WEX')}{mer}")
+        elif kind < 0.6:
+            values.append(f" {lsd}-{sec}-{twp}-{rge}{rng.choice('we')}{mer} ")
+        else:
+            values.append(f"{mer:02d}{twp % 100:02d}{rge:02d}{sec:02d}{lsd:02d}")
+
+    series = pd.Series(values, dtype=object)
+
+    expected = [parse_bty_to_latlon(v) for v in values]
+    expected_lat = np.array([np.nan if a is None else a for a, _ in expected])
+    expected_lon = np.array([np.nan if b is None else b for _, b in expected])
+
+    coords = parse_bty_series_to_latlon(series)
+    assert bits_equal(coords["latitude"].to_numpy(), expected_lat), "latitude mismatch"
+    assert bits_equal(coords["longitude"].to_numpy(), expected_lon), "longitude mismatch"
+
+
+def main() -> bool:
+    print("=" * 60)
+    print("Vectorized ATS Conversion Property Tests")
+    print("=" * 60)
+
+    passed = True
+    for i, test in enumerate([test_full_valid_domain, test_invalid_edges, test_string_parsing], 1):
+        print(f"\n[Test {i}] {test.__name__}")
+        try:
+            test()
+            print("  PASSED")
+        except AssertionError as e:
+            print(f"  FAILED: {e}")
+            passed = False
+
+    return passed
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,210 @@
+"""
+Download manager tests against a local HTTP stand-in for the CDSE zipper
+Serves fake products with Range support; no Copernicus account needed.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scripts.ingest.download_sentinel5p import (
+    PART_SUFFIX,
+    CopernicusDownloader,
+    DownloadVerificationError,
+    expected_checksum,
+)
+
+PRODUCTS = {f"prod-{i}": os.urandom(3 * 1024 * 1024 + i * 1000) for i in range(4)}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    range_requests = []
+
+    def do_GET(self):
+        match = re.search(r"Products\((.+)\)/\$value", self.path)
+        body = PRODUCTS.get(match.group(1)) if match else None
+
+        if body is None:
+            self.send_error(404)
+            return
+
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(re.match(r"bytes=(\d+)-", range_header).group(1))
+            StandInHandler.range_requests.append((match.group(1), start))
+
+            if start >= len(body):
+                self.send_response(416)
+                self.end_headers()
+                return
+
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        else:
+            self.send_response(200)
+
+        self.send_header("Content-Length", str(len(body) - start))
+        self.end_headers()
+        self.wfile.write(body[start:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def catalogue_entry(product_id):
+    body = PRODUCTS[product_id]
+    return {
+        "Id": product_id,
+        "Name": f"{product_id}.nc",
+        "ContentLength": len(body),
+        "Checksum": [{"Algorithm": "MD5", "Value": hashlib.md5(body).hexdigest()}],
+    }
+
+
+def make_downloader(server):
+    downloader = CopernicusDownloader()
+    downloader.download_url = f"http://127.0.0.1:{server.server_port}/odata/v1/Products"
+    downloader.token = "test-token"
+    downloader.token_expiry = datetime.now() + timedelta(hours=1)
+    return downloader
+
+
+def check_concurrent_download(server, out_dir):
+    downloader = make_downloader(server)
+    products = [catalogue_entry(pid) for pid in PRODUCTS]
+
+    paths, failed = downloader.download_products(products, output_dir=out_dir, max_workers=4)
+
+    assert not failed, failed
+    assert len(paths) == len(PRODUCTS)
+    for pid, body in PRODUCTS.items():
+        with open(os.path.join(out_dir, f"{pid}.nc"), "rb") as f:
+            assert f.read() == body
+    assert not [p for p in os.listdir(out_dir) if p.endswith(PART_SUFFIX)]
+
+
+def check_resume_partial(server, out_dir):
+    downloader = make_downloader(server)
+    body = PRODUCTS["prod-1"]
+    part = os.path.join(out_dir, "prod-1.nc" + PART_SUFFIX)
+
+    with open(part, "wb") as f:
+        f.write(body[:1_000_000])
+
+    StandInHandler.range_requests.clear()
+    entry = catalogue_entry("prod-1")
+    path = downloader.download_product(
+        "prod-1", entry["Name"], out_dir, entry["ContentLength"], expected_checksum(entry)
+    )
+
+    assert StandInHandler.range_requests == [("prod-1", 1_000_000)]
+    with open(path, "rb") as f:
+        assert f.read() == body
+    assert not os.path.exists(part)
+
+
+def check_truncated_final_file_refetched(server, out_dir):
+    downloader = make_downloader(server)
+    body = PRODUCTS["prod-2"]
+    path = os.path.join(out_dir, "prod-2.nc")
+
+    with open(path, "wb") as f:
+        f.write(body[:500])
+
+    downloader.download_product("prod-2", "prod-2.nc", out_dir, expected_size=len(body))
+
+    with open(path, "rb") as f:
+        assert f.read() == body
+
+
+def check_checksum_mismatch_rejected(server, out_dir):
+    downloader = make_downloader(server)
+    entry = catalogue_entry("prod-3")
+
+    try:
+        downloader.download_product(
+            "prod-3", entry["Name"], out_dir, entry["ContentLength"], ("md5", "0" * 32)
+        )
+    except DownloadVerificationError:
+        pass
+    else:
+        raise AssertionError("checksum mismatch was accepted")
+
+    assert not os.path.exists(os.path.join(out_dir, entry["Name"]))
+    assert not os.path.exists(os.path.join(out_dir, entry["Name"] + PART_SUFFIX))
+
+
+CHECKS = [
+    check_concurrent_download,
+    check_resume_partial,
+    check_truncated_final_file_refetched,
+    check_checksum_mismatch_rejected,
+]
+
+
+@contextmanager
+def stand_in_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def run_check(check, server=None):
+    """Run one check in a fresh output directory, starting a server if none is given"""
+    if server is None:
+        with stand_in_server() as server:
+            return run_check(check, server)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        check(server, out_dir)
+
+
+# pytest entry points; main() runs the same checks against one shared server
+def test_concurrent_download():
+    run_check(check_concurrent_download)
+
+
+def test_resume_partial():
+    run_check(check_resume_partial)
+
+
+def test_truncated_final_file_refetched():
+    run_check(check_truncated_final_file_refetched)
+
+
+def test_checksum_mismatch_rejected():
+    run_check(check_checksum_mismatch_rejected)
+
+
+def main():
+    print("=" * 60)
+    print("Download Manager Tests (local HTTP stand-in)")
+    print("=" * 60)
+
+    passed = True
+    with stand_in_server() as server:
+        for i, check in enumerate(CHECKS, 1):
+            try:
+                run_check(check, server)
+                print(f"\n[Test {i}] {check.__name__}: PASSED")
+            except AssertionError as e:
+                print(f"\n[Test {i}] {check.__name__}: FAILED {e}")
+                passed = False
+
+    return passed
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(0 if main() else 1)
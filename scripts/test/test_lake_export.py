@@ -0,0 +1,99 @@
+"""
+Lake export against a local LAKE_ROOT: a partial lake (only AER exported,
+no Sentinel-5P files yet) gets a view for the exported table and skips
+the other instead of failing on an empty glob.
+"""
+
+import os
+import tempfile
+
+import duckdb
+
+from config.constants import TABLE_AER_FACILITIES, TABLE_SENTINEL5P_RAW
+from scripts.ingest.export_bronze_to_lake import export_table
+from scripts.ingest.ingestion_ledger import create_ingestion_ledger, record_loads
+from scripts.lib.lake import create_lake_views, lake_has_files
+from scripts.setup.create_silver_tables import create_pipeline_watermarks_table
+
+
+def make_aer_only_db():
+    con = duckdb.connect()
+    con.execute("CREATE SCHEMA bronze")
+    create_ingestion_ledger(con)
+    create_pipeline_watermarks_table(con)
+
+    con.execute(f"""
+        CREATE TABLE {TABLE_AER_FACILITIES} AS
+        SELECT
+            DATE '2025-01-01' + INTERVAL (i % 3) MONTH AS reporting_month,
+            'ABBT' || i AS facility_id,
+            i * 1.5 AS oil_prod_m3,
+            'aer_2025.csv' AS source_file
+        FROM range(30) AS t(i)
+    """)
+    record_loads(con, TABLE_AER_FACILITIES, [("aer_2025.csv", "abc", 30)])
+
+    return con
+
+
+def test_partial_lake():
+    previous = os.environ.get("LAKE_ROOT")
+
+    with tempfile.TemporaryDirectory() as lake_root:
+        os.environ["LAKE_ROOT"] = lake_root
+        try:
+            check_partial_lake()
+        finally:
+            if previous is None:
+                del os.environ["LAKE_ROOT"]
+            else:
+                os.environ["LAKE_ROOT"] = previous
+
+
+def check_partial_lake():
+    con = make_aer_only_db()
+
+    written = export_table(con, TABLE_AER_FACILITIES)
+    assert written == 3, f"expected 3 reporting_month partitions, got {written}"
+    assert export_table(con, TABLE_SENTINEL5P_RAW) == 0
+
+    assert lake_has_files(con, TABLE_AER_FACILITIES)
+    assert not lake_has_files(con, TABLE_SENTINEL5P_RAW)
+
+    views = create_lake_views(con)
+    assert views == [f"{TABLE_AER_FACILITIES}_lake"], views
+
+    rows = con.execute(f"SELECT COUNT(*) FROM {TABLE_AER_FACILITIES}_lake").fetchone()[0]
+    assert rows == 30, f"lake view returned {rows} rows"
+
+    missing = con.execute(
+        "SELECT COUNT(*) FROM duckdb_views() WHERE view_name = 'sentinel5p_raw_lake'"
+    ).fetchone()[0]
+    assert missing == 0, "view created for a table with no files"
+
+    con.close()
+
+
+def main() -> bool:
+    print("=" * 60)
+    print("Lake Export Tests")
+    print("=" * 60)
+
+    passed = True
+
+    for i, test in enumerate([test_partial_lake], 1):
+        print(f"\n[Test {i}] {test.__name__}")
+        try:
+            test()
+            print("  PASSED")
+        except AssertionError as e:
+            print(f"  FAILED: {e}")
+            passed = False
+
+    return passed
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,187 @@
+"""
+Pixel scan tests on a synthetic in-memory warehouse: each scan_pixels()
+filter (date range, orbits, bbox, QA, source) against the same selection
+done in Python, record batch sizing, and count_pixels().
+"""
+
+from datetime import datetime, timedelta
+
+import duckdb
+import pandas as pd
+
+from scripts.lib.pixels import DEFAULT_COLUMNS, count_pixels, pixel_query, scan_pixels
+
+START = datetime(2025, 7, 1)
+DAYS, ORBITS_PER_DAY, PIXELS_PER_ORBIT = 6, 3, 500
+
+CALGARY = {"min_lat": 50.5, "max_lat": 51.5, "min_lon": -114.8, "max_lon": -113.3}
+
+
+def make_pixels() -> pd.DataFrame:
+    rows = []
+
+    for day in range(DAYS):
+        for k in range(ORBITS_PER_DAY):
+            orbit = 40000 + day * ORBITS_PER_DAY + k
+
+            for i in range(PIXELS_PER_ORBIT):
+                rows.append(
+                    {
+                        "orbit_number": orbit,
+                        "scanline": i // 50,
+                        "ground_pixel": i % 50,
+                        "measurement_timestamp": START
+                        + timedelta(days=day, hours=k * 2, seconds=i),
+                        "latitude": 49.0 + (i * 7 % 1100) / 100,
+                        "longitude": -120.0 + (i * 13 % 1000) / 100,
+                        "ch4_column": 1800.0 + i % 200,
+                        "qa_value": (i % 10) / 10,
+                    }
+                )
+
+    return pd.DataFrame(rows)
+
+
+def make_db(pixels) -> duckdb.DuckDBPyConnection:
+    con = duckdb.connect()
+    con.execute("CREATE SCHEMA bronze; CREATE SCHEMA silver")
+    con.register("pixels_df", pixels)
+    con.execute("CREATE TABLE bronze.sentinel5p_raw AS SELECT * FROM pixels_df")
+    con.execute("""
+        CREATE TABLE silver.sentinel5p_ch4_cleaned AS
+        SELECT * FROM pixels_df WHERE qa_value >= 0.5
+    """)
+    con.unregister("pixels_df")
+    return con
+
+
+def scanned(con, **filters) -> pd.DataFrame:
+    """All batches of a scan, concatenated, sorted by pixel key"""
+    table = scan_pixels(con, **filters).read_all()
+    return table.to_pandas().sort_values(["orbit_number", "scanline", "ground_pixel"])
+
+
+def assert_selects(con, pixels, expected_mask, **filters):
+    got = scanned(con, source="bronze", **filters)
+    expected = pixels[expected_mask]
+
+    assert len(got) == len(expected), f"{filters}: {len(got)} rows, expected {len(expected)}"
+    assert count_pixels(con, source="bronze", **filters) == len(expected), (
+        f"{filters}: count_pixels disagrees with the scan"
+    )
+    assert set(zip(got["orbit_number"], got["scanline"], got["ground_pixel"])) == set(
+        zip(expected["orbit_number"], expected["scanline"], expected["ground_pixel"])
+    ), f"{filters}: different pixels selected"
+
+
+def test_filters():
+    pixels = make_pixels()
+    con = make_db(pixels)
+    ts = pixels["measurement_timestamp"]
+
+    assert_selects(con, pixels, ts >= START, start=None)
+
+    # start inclusive, end exclusive, as date strings, dates and datetimes
+    assert_selects(
+        con,
+        pixels,
+        (ts >= "2025-07-02") & (ts < "2025-07-04"),
+        start="2025-07-02",
+        end="2025-07-04",
+    )
+    assert_selects(
+        con, pixels, ts >= START + timedelta(days=5), start=(START + timedelta(days=5)).date()
+    )
+    noon = START + timedelta(days=1, hours=2)
+    assert_selects(con, pixels, ts < noon, end=noon)
+
+    orbits = [40001, 40007, 40011]
+    assert_selects(con, pixels, pixels["orbit_number"].isin(orbits), orbits=orbits)
+    assert_selects(con, pixels, pixels["orbit_number"] < 0, orbits=[])
+
+    in_box = pixels["latitude"].between(CALGARY["min_lat"], CALGARY["max_lat"]) & pixels[
+        "longitude"
+    ].between(CALGARY["min_lon"], CALGARY["max_lon"])
+    assert_selects(con, pixels, in_box, bbox=CALGARY)
+
+    assert_selects(con, pixels, pixels["qa_value"] >= 0.7, min_qa=0.7)
+
+    assert_selects(
+        con,
+        pixels,
+        in_box
+        & (pixels["qa_value"] >= 0.5)
+        & (ts >= "2025-07-03")
+        & pixels["orbit_number"].isin(orbits),
+        start="2025-07-03",
+        orbits=orbits,
+        bbox=CALGARY,
+        min_qa=0.5,
+    )
+
+    con.close()
+
+
+def test_sources_and_columns():
+    pixels = make_pixels()
+    con = make_db(pixels)
+
+    silver = scanned(con, source="silver")
+    assert len(silver) == (pixels["qa_value"] >= 0.5).sum(), "silver scan row count"
+    assert list(silver.columns) == list(DEFAULT_COLUMNS), list(silver.columns)
+
+    narrow = scan_pixels(con, columns=("orbit_number", "ch4_column")).read_all()
+    assert narrow.column_names == ["orbit_number", "ch4_column"], narrow.column_names
+
+    try:
+        pixel_query(source="gold")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown source was accepted")
+
+    con.close()
+
+
+def test_batch_sizing():
+    pixels = make_pixels()
+    con = make_db(pixels)
+
+    # Batches are capped at batch_rows; DuckDB may emit a short batch at
+    # any chunk boundary, so only the cap and the total are fixed
+    for batch_rows in (2048, 4096):
+        sizes = [len(batch) for batch in scan_pixels(con, source="bronze", batch_rows=batch_rows)]
+        assert sum(sizes) == len(pixels), f"batch_rows={batch_rows}: {sum(sizes)} rows"
+        assert max(sizes) <= batch_rows, f"batch_rows={batch_rows}: batch of {max(sizes)}"
+        assert len(sizes) >= -(-len(pixels) // batch_rows), f"batch_rows={batch_rows}: {sizes}"
+
+    empty = list(scan_pixels(con, source="bronze", orbits=[]))
+    assert sum(len(batch) for batch in empty) == 0, "empty orbit list returned rows"
+    assert count_pixels(con, source="bronze", orbits=[]) == 0
+
+    con.close()
+
+
+def main() -> bool:
+    print("=" * 60)
+    print("Pixel Scan Tests")
+    print("=" * 60)
+
+    passed = True
+
+    for i, test in enumerate([test_filters, test_sources_and_columns, test_batch_sizing], 1):
+        print(f"\n[Test {i}] {test.__name__}")
+        try:
+            test()
+            print("  PASSED")
+        except AssertionError as e:
+            print(f"  FAILED: {e}")
+            passed = False
+
+    return passed
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(0 if main() else 1)
@@ -1,6 +1,21 @@
-import os
+"""
+Sentinel-5P bronze validation suite
+
+All column-level statistics come from a single aggregate pass over
+bronze.sentinel5p_raw (only the spatial overlap check needs its own join).
+Each check is graded pass / warn / fail and the run is written as a JSON
+report. --latest (the most recent load) or --since restrict the scan to
+newly ingested rows, so validation cost follows the load size.
+
+Usage:
+    python -m scripts.test.test_sentinel5p_data [--latest | --since TIMESTAMP] [--report PATH]
+"""
+
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
 
-import duckdb
 from dotenv import load_dotenv
 
 from config.constants import (
@@ -10,130 +25,291 @@ from config.constants import (
     EXPECTED_AVG_QA_MIN,
     FACILITY_BUFFER_DISTANCE_M,
     MIN_ROWS_FOR_ANALYSIS,
+    REPORTS_DIR,
     TABLE_AER_FACILITIES,
     TABLE_SENTINEL5P_RAW,
 )
+from scripts.lib.db import connect
+from scripts.lib.proximity import register_haversine, space_time_join_sql
 
 load_dotenv()
 
+DEFAULT_REPORT = REPORTS_DIR / "sentinel5p_validation.json"
 
-def run_validation_tests():
-    db_path = os.getenv('DUCKDB_DATABASE_PATH', './emissions_ghg.duckdb')
-    con = duckdb.connect(db_path)
-    con.execute("LOAD spatial;")
+STATUS_ORDER = {"pass": 0, "warn": 1, "fail": 2}
 
-    print("="*60)
-    print("Sentinel-5P Data Validation Tests")
-    print("="*60)
-
-    # Test 1: Row count
-    total_rows = con.execute(f"SELECT COUNT(*) FROM {TABLE_SENTINEL5P_RAW}").fetchone()[0]
-    print(f"\n[Test 1] Total rows: {total_rows:,}")
-    if total_rows == 0:
-        print("  FAILED: No data!")
-        return False
-    elif total_rows < MIN_ROWS_FOR_ANALYSIS:
-        print("  WARNING: Low row count")
-    else:
-        print("  PASSED")
-
-    # Test 2: Temporal coverage
-    df = con.execute(f"""
-        SELECT MIN(measurement_timestamp) AS first_date,
-               MAX(measurement_timestamp) AS last_date,
-               COUNT(DISTINCT DATE(measurement_timestamp)) AS unique_dates,
-               COUNT(DISTINCT orbit_number) AS unique_orbits
-        FROM {TABLE_SENTINEL5P_RAW}
-    """).fetchdf()
-    unique_dates = df['unique_dates'].iloc[0]
-    unique_orbits = df['unique_orbits'].iloc[0]
-    print(f"\n[Test 2] Date coverage: {unique_dates} day(s), Orbit coverage: {unique_orbits}")
-    print("  PASSED" if unique_orbits >= 3 else f"  WARNING: Only {unique_orbits} orbit(s)")
-
-    # Test 3: Spatial extent
-    df = con.execute(f"""
-        SELECT ROUND(MIN(latitude),2) AS min_lat,
-               ROUND(MAX(latitude),2) AS max_lat,
-               ROUND(MIN(longitude),2) AS min_lon,
-               ROUND(MAX(longitude),2) AS max_lon
-        FROM {TABLE_SENTINEL5P_RAW}
-    """).fetchdf()
-    min_lat, max_lat = df['min_lat'].iloc[0], df['max_lat'].iloc[0]
-    min_lon, max_lon = df['min_lon'].iloc[0], df['max_lon'].iloc[0]
-    bbox_check = ALBERTA_BBOX['min_lat'] <= min_lat <= max_lat <= ALBERTA_BBOX['max_lat'] and \
-                 ALBERTA_BBOX['min_lon'] <= min_lon <= max_lon <= ALBERTA_BBOX['max_lon']
-    print(f"\n[Test 3] Spatial extent within Alberta bbox: {'PASSED' if bbox_check else 'WARNING'}")
-
-    # Test 4: QA distribution
-    df = con.execute(f"""
-        SELECT ROUND(AVG(qa_value),3) AS avg_qa,
-               SUM(CASE WHEN qa_value >= {EXPECTED_AVG_QA_MIN} THEN 1 ELSE 0 END) AS high_quality,
-               COUNT(*) AS total
+
+def collect_statistics(con, scope_sql="TRUE") -> dict:
+    """Every column-level statistic the checks need, in one scan"""
+    cursor = con.execute(f"""
+        SELECT
+            COUNT(*) AS total_rows,
+            MIN(measurement_timestamp) AS first_timestamp,
+            MAX(measurement_timestamp) AS last_timestamp,
+            COUNT(DISTINCT measurement_timestamp::DATE) AS unique_dates,
+            COUNT(DISTINCT orbit_number) AS unique_orbits,
+            MIN(latitude) AS min_lat,
+            MAX(latitude) AS max_lat,
+            MIN(longitude) AS min_lon,
+            MAX(longitude) AS max_lon,
+            AVG(qa_value) AS avg_qa,
+            COUNT(*) FILTER (WHERE qa_value >= {EXPECTED_AVG_QA_MIN}) AS high_quality,
+            AVG(ch4_column) AS avg_ch4,
+            COUNT(*) FILTER (WHERE location IS NULL) AS null_geometry,
+            COUNT(*) - COUNT(DISTINCT row_id) AS duplicate_row_ids,
+            -- Estimate only: flags reprocessed orbits loaded twice, silver dedupes them exactly
+            greatest(COUNT(*) - approx_count_distinct(
+                (orbit_number, scanline, ground_pixel)
+            ), 0) AS approx_duplicate_pixels
         FROM {TABLE_SENTINEL5P_RAW}
-    """).fetchdf()
-    avg_qa = df['avg_qa'].iloc[0]
-    high_quality_pct = df['high_quality'].iloc[0] / df['total'].iloc[0] * 100
-    print(f"\n[Test 4] Avg QA: {avg_qa:.3f}, High quality: {high_quality_pct:.1f}%")
-    print("  PASSED" if avg_qa >= EXPECTED_AVG_QA_MIN else "  WARNING: Moderate/low QA")
-
-    # Test 5: CH4 distribution
-    avg_ch4 = con.execute(f"SELECT AVG(ch4_column) FROM {TABLE_SENTINEL5P_RAW}").fetchone()[0]
-    ch4_check = EXPECTED_AVG_CH4_MIN <= avg_ch4 <= EXPECTED_AVG_CH4_MAX
-    print(f"\n[Test 5] Avg CH4: {avg_ch4:.2f} ppb - {'PASSED' if ch4_check else 'WARNING'}")
-
-    # Test 6: NULL check
-    null_geometry = con.execute("SELECT SUM(CASE WHEN location IS NULL"\
-                                f"THEN 1 ELSE 0 END) FROM {TABLE_SENTINEL5P_RAW}").fetchone()[0]
-
-    print(f"\n[Test 6] Null geometries: {null_geometry} - "\
-          f"{'PASSED' if null_geometry==0 else 'FAILED'}")
-
-    # Test 7: Spatial overlap with AER facilities
-    df = con.execute(f"""
+        WHERE {scope_sql}
+    """)
+    columns = [d[0] for d in cursor.description]
+    return dict(zip(columns, cursor.fetchone()))
+
+
+def spatial_overlap(con, scope_sql="TRUE") -> dict:
+    """
+    Share of (month, 0.1 degree cell) pixel buckets within
+    FACILITY_BUFFER_DISTANCE_M of a facility reporting that month
+    """
+    register_haversine(con)
+    pairs = space_time_join_sql(
+        left="sentinel_pixels",
+        right="facilities",
+        left_key="pixel_id",
+        right_key="facility_location_id",
+        left_time="observation_month",
+        right_time="reporting_month",
+        distance_m=FACILITY_BUFFER_DISTANCE_M,
+    )
+    cursor = con.execute(f"""
         WITH sentinel_pixels AS (
-            SELECT DISTINCT ST_Point(ROUND(longitude,1), ROUND(latitude,1)) AS pixel_center
-            FROM {TABLE_SENTINEL5P_RAW}
+            SELECT ROW_NUMBER() OVER () AS pixel_id, observation_month, latitude, longitude
+            FROM (
+                SELECT DISTINCT
+                    date_trunc('month', measurement_timestamp)::DATE AS observation_month,
+                    ROUND(latitude,1) AS latitude,
+                    ROUND(longitude,1) AS longitude
+                FROM {TABLE_SENTINEL5P_RAW}
+                WHERE {scope_sql}
+            )
         ), facilities AS (
-            SELECT location FROM {TABLE_AER_FACILITIES}
+            SELECT ROW_NUMBER() OVER () AS facility_location_id,
+                   reporting_month, latitude, longitude
+            FROM (
+                SELECT DISTINCT reporting_month, latitude, longitude
+                FROM {TABLE_AER_FACILITIES}
+                WHERE reporting_month IN (SELECT observation_month FROM sentinel_pixels)
+            )
         )
-        SELECT COUNT(*) AS total_pixels,
-               (SELECT COUNT(*) FROM facilities) AS total_facilities,
-               COUNT(*) AS pixels_near_facilities
-        FROM sentinel_pixels sp
-        WHERE EXISTS (
-            SELECT 1 FROM facilities f
-            WHERE ST_Distance_Sphere(sp.pixel_center, f.location) <= {FACILITY_BUFFER_DISTANCE_M}
+        SELECT (SELECT COUNT(*) FROM sentinel_pixels) AS total_pixels,
+               (SELECT COUNT(DISTINCT facility_id) FROM {TABLE_AER_FACILITIES}) AS total_facilities,
+               COUNT(DISTINCT pixel_id) AS pixels_near_facilities
+        FROM {pairs}
+    """)
+    columns = [d[0] for d in cursor.description]
+    return dict(zip(columns, cursor.fetchone()))
+
+
+def check(name, status, value, message) -> dict:
+    return {"name": name, "status": status, "value": value, "message": message}
+
+
+def evaluate_checks(stats, overlap, partial) -> list[dict]:
+    """Grade the statistics; partial scopes do not require multi-orbit coverage"""
+    total = stats["total_rows"]
+    checks = []
+
+    if total == 0:
+        checks.append(check("row_count", "fail", 0, "No data"))
+        return checks
+
+    checks.append(
+        check(
+            "row_count",
+            "warn" if total < MIN_ROWS_FOR_ANALYSIS else "pass",
+            total,
+            f"{total:,} rows (expected at least {MIN_ROWS_FOR_ANALYSIS:,})",
+        )
+    )
+
+    orbits = stats["unique_orbits"]
+    min_orbits = 1 if partial else 3
+    checks.append(
+        check(
+            "temporal_coverage",
+            "pass" if orbits >= min_orbits else "warn",
+            orbits,
+            f"{stats['unique_dates']} day(s), {orbits} orbit(s)",
+        )
+    )
+
+    bbox = ALBERTA_BBOX
+    min_lat, max_lat = round(stats["min_lat"], 2), round(stats["max_lat"], 2)
+    min_lon, max_lon = round(stats["min_lon"], 2), round(stats["max_lon"], 2)
+    in_bbox = (
+        bbox["min_lat"] <= min_lat <= max_lat <= bbox["max_lat"]
+        and bbox["min_lon"] <= min_lon <= max_lon <= bbox["max_lon"]
+    )
+    checks.append(
+        check(
+            "spatial_extent",
+            "pass" if in_bbox else "warn",
+            [min_lat, max_lat, min_lon, max_lon],
+            "Within Alberta bbox" if in_bbox else "Pixels outside Alberta bbox",
+        )
+    )
+
+    avg_qa = stats["avg_qa"]
+    high_quality_pct = stats["high_quality"] / total * 100
+    checks.append(
+        check(
+            "qa_distribution",
+            "pass" if avg_qa >= EXPECTED_AVG_QA_MIN else "warn",
+            avg_qa,
+            f"Avg QA {avg_qa:.3f}, high quality {high_quality_pct:.1f}%",
+        )
+    )
+
+    avg_ch4 = stats["avg_ch4"]
+    ch4_ok = EXPECTED_AVG_CH4_MIN <= avg_ch4 <= EXPECTED_AVG_CH4_MAX
+    checks.append(
+        check(
+            "ch4_mean",
+            "pass" if ch4_ok else "warn",
+            avg_ch4,
+            f"Avg CH4 {avg_ch4:.2f} ppb (expected {EXPECTED_AVG_CH4_MIN}-{EXPECTED_AVG_CH4_MAX})",
+        )
+    )
+
+    null_geometry = stats["null_geometry"]
+    checks.append(
+        check(
+            "null_geometry",
+            "pass" if null_geometry == 0 else "fail",
+            null_geometry,
+            f"{null_geometry:,} null geometries",
         )
-    """).fetchdf()
-    pixels_near = df['pixels_near_facilities'].iloc[0]
-    total_pixels = df['total_pixels'].iloc[0]
+    )
+
+    pixels_near = overlap["pixels_near_facilities"]
+    total_pixels = overlap["total_pixels"]
     overlap_pct = pixels_near / total_pixels * 100 if total_pixels else 0
-    print(f"\n[Test 7] Spatial overlap: {overlap_pct:.1f}% - "\
-          f"{'PASSED' if pixels_near>0 else 'WARNING'}")
+    checks.append(
+        check(
+            "facility_overlap",
+            "pass" if pixels_near > 0 else "warn",
+            pixels_near,
+            f"{overlap_pct:.1f}% of {total_pixels:,} pixel cell-months near a reporting facility",
+        )
+    )
+
+    duplicates = stats["duplicate_row_ids"]
+    checks.append(
+        check(
+            "duplicate_row_ids",
+            "pass" if duplicates == 0 else "warn",
+            duplicates,
+            f"{duplicates:,} duplicate row_ids",
+        )
+    )
+
+    # approx_count_distinct is within a few percent, so only a large gap is meaningful
+    approx_dupes = stats["approx_duplicate_pixels"]
+    checks.append(
+        check(
+            "duplicate_pixels",
+            "warn" if approx_dupes > 0.05 * total else "pass",
+            approx_dupes,
+            f"~{approx_dupes:,} rows share an (orbit, scanline, ground_pixel) key",
+        )
+    )
+
+    return checks
 
-    # Test 8: Duplicate check
-    duplicates = con.execute(f"""
-        SELECT COUNT(*) - COUNT(DISTINCT row_id) FROM {TABLE_SENTINEL5P_RAW}
-    """).fetchone()[0]
-    print(f"\n[Test 8] Duplicate row_ids: {duplicates} - "\
-          f"{'PASSED' if duplicates==0 else 'WARNING'}")
 
+def resolve_scope(con, latest=False, since=None) -> tuple[str, str]:
+    """(WHERE clause, description) selecting the rows to validate"""
+    if latest:
+        last_load = con.execute(
+            f"SELECT MAX(ingestion_timestamp) FROM {TABLE_SENTINEL5P_RAW}"
+        ).fetchone()[0]
+        if last_load is None:
+            return "FALSE", "latest load (table empty)"
+        return f"ingestion_timestamp = '{last_load}'", f"latest load ({last_load})"
+
+    if since:
+        since = datetime.fromisoformat(since)
+        return f"ingestion_timestamp >= '{since}'", f"ingested since {since}"
+
+    return "TRUE", "full table"
+
+
+def run_validation_tests(latest=False, since=None, report_path=DEFAULT_REPORT):
+    con = connect(read_only=True)
+
+    print("=" * 60)
+    print("Sentinel-5P Data Validation Tests")
+    print("=" * 60)
+
+    scope_sql, scope = resolve_scope(con, latest=latest, since=since)
+    print(f"Scope: {scope}")
+
+    stats = collect_statistics(con, scope_sql)
+    overlap = spatial_overlap(con, scope_sql) if stats["total_rows"] else {}
     con.close()
 
+    checks = evaluate_checks(stats, overlap, partial=scope_sql != "TRUE")
+
+    for i, result in enumerate(checks, 1):
+        print(f"\n[Test {i}] {result['name']}: {result['message']}")
+        print(f"  {result['status'].upper()}")
+
+    status = max((c["status"] for c in checks), key=STATUS_ORDER.get)
+    report = {
+        "table": TABLE_SENTINEL5P_RAW,
+        "scope": scope,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "status": status,
+        "statistics": {**stats, **overlap},
+        "checks": checks,
+    }
+
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+
     print("\nValidation Summary")
-    print("="*60)
-    print(f"Total rows: {total_rows:,}")
-    print(f"Date coverage: {unique_dates} day(s), {unique_orbits} orbit(s)")
-    print(f"Avg QA: {avg_qa:.3f}, Avg CH4: {avg_ch4:.2f} ppb")
-    print(f"Spatial overlap: {pixels_near:,} pixels near facilities")
-    print("="*60)
-    return True
+    print("=" * 60)
+    counts = {s: sum(c["status"] == s for c in checks) for s in STATUS_ORDER}
+    print(
+        f"Overall: {status.upper()} "
+        f"({counts['pass']} passed, {counts['warn']} warnings, {counts['fail']} failed)"
+    )
+    print(f"Report: {report_path}")
+    print("=" * 60)
+
+    return status != "fail"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    scope = parser.add_mutually_exclusive_group()
+    scope.add_argument("--latest", action="store_true", help="Validate only the most recent load")
+    scope.add_argument("--since", help="Validate rows ingested at or after this ISO timestamp")
+    parser.add_argument("--report", type=Path, default=DEFAULT_REPORT, help="JSON report path")
+    args = parser.parse_args()
+
+    return run_validation_tests(latest=args.latest, since=args.since, report_path=args.report)
+
 
 if __name__ == "__main__":
     import sys
     import traceback
+
     try:
-        success = run_validation_tests()
+        success = main()
         sys.exit(0 if success else 1)
     except Exception as e:
         print(f"ERROR: {e}")
@@ -1,8 +1,7 @@
-import os
-
-import duckdb
 from dotenv import load_dotenv
 
+from scripts.lib.db import connect
+
 load_dotenv()
 
 
@@ -14,9 +13,7 @@ def test_spatial_queries():
     print("Testing Spatial Queries - AER Battery Data")
     print("=" * 60)
 
-    db_path = os.getenv("DUCKDB_DATABASE_PATH", "./emissions_ghg.duckdb")
-    con = duckdb.connect(db_path)
-    con.execute("LOAD spatial;")
+    con = connect(read_only=True)
 
     # Test 1: Count total facilities
     print("\n[Test 1] Total facilities loaded:")
@@ -0,0 +1,148 @@
+"""
+Assign integer spatial cell IDs to bronze rows
+
+Fills the indexed `cell_id` column of bronze.sentinel5p_raw and
+bronze.aer_battery_monthly (see scripts.lib.spatial_cells for the scheme).
+Only rows with a NULL cell_id are processed, one source file per batch, so
+re-running after a load only touches the new files. Use --rebuild after
+changing H3_RESOLUTION or the fallback grid.
+
+Usage:
+    python -m scripts.transform.assign_cells [--rebuild]
+"""
+
+import argparse
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from config.constants import TABLE_AER_FACILITIES, TABLE_SENTINEL5P_RAW
+from scripts.lib.db import connect
+from scripts.lib.spatial_cells import CELL_SCHEME, cell_ids
+
+load_dotenv()
+
+# Table -> column identifying the source file (the batch unit)
+CELL_TABLES = {
+    TABLE_SENTINEL5P_RAW: "file_path",
+    TABLE_AER_FACILITIES: "source_file",
+}
+
+
+def ensure_cell_column(con, table) -> None:
+    con.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS cell_id BIGINT")
+
+
+def ensure_cell_index(con, table) -> None:
+    index_name = f"idx_{table.split('.')[-1]}_cell_id"
+    con.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} (cell_id)")
+
+
+def fill_cells(con, table, where="TRUE", params=()) -> int:
+    """
+    Set cell_id on rows of table matching where that lack one;
+    returns the number of distinct coordinates indexed.
+    """
+    pending = f"cell_id IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL AND ({where})"
+
+    coords = con.execute(
+        f"SELECT DISTINCT latitude, longitude FROM {table} WHERE {pending}", list(params)
+    ).fetchnumpy()
+
+    if len(coords["latitude"]) == 0:
+        return 0
+
+    cells = pd.DataFrame(
+        {
+            "cell_latitude": coords["latitude"],
+            "cell_longitude": coords["longitude"],
+            "new_cell_id": cell_ids(coords["latitude"], coords["longitude"]),
+        }
+    )
+
+    con.register("cell_batch", cells)
+    try:
+        con.execute(
+            f"""
+            UPDATE {table}
+            SET cell_id = b.new_cell_id
+            FROM cell_batch AS b
+            WHERE {pending}
+              AND latitude = b.cell_latitude
+              AND longitude = b.cell_longitude
+            """,
+            list(params),
+        )
+    finally:
+        con.unregister("cell_batch")
+
+    return len(cells)
+
+
+def assign_cells(con, table, batch_column, rebuild=False) -> int:
+    """
+    Fill cell_id for rows that lack one, one source file at a time;
+    returns the number of distinct coordinates indexed.
+    """
+    pending = "cell_id IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL"
+
+    con.execute("BEGIN TRANSACTION")
+
+    try:
+        if rebuild:
+            con.execute(f"UPDATE {table} SET cell_id = NULL")
+
+        batches = [
+            key
+            for (key,) in con.execute(
+                f"SELECT DISTINCT {batch_column} FROM {table} WHERE {pending}"
+            ).fetchall()
+        ]
+
+        indexed = 0
+
+        for key in batches:
+            indexed += fill_cells(con, table, f"{batch_column} IS NOT DISTINCT FROM ?", [key])
+
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+    print(f"  {table}: {len(batches)} file(s), {indexed:,} distinct coordinates indexed")
+
+    return indexed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Recompute every cell_id, not only missing ones"
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Spatial cell assignment ({CELL_SCHEME})")
+    print("=" * 60)
+
+    con = connect()
+
+    for table, batch_column in CELL_TABLES.items():
+        ensure_cell_column(con, table)
+        assign_cells(con, table, batch_column, rebuild=args.rebuild)
+        ensure_cell_index(con, table)
+
+    con.close()
+
+    print("\nSUCCESS: cell_id assigned")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
@@ -0,0 +1,254 @@
+"""
+Build silver.facility_pixel_weights from bronze pixel footprints
+
+Each AER facility gets a FACILITY_BUFFER_DISTANCE_M zone (buffered in
+METRIC_CRS). For every orbit with bronze rows ingested after the
+watermark, the pixel footprints are intersected with the zones and one
+row per overlapping (pixel, facility) is written with the overlap area and
+its share of the footprint. Candidate pairs come from the shared
+grid-bucketed proximity join (scripts.lib.proximity) between pixel centres
+and facility locations, with a reach of the buffer plus the orbit's
+largest footprint radius, so every intersecting pair is a candidate and
+the exact polygon intersection only runs on those. Attribution downstream
+is then an equi-join on (orbit_number, scanline, ground_pixel). Run with
+--full-refresh after facility locations change.
+
+Usage:
+    python -m scripts.transform.build_facility_pixel_weights [--full-refresh]
+"""
+
+import argparse
+
+from dotenv import load_dotenv
+
+from config.constants import (
+    FACILITY_BUFFER_DISTANCE_M,
+    METRIC_CRS,
+    TABLE_AER_FACILITIES,
+    TABLE_FACILITY_PIXEL_WEIGHTS,
+    TABLE_SENTINEL5P_RAW,
+)
+from scripts.lib.db import connect
+from scripts.lib.proximity import proximity_join_sql, register_haversine
+from scripts.setup.create_silver_tables import (
+    create_facility_pixel_weights_table,
+    create_pipeline_watermarks_table,
+)
+from scripts.transform.watermarks import get_watermark, set_watermark
+
+load_dotenv()
+
+PIXEL_KEY = "orbit_number, scanline, ground_pixel"
+
+# Slack on the candidate reach for haversine vs METRIC_CRS distances
+REACH_MARGIN = 1.01
+
+
+def to_metric(geometry_sql) -> str:
+    return f"ST_Transform({geometry_sql}, 'EPSG:4326', '{METRIC_CRS}', always_xy := true)"
+
+
+def create_facility_zones(con) -> int:
+    """Temp table of one buffered zone per facility, at its latest reported location"""
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE facility_zones AS
+        SELECT
+            facility_id,
+            latitude,
+            longitude,
+            {to_metric("ST_Point(longitude, latitude)")} AS location,
+            ST_Buffer({to_metric("ST_Point(longitude, latitude)")},
+                      {FACILITY_BUFFER_DISTANCE_M}) AS zone
+        FROM (
+            SELECT
+                facility_id,
+                arg_max(latitude, reporting_month) AS latitude,
+                arg_max(longitude, reporting_month) AS longitude
+            FROM {TABLE_AER_FACILITIES}
+            WHERE facility_id IS NOT NULL
+              AND latitude IS NOT NULL AND longitude IS NOT NULL
+            GROUP BY facility_id
+        )
+    """)
+    return con.execute("SELECT COUNT(*) FROM facility_zones").fetchone()[0]
+
+
+def stage_orbit_pixels(con, orbit_number) -> float | None:
+    """
+    Temp table orbit_pixels of the orbit's latest footprints; returns the
+    largest centre-to-footprint distance in metres (None if no footprints).
+    """
+    con.execute(
+        f"""
+        CREATE OR REPLACE TEMP TABLE orbit_pixels AS
+        SELECT
+            {PIXEL_KEY},
+            latitude,
+            longitude,
+            measurement_timestamp::DATE AS measurement_date,
+            footprint
+        FROM {TABLE_SENTINEL5P_RAW}
+        WHERE orbit_number = $orbit AND footprint IS NOT NULL
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY {PIXEL_KEY}
+            ORDER BY ingestion_timestamp DESC, row_id DESC
+        ) = 1
+        """,
+        {"orbit": orbit_number},
+    )
+
+    # Envelope corners bound every footprint vertex
+    return con.execute("""
+        SELECT MAX(greatest(
+            haversine_m(latitude, longitude, ST_YMin(footprint), ST_XMin(footprint)),
+            haversine_m(latitude, longitude, ST_YMin(footprint), ST_XMax(footprint)),
+            haversine_m(latitude, longitude, ST_YMax(footprint), ST_XMin(footprint)),
+            haversine_m(latitude, longitude, ST_YMax(footprint), ST_XMax(footprint))
+        ))
+        FROM orbit_pixels
+    """).fetchone()[0]
+
+
+def build_orbit_weights(con, orbit_number) -> int:
+    """Replace one orbit's rows; returns the number of (pixel, facility) pairs written"""
+    con.execute(
+        f"DELETE FROM {TABLE_FACILITY_PIXEL_WEIGHTS} WHERE orbit_number = ?", [orbit_number]
+    )
+
+    footprint_radius = stage_orbit_pixels(con, orbit_number)
+    if footprint_radius is None:
+        return 0
+
+    candidates = proximity_join_sql(
+        "orbit_pixels",
+        "facility_zones",
+        PIXEL_KEY,
+        "facility_id",
+        distance_m=(FACILITY_BUFFER_DISTANCE_M + footprint_radius) * REACH_MARGIN,
+    )
+
+    return con.execute(f"""
+        INSERT INTO {TABLE_FACILITY_PIXEL_WEIGHTS} BY NAME
+        WITH pixels AS (
+            SELECT
+                p.*,
+                {to_metric("p.footprint")} AS footprint_m,
+                z.facility_id,
+                z.zone,
+                z.location
+            FROM {candidates} AS c
+            JOIN orbit_pixels AS p USING ({PIXEL_KEY})
+            JOIN facility_zones AS z USING (facility_id)
+        ), pixel_overlaps AS (
+            SELECT
+                orbit_number,
+                scanline,
+                ground_pixel,
+                facility_id,
+                measurement_date,
+                ST_Area(footprint_m) AS footprint_m2,
+                ST_Area(ST_Intersection(footprint_m, zone)) AS overlap_m2,
+                ST_Contains(footprint_m, location) AS covers_facility
+            FROM pixels
+            WHERE ST_Intersects(footprint_m, zone)
+        )
+        SELECT
+            orbit_number,
+            scanline,
+            ground_pixel,
+            facility_id,
+            measurement_date,
+            overlap_m2 / 1e6 AS overlap_km2,
+            overlap_m2 / footprint_m2 AS weight,
+            covers_facility,
+            CURRENT_TIMESTAMP AS computed_at
+        FROM pixel_overlaps
+        WHERE overlap_m2 > 0 AND footprint_m2 > 0
+    """).fetchone()[0]
+
+
+def build_facility_pixel_weights(con, full_refresh=False) -> int:
+    """
+    Recompute the weights of every orbit with bronze rows newer than the
+    watermark; returns the number of rows written.
+    """
+    create_pipeline_watermarks_table(con)
+    create_facility_pixel_weights_table(con)
+
+    since = None if full_refresh else get_watermark(con, TABLE_FACILITY_PIXEL_WEIGHTS)
+    print(f"Watermark: {since or 'none (full build)'}")
+
+    orbits = con.execute(
+        f"""
+        SELECT orbit_number, MAX(ingestion_timestamp)
+        FROM {TABLE_SENTINEL5P_RAW}
+        WHERE ($since IS NULL OR ingestion_timestamp > $since) AND orbit_number IS NOT NULL
+        GROUP BY orbit_number
+        ORDER BY orbit_number
+        """,
+        {"since": since},
+    ).fetchall()
+
+    if not orbits:
+        print("No new bronze rows")
+        return 0
+
+    new_watermark = max(ts for _, ts in orbits)
+
+    register_haversine(con)
+    facilities = create_facility_zones(con)
+    print(f"{len(orbits)} orbit(s) against {facilities:,} facility zone(s)")
+
+    written = 0
+
+    con.execute("BEGIN TRANSACTION")
+
+    try:
+        if full_refresh:
+            con.execute(f"DELETE FROM {TABLE_FACILITY_PIXEL_WEIGHTS}")
+
+        for orbit_number, _ in orbits:
+            written += build_orbit_weights(con, orbit_number)
+
+        set_watermark(con, TABLE_FACILITY_PIXEL_WEIGHTS, new_watermark)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    finally:
+        con.execute("DROP TABLE IF EXISTS facility_zones")
+        con.execute("DROP TABLE IF EXISTS orbit_pixels")
+
+    print(f"Wrote {written:,} (pixel, facility) weights")
+    print(f"New watermark: {new_watermark}")
+
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--full-refresh", action="store_true", help="Ignore the watermark and recompute every orbit"
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Building {TABLE_FACILITY_PIXEL_WEIGHTS}")
+    print("=" * 60)
+
+    con = connect()
+
+    build_facility_pixel_weights(con, full_refresh=args.full_refresh)
+
+    con.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
@@ -0,0 +1,206 @@
+"""
+Maintain gold.regional_ch4_hotspots incrementally from silver
+
+Per-cell daily and monthly aggregates of ch4_column (count, sum, sum of
+squares, min, max) with the enhancement over the regional background of
+the same period. Each run only touches the days whose silver rows were
+processed after the gold watermark: those days are re-aggregated from
+silver, and their months are re-rolled from the daily rows. Re-aggregating
+whole days (rather than adding deltas) keeps the table exact when silver
+rows are updated or removed by a reload; days emptied by a reload are
+picked up from silver.sentinel5p_removed_days.
+
+Usage:
+    python -m scripts.transform.build_gold_hotspots [--full-refresh]
+"""
+
+import argparse
+
+from dotenv import load_dotenv
+
+from config.constants import (
+    HOTSPOT_SIGMA,
+    MIN_PIXELS_PER_CELL,
+    TABLE_CH4_HOTSPOTS,
+    TABLE_SENTINEL5P_CLEANED,
+)
+from scripts.lib.db import connect
+from scripts.setup.create_gold_tables import create_ch4_hotspots_table
+from scripts.setup.create_silver_tables import (
+    create_pipeline_watermarks_table,
+    create_sentinel5p_cleaned_table,
+)
+from scripts.transform.watermarks import get_watermark, set_watermark, stage_affected_days
+
+load_dotenv()
+
+
+def insert_periods(con, aggregates_sql) -> int:
+    """
+    Insert cell aggregates (period_type, period_start, cell_id, pixel_count,
+    ch4_sum, ch4_sum_sq, ch4_min, ch4_max, latitude, longitude) into gold,
+    deriving mean, std, regional background and enhancement.
+    """
+    return con.execute(f"""
+        INSERT INTO {TABLE_CH4_HOTSPOTS} BY NAME
+        WITH cells AS ({aggregates_sql}),
+        derived AS (
+            SELECT
+                *,
+                ch4_sum / pixel_count AS ch4_mean,
+                CASE WHEN pixel_count > 1 THEN sqrt(greatest(
+                    ch4_sum_sq - ch4_sum * ch4_sum / pixel_count, 0
+                ) / (pixel_count - 1)) END AS ch4_std,
+                SUM(ch4_sum) OVER period / SUM(pixel_count) OVER period AS background_ch4,
+                sqrt(greatest(
+                    SUM(ch4_sum_sq) OVER period
+                    - pow(SUM(ch4_sum) OVER period, 2) / SUM(pixel_count) OVER period, 0
+                ) / greatest(SUM(pixel_count) OVER period - 1, 1)) AS background_std
+            FROM cells
+            WINDOW period AS (PARTITION BY period_type, period_start)
+        )
+        SELECT
+            *,
+            ch4_mean - background_ch4 AS enhancement_ppb,
+            pixel_count >= {MIN_PIXELS_PER_CELL}
+                AND ch4_mean - background_ch4 > {HOTSPOT_SIGMA} * background_std AS is_hotspot,
+            CURRENT_TIMESTAMP AS updated_at
+        FROM derived
+    """).fetchone()[0]
+
+
+def build_gold_hotspots(con, full_refresh=False) -> tuple[int, int]:
+    """
+    Refresh the day and month rows affected since the watermark;
+    returns (days, months) refreshed.
+    """
+    create_pipeline_watermarks_table(con)
+    create_sentinel5p_cleaned_table(con)
+    create_ch4_hotspots_table(con)
+
+    since = None if full_refresh else get_watermark(con, TABLE_CH4_HOTSPOTS)
+    print(f"Watermark: {since or 'none (full build)'}")
+
+    con.execute("BEGIN TRANSACTION")
+
+    try:
+        if full_refresh:
+            con.execute(f"DELETE FROM {TABLE_CH4_HOTSPOTS}")
+
+        days, new_watermark = stage_affected_days(con, since)
+
+        if days == 0:
+            con.execute("ROLLBACK")
+            print("No new silver rows")
+            return 0, 0
+
+        con.execute(f"""
+            DELETE FROM {TABLE_CH4_HOTSPOTS}
+            WHERE period_type = 'day' AND period_start IN (SELECT day FROM affected_days)
+        """)
+        insert_periods(
+            con,
+            f"""
+            SELECT
+                'day' AS period_type,
+                measurement_date AS period_start,
+                cell_id,
+                COUNT(*) AS pixel_count,
+                SUM(ch4_column) AS ch4_sum,
+                SUM(ch4_column * ch4_column) AS ch4_sum_sq,
+                MIN(ch4_column) AS ch4_min,
+                MAX(ch4_column) AS ch4_max,
+                AVG(latitude) AS latitude,
+                AVG(longitude) AS longitude
+            FROM {TABLE_SENTINEL5P_CLEANED}
+            WHERE measurement_date IN (SELECT day FROM affected_days)
+              AND cell_id IS NOT NULL
+            GROUP BY measurement_date, cell_id
+        """,
+        )
+
+        # Months are rolled up from the (already refreshed) daily rows, not from silver
+        con.execute("""
+            CREATE OR REPLACE TEMP TABLE affected_months AS
+            SELECT DISTINCT date_trunc('month', day)::DATE AS month FROM affected_days
+        """)
+        months = con.execute("SELECT COUNT(*) FROM affected_months").fetchone()[0]
+
+        con.execute(f"""
+            DELETE FROM {TABLE_CH4_HOTSPOTS}
+            WHERE period_type = 'month' AND period_start IN (SELECT month FROM affected_months)
+        """)
+        insert_periods(
+            con,
+            f"""
+            SELECT
+                'month' AS period_type,
+                date_trunc('month', period_start)::DATE AS period_start,
+                cell_id,
+                SUM(pixel_count) AS pixel_count,
+                SUM(ch4_sum) AS ch4_sum,
+                SUM(ch4_sum_sq) AS ch4_sum_sq,
+                MIN(ch4_min) AS ch4_min,
+                MAX(ch4_max) AS ch4_max,
+                SUM(latitude * pixel_count) / SUM(pixel_count) AS latitude,
+                SUM(longitude * pixel_count) / SUM(pixel_count) AS longitude
+            FROM {TABLE_CH4_HOTSPOTS}
+            WHERE period_type = 'day'
+              AND date_trunc('month', period_start)::DATE IN (SELECT month FROM affected_months)
+            GROUP BY 2, cell_id
+        """,
+        )
+
+        set_watermark(con, TABLE_CH4_HOTSPOTS, new_watermark)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    finally:
+        con.execute("DROP TABLE IF EXISTS affected_days")
+        con.execute("DROP TABLE IF EXISTS affected_months")
+
+    unassigned = con.execute(
+        f"SELECT COUNT(*) FROM {TABLE_SENTINEL5P_CLEANED} WHERE cell_id IS NULL"
+    ).fetchone()[0]
+    if unassigned:
+        print(
+            f"WARNING: {unassigned:,} silver rows have no cell_id "
+            "(rerun build_silver_sentinel5p with --full-refresh to compute them)"
+        )
+
+    print(f"Refreshed {days} day(s) and {months} month(s)")
+    print(f"New watermark: {new_watermark}")
+
+    return days, months
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Ignore the watermark and rebuild from all of silver",
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Building {TABLE_CH4_HOTSPOTS}")
+    print("=" * 60)
+
+    con = connect()
+
+    build_gold_hotspots(con, full_refresh=args.full_refresh)
+
+    con.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
@@ -0,0 +1,215 @@
+"""
+Maintain CH4 background and enhancement tables incrementally from silver
+
+For every day whose silver pixels were processed (or removed) after the
+watermark:
+  - silver.ch4_daily_background gets the day's regional background, the
+    BACKGROUND_QUANTILE of all silver pixels over ALBERTA_BBOX;
+  - silver.sentinel5p_ch4_enhancement gets each pixel's enhancement over
+    that background;
+  - silver.ch4_cell_daily gets per-cell sums of CH4 and enhancement.
+Rolling ROLLING_WINDOW_DAYS means per cell are then recomputed with a
+RANGE window, but only for the days whose window contains a refreshed day.
+Other days are left untouched.
+
+Usage:
+    python -m scripts.transform.build_silver_enhancement [--full-refresh]
+"""
+
+import argparse
+
+from dotenv import load_dotenv
+
+from config.constants import (
+    BACKGROUND_QUANTILE,
+    ROLLING_WINDOW_DAYS,
+    TABLE_CH4_CELL_DAILY,
+    TABLE_CH4_DAILY_BACKGROUND,
+    TABLE_SENTINEL5P_CLEANED,
+    TABLE_SENTINEL5P_ENHANCEMENT,
+)
+from scripts.lib.db import connect
+from scripts.setup.create_silver_tables import (
+    create_enhancement_tables,
+    create_pipeline_watermarks_table,
+    create_sentinel5p_cleaned_table,
+)
+from scripts.transform.watermarks import get_watermark, set_watermark, stage_affected_days
+
+load_dotenv()
+
+
+def refresh_days(con) -> None:
+    """Replace background, pixel and cell-day rows of the days in affected_days"""
+    for table in (TABLE_CH4_DAILY_BACKGROUND, TABLE_SENTINEL5P_ENHANCEMENT, TABLE_CH4_CELL_DAILY):
+        con.execute(f"""
+            DELETE FROM {table}
+            WHERE measurement_date IN (SELECT day FROM affected_days)
+        """)
+
+    con.execute(f"""
+        INSERT INTO {TABLE_CH4_DAILY_BACKGROUND} BY NAME
+        SELECT
+            measurement_date,
+            COUNT(*) AS pixel_count,
+            quantile_cont(ch4_column, {BACKGROUND_QUANTILE}) AS background_ch4,
+            AVG(ch4_column) AS ch4_mean,
+            stddev_samp(ch4_column) AS ch4_std,
+            CURRENT_TIMESTAMP AS updated_at
+        FROM {TABLE_SENTINEL5P_CLEANED}
+        WHERE measurement_date IN (SELECT day FROM affected_days)
+        GROUP BY measurement_date
+    """)
+
+    con.execute(f"""
+        INSERT INTO {TABLE_SENTINEL5P_ENHANCEMENT} BY NAME
+        SELECT
+            s.orbit_number,
+            s.scanline,
+            s.ground_pixel,
+            s.measurement_date,
+            s.cell_id,
+            s.ch4_column,
+            b.background_ch4,
+            s.ch4_column - b.background_ch4 AS enhancement_ppb
+        FROM {TABLE_SENTINEL5P_CLEANED} AS s
+        JOIN {TABLE_CH4_DAILY_BACKGROUND} AS b USING (measurement_date)
+        WHERE s.measurement_date IN (SELECT day FROM affected_days)
+    """)
+
+    con.execute(f"""
+        INSERT INTO {TABLE_CH4_CELL_DAILY} BY NAME
+        SELECT
+            measurement_date,
+            cell_id,
+            COUNT(*) AS pixel_count,
+            SUM(ch4_column) AS ch4_sum,
+            SUM(enhancement_ppb) AS enhancement_sum,
+            CURRENT_TIMESTAMP AS updated_at
+        FROM {TABLE_SENTINEL5P_ENHANCEMENT}
+        WHERE measurement_date IN (SELECT day FROM affected_days)
+          AND cell_id IS NOT NULL
+        GROUP BY measurement_date, cell_id
+    """)
+
+
+def refresh_rolling(con) -> int:
+    """
+    Recompute rolling columns of every cell-day whose window holds an
+    affected day; returns the number of rows updated.
+    """
+    span = ROLLING_WINDOW_DAYS - 1
+
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE rolling_days AS
+        SELECT DISTINCT day + offset_days::INTEGER AS day
+        FROM affected_days, range(0, {ROLLING_WINDOW_DAYS}) AS t(offset_days)
+    """)
+
+    return con.execute(f"""
+        UPDATE {TABLE_CH4_CELL_DAILY} AS c
+        SET rolling_pixel_count = r.rolling_pixel_count,
+            rolling_ch4_mean = r.rolling_ch4_mean,
+            rolling_enhancement_ppb = r.rolling_enhancement_ppb,
+            updated_at = CURRENT_TIMESTAMP
+        FROM (
+            SELECT
+                measurement_date,
+                cell_id,
+                SUM(pixel_count) OVER w AS rolling_pixel_count,
+                SUM(ch4_sum) OVER w / SUM(pixel_count) OVER w AS rolling_ch4_mean,
+                SUM(enhancement_sum) OVER w / SUM(pixel_count) OVER w
+                    AS rolling_enhancement_ppb
+            FROM {TABLE_CH4_CELL_DAILY}
+            WHERE measurement_date BETWEEN
+                (SELECT MIN(day) FROM rolling_days) - {span}
+                AND (SELECT MAX(day) FROM rolling_days)
+            WINDOW w AS (
+                PARTITION BY cell_id
+                ORDER BY measurement_date
+                RANGE BETWEEN INTERVAL {span} DAYS PRECEDING AND CURRENT ROW
+            )
+        ) AS r
+        WHERE c.measurement_date = r.measurement_date
+          AND c.cell_id = r.cell_id
+          AND c.measurement_date IN (SELECT day FROM rolling_days)
+    """).fetchone()[0]
+
+
+def build_silver_enhancement(con, full_refresh=False) -> int:
+    """
+    Refresh the days affected since the watermark;
+    returns the number of days refreshed.
+    """
+    create_pipeline_watermarks_table(con)
+    create_sentinel5p_cleaned_table(con)
+    create_enhancement_tables(con)
+
+    since = None if full_refresh else get_watermark(con, TABLE_SENTINEL5P_ENHANCEMENT)
+    print(f"Watermark: {since or 'none (full build)'}")
+
+    con.execute("BEGIN TRANSACTION")
+
+    try:
+        if full_refresh:
+            for table in (
+                TABLE_CH4_DAILY_BACKGROUND,
+                TABLE_SENTINEL5P_ENHANCEMENT,
+                TABLE_CH4_CELL_DAILY,
+            ):
+                con.execute(f"DELETE FROM {table}")
+
+        days, new_watermark = stage_affected_days(con, since)
+
+        if days == 0:
+            con.execute("ROLLBACK")
+            print("No new silver rows")
+            return 0
+
+        refresh_days(con)
+        rolled = refresh_rolling(con)
+
+        set_watermark(con, TABLE_SENTINEL5P_ENHANCEMENT, new_watermark)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    finally:
+        con.execute("DROP TABLE IF EXISTS affected_days")
+        con.execute("DROP TABLE IF EXISTS rolling_days")
+
+    print(f"Refreshed {days} day(s), {rolled:,} rolling cell-day row(s)")
+    print(f"New watermark: {new_watermark}")
+
+    return days
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Ignore the watermark and rebuild from all of silver",
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Building {TABLE_SENTINEL5P_ENHANCEMENT}")
+    print("=" * 60)
+
+    con = connect()
+
+    build_silver_enhancement(con, full_refresh=args.full_refresh)
+
+    con.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
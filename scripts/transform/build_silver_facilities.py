@@ -0,0 +1,271 @@
+"""
+Build the silver AER facility dimension and monthly fact incrementally
+
+bronze.aer_battery_monthly repeats every facility attribute (operator,
+description, location geometry) on each monthly row. This splits it into
+silver.aer_facilities, one row per facility_id with an integer
+facility_key and operator / facility type stored as integer codes, and
+silver.aer_facility_monthly, which holds only (reporting_month,
+facility_key) and the volumes.
+
+Work is done per reporting_month. The months rebuilt are those touched by
+files loaded since the watermark (per the ingestion ledger). Each month's
+fact rows are replaced wholesale, and the dimension keeps the attributes
+of each facility's latest month.
+
+Usage:
+    python -m scripts.transform.build_silver_facilities [--full-refresh]
+"""
+
+import argparse
+
+from dotenv import load_dotenv
+
+from config.constants import (
+    TABLE_AER_FACILITIES,
+    TABLE_AER_FACILITY_TYPES,
+    TABLE_AER_OPERATORS,
+    TABLE_FACILITY_DIM,
+    TABLE_FACILITY_MONTHLY,
+    TABLE_INGESTION_LEDGER,
+)
+from scripts.lib.db import connect
+from scripts.setup.create_silver_tables import (
+    create_facility_tables,
+    create_pipeline_watermarks_table,
+)
+from scripts.transform.watermarks import get_watermark, set_watermark
+
+load_dotenv()
+
+VOLUME_COLUMNS = (
+    "oil_prod_m3",
+    "gas_prod_1000m3",
+    "gas_flared_1000m3",
+    "gas_vented_1000m3",
+    "water_prod_m3",
+    "total_wells",
+)
+
+# Dimension attributes taken from each facility's latest reporting month
+ATTRIBUTE_COLUMNS = (
+    "licence",
+    "operator_key",
+    "facility_type_key",
+    "facility_description",
+    "bty_location_raw",
+    "latitude",
+    "longitude",
+    "location",
+    "cell_id",
+)
+
+
+def affected_months(con, since) -> list:
+    """Reporting months in files loaded after since, or previously built from them"""
+    new_files = f"""
+        SELECT source_file FROM {TABLE_INGESTION_LEDGER}
+        WHERE source_table = $table AND ($since IS NULL OR loaded_at > $since)
+    """
+    return [
+        month
+        for (month,) in con.execute(
+            f"""
+            SELECT reporting_month FROM {TABLE_AER_FACILITIES}
+            WHERE source_file IN ({new_files})
+            UNION
+            SELECT reporting_month FROM {TABLE_FACILITY_MONTHLY}
+            WHERE source_file IN ({new_files})
+            ORDER BY reporting_month
+            """,
+            {"table": TABLE_AER_FACILITIES, "since": since},
+        ).fetchall()
+        if month is not None
+    ]
+
+
+def stage_bronze_months(con, months) -> None:
+    """
+    Temp table of bronze rows for months, one per (facility_id, reporting_month):
+    the one from the newest load (row_id restarts in every file).
+    """
+    con.execute(
+        f"""
+        CREATE OR REPLACE TEMP TABLE facility_months AS
+        SELECT * FROM {TABLE_AER_FACILITIES}
+        WHERE list_contains($months, reporting_month) AND facility_id IS NOT NULL
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY facility_id, reporting_month
+            ORDER BY ingestion_date DESC, source_file DESC, row_id DESC
+        ) = 1
+        """,
+        {"months": months},
+    )
+
+
+def upsert_codes(con) -> None:
+    """Register operators and facility types not yet in the lookups"""
+    for table, column in (
+        (TABLE_AER_OPERATORS, "operator"),
+        (TABLE_AER_FACILITY_TYPES, "facility_type"),
+    ):
+        con.execute(f"""
+            INSERT INTO {table} ({column})
+            SELECT DISTINCT {column} FROM facility_months
+            WHERE {column} IS NOT NULL
+              AND {column} NOT IN (SELECT {column} FROM {table})
+            ORDER BY {column}
+        """)
+
+
+def upsert_facilities(con) -> int:
+    """MERGE the staged months into the dimension; returns facilities touched"""
+    attributes = ", ".join(ATTRIBUTE_COLUMNS)
+    newer = "b.last_reporting_month >= d.last_reporting_month"
+    updates = ",\n                ".join(
+        f"{c} = CASE WHEN {newer} THEN b.{c} ELSE d.{c} END" for c in ATTRIBUTE_COLUMNS
+    )
+
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE facility_batch AS
+        SELECT
+            f.facility_id,
+            f.licence,
+            o.operator_key,
+            t.facility_type_key,
+            f.facility_description,
+            f.bty_location_raw,
+            f.latitude,
+            f.longitude,
+            f.location,
+            f.cell_id,
+            MIN(f.reporting_month) OVER w AS first_reporting_month,
+            f.reporting_month AS last_reporting_month
+        FROM facility_months AS f
+        LEFT JOIN {TABLE_AER_OPERATORS} AS o USING (operator)
+        LEFT JOIN {TABLE_AER_FACILITY_TYPES} AS t USING (facility_type)
+        WINDOW w AS (PARTITION BY f.facility_id)
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY f.facility_id ORDER BY f.reporting_month DESC
+        ) = 1
+    """)
+
+    return con.execute(f"""
+        MERGE INTO {TABLE_FACILITY_DIM} AS d
+        USING facility_batch AS b
+        ON d.facility_id = b.facility_id
+        WHEN MATCHED THEN UPDATE SET
+                {updates},
+                first_reporting_month = least(d.first_reporting_month, b.first_reporting_month),
+                last_reporting_month = greatest(d.last_reporting_month, b.last_reporting_month),
+                updated_at = CURRENT_TIMESTAMP
+        WHEN NOT MATCHED THEN INSERT (
+            facility_id, {attributes}, first_reporting_month, last_reporting_month
+        ) VALUES (
+            b.facility_id, {", ".join(f"b.{c}" for c in ATTRIBUTE_COLUMNS)},
+            b.first_reporting_month, b.last_reporting_month
+        )
+    """).fetchone()[0]
+
+
+def replace_monthly_facts(con, months) -> int:
+    """Delete and re-insert the fact rows of months; returns rows inserted"""
+    volumes = ", ".join(f"f.{c}" for c in VOLUME_COLUMNS)
+
+    con.execute(
+        f"DELETE FROM {TABLE_FACILITY_MONTHLY} WHERE list_contains($months, reporting_month)",
+        {"months": months},
+    )
+
+    # Sorted so each month's row groups are contiguous for zone-map pruning
+    return con.execute(f"""
+        INSERT INTO {TABLE_FACILITY_MONTHLY}
+            (reporting_month, facility_key, {", ".join(VOLUME_COLUMNS)}, source_file)
+        SELECT f.reporting_month, d.facility_key, {volumes}, f.source_file
+        FROM facility_months AS f
+        JOIN {TABLE_FACILITY_DIM} AS d USING (facility_id)
+        ORDER BY f.reporting_month, d.facility_key
+    """).fetchone()[0]
+
+
+def build_silver_facilities(con, full_refresh=False) -> int:
+    """
+    Rebuild the reporting months touched since the watermark;
+    returns the number of fact rows written.
+    """
+    create_pipeline_watermarks_table(con)
+    create_facility_tables(con)
+
+    since = None if full_refresh else get_watermark(con, TABLE_FACILITY_MONTHLY)
+    print(f"Watermark: {since or 'none (full build)'}")
+
+    new_watermark = con.execute(
+        f"""
+        SELECT MAX(loaded_at) FROM {TABLE_INGESTION_LEDGER}
+        WHERE source_table = $table AND ($since IS NULL OR loaded_at > $since)
+        """,
+        {"table": TABLE_AER_FACILITIES, "since": since},
+    ).fetchone()[0]
+
+    if new_watermark is None:
+        print("No new AER files")
+        return 0
+
+    months = affected_months(con, since)
+    print(f"{len(months)} reporting month(s) to rebuild")
+
+    con.execute("BEGIN TRANSACTION")
+
+    try:
+        if full_refresh:
+            con.execute(f"DELETE FROM {TABLE_FACILITY_MONTHLY}")
+
+        stage_bronze_months(con, months)
+        upsert_codes(con)
+        facilities = upsert_facilities(con)
+        written = replace_monthly_facts(con, months)
+
+        set_watermark(con, TABLE_FACILITY_MONTHLY, new_watermark)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    finally:
+        con.execute("DROP TABLE IF EXISTS facility_months")
+        con.execute("DROP TABLE IF EXISTS facility_batch")
+
+    print(f"Upserted {facilities:,} facilities, wrote {written:,} monthly rows")
+    print(f"New watermark: {new_watermark}")
+
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Ignore the watermark and rebuild every reporting month",
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Building {TABLE_FACILITY_DIM} and {TABLE_FACILITY_MONTHLY}")
+    print("=" * 60)
+
+    con = connect()
+
+    build_silver_facilities(con, full_refresh=args.full_refresh)
+
+    con.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
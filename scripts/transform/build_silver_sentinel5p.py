@@ -0,0 +1,187 @@
+"""
+Build silver.sentinel5p_ch4_cleaned incrementally from bronze.sentinel5p_raw
+
+Only bronze rows ingested after the table's watermark are read. They are
+filtered on SENTINEL5P_QA_THRESHOLD_SILVER and CH4_MIN_VALID..CH4_MAX_VALID,
+deduplicated on (orbit_number, scanline, ground_pixel) keeping the latest
+ingestion, and MERGEd into silver. Pixels whose bronze cell_id is still
+NULL (assign_cells has not run on their file yet) get it computed here,
+so silver never keeps a missing cell. Rows of reloaded files that no longer
+pass are removed, and their days logged for the gold builder. Writes and
+the new watermark commit together, so a failed run is simply retried.
+
+Usage:
+    python -m scripts.transform.build_silver_sentinel5p [--full-refresh]
+"""
+
+import argparse
+
+from dotenv import load_dotenv
+
+from config.constants import (
+    CH4_MAX_VALID,
+    CH4_MIN_VALID,
+    SENTINEL5P_QA_THRESHOLD_SILVER,
+    TABLE_SENTINEL5P_CLEANED,
+    TABLE_SENTINEL5P_RAW,
+    TABLE_SENTINEL5P_REMOVED_DAYS,
+)
+from scripts.lib.db import connect
+from scripts.setup.create_silver_tables import (
+    create_pipeline_watermarks_table,
+    create_sentinel5p_cleaned_table,
+)
+from scripts.transform.assign_cells import fill_cells
+from scripts.transform.watermarks import get_watermark, set_watermark
+
+load_dotenv()
+
+PIXEL_KEY = "orbit_number, scanline, ground_pixel"
+
+
+def build_silver_sentinel5p(con, full_refresh=False) -> int:
+    """
+    MERGE bronze rows newer than the watermark into silver;
+    returns the number of silver rows written.
+    """
+    create_pipeline_watermarks_table(con)
+    create_sentinel5p_cleaned_table(con)
+
+    since = None if full_refresh else get_watermark(con, TABLE_SENTINEL5P_CLEANED)
+    print(f"Watermark: {since or 'none (full build)'}")
+
+    con.execute("BEGIN TRANSACTION")
+
+    try:
+        if full_refresh:
+            con.execute(f"DELETE FROM {TABLE_SENTINEL5P_CLEANED}")
+
+        con.execute(
+            f"""
+            CREATE OR REPLACE TEMP TABLE bronze_delta AS
+            SELECT * FROM {TABLE_SENTINEL5P_RAW}
+            WHERE $since IS NULL OR ingestion_timestamp > $since
+            """,
+            {"since": since},
+        )
+
+        # Taken before filtering, so a batch that is entirely rejected still advances it
+        new_watermark = con.execute("SELECT MAX(ingestion_timestamp) FROM bronze_delta").fetchone()[
+            0
+        ]
+
+        if new_watermark is None:
+            con.execute("ROLLBACK")
+            print("No new bronze rows")
+            return 0
+
+        con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE silver_batch AS
+            SELECT
+                orbit_number,
+                scanline,
+                ground_pixel,
+                measurement_timestamp,
+                measurement_timestamp::DATE AS measurement_date,
+                latitude,
+                longitude,
+                location,
+                cell_id,
+                ch4_column,
+                qa_value,
+                file_path AS source_file,
+                row_id AS bronze_row_id,
+                ingestion_timestamp AS bronze_ingestion_timestamp,
+                CURRENT_TIMESTAMP AS processed_at
+            FROM bronze_delta
+            WHERE qa_value >= {SENTINEL5P_QA_THRESHOLD_SILVER}
+              AND ch4_column BETWEEN {CH4_MIN_VALID} AND {CH4_MAX_VALID}
+              AND latitude IS NOT NULL AND longitude IS NOT NULL
+              AND orbit_number IS NOT NULL AND scanline IS NOT NULL AND ground_pixel IS NOT NULL
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY {PIXEL_KEY}
+                ORDER BY ingestion_timestamp DESC, row_id DESC
+            ) = 1
+        """)
+
+        missing_cells = fill_cells(con, "silver_batch")
+        if missing_cells:
+            print(
+                f"WARNING: {missing_cells:,} coordinate(s) had no bronze cell_id, computed "
+                "for silver (run scripts.transform.assign_cells to fill bronze)"
+            )
+
+        # Reloaded files replace their previous silver rows wholesale
+        removed_dates = con.execute(f"""
+            DELETE FROM {TABLE_SENTINEL5P_CLEANED} AS s
+            WHERE s.orbit_number IN (SELECT DISTINCT orbit_number FROM bronze_delta)
+              AND s.source_file IN (SELECT DISTINCT file_path FROM bronze_delta)
+              AND NOT EXISTS (
+                  SELECT 1 FROM silver_batch b
+                  WHERE b.orbit_number = s.orbit_number
+                    AND b.scanline = s.scanline
+                    AND b.ground_pixel = s.ground_pixel
+              )
+            RETURNING measurement_date
+        """).fetchall()
+        removed = len(removed_dates)
+        if removed:
+            con.executemany(
+                f"INSERT INTO {TABLE_SENTINEL5P_REMOVED_DAYS} (measurement_date) VALUES (?)",
+                [[day] for day in sorted(set(d for (d,) in removed_dates))],
+            )
+
+        written = con.execute(f"""
+            MERGE INTO {TABLE_SENTINEL5P_CLEANED}
+            USING silver_batch
+            USING ({PIXEL_KEY})
+            WHEN MATCHED THEN UPDATE
+            WHEN NOT MATCHED THEN INSERT
+        """).fetchone()[0]
+
+        read = con.execute("SELECT COUNT(*) FROM bronze_delta").fetchone()[0]
+
+        set_watermark(con, TABLE_SENTINEL5P_CLEANED, new_watermark)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    finally:
+        con.execute("DROP TABLE IF EXISTS bronze_delta")
+        con.execute("DROP TABLE IF EXISTS silver_batch")
+
+    print(f"Read {read:,} bronze rows, wrote {written:,} silver rows, removed {removed:,}")
+    print(f"New watermark: {new_watermark}")
+
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Ignore the watermark and re-process all of bronze",
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Building {TABLE_SENTINEL5P_CLEANED}")
+    print("=" * 60)
+
+    con = connect()
+
+    build_silver_sentinel5p(con, full_refresh=args.full_refresh)
+
+    con.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
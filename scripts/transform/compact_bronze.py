@@ -0,0 +1,233 @@
+"""
+Rewrite bronze tables in space-filling-curve order for zone-map pruning
+
+Rows are re-inserted sorted by month, then by a Hilbert index of
+(longitude, latitude) over ALBERTA_BBOX, then by time. Within a month each
+row group covers a small lat/lon box, so DuckDB's min/max zone maps can
+skip most row groups for spatial filters while date filters still only
+reach their month. `--key h3` sorts by the assigned cell_id instead (no
+spatial extension needed, but clusters less tightly). Scan statistics of
+the standard probe queries are printed before and after.
+
+The sort scatters ingestion_timestamp across each month's row groups.
+Rows loaded after a compaction are appended in new row groups, so the
+silver builder's watermark scan (ingestion_timestamp > watermark) still
+prunes. Rows not yet consumed at compaction time are spread over the
+table, however, and the next silver run scans all of it (the newest_load
+probe shows this). Run build_silver_sentinel5p before compacting.
+
+Usage:
+    python -m scripts.transform.compact_bronze [--key hilbert|h3] [--stats-only]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from dotenv import load_dotenv
+
+from config.constants import (
+    ALBERTA_BBOX,
+    CALGARY_BBOX,
+    SENTINEL5P_QA_THRESHOLD_SILVER,
+    TABLE_AER_FACILITIES,
+    TABLE_SENTINEL5P_RAW,
+)
+from scripts.lib.db import connect
+from scripts.transform.assign_cells import ensure_cell_index
+
+load_dotenv()
+
+# Table -> time column used as the secondary sort key
+COMPACTION_TABLES = {
+    TABLE_SENTINEL5P_RAW: "measurement_timestamp",
+    TABLE_AER_FACILITIES: "reporting_month",
+}
+
+CALGARY_BOX = (
+    f"latitude BETWEEN {CALGARY_BBOX['min_lat']} AND {CALGARY_BBOX['max_lat']} "
+    f"AND longitude BETWEEN {CALGARY_BBOX['min_lon']} AND {CALGARY_BBOX['max_lon']}"
+)
+
+
+def sort_key_sql(key) -> str:
+    if key == "h3":
+        return "cell_id NULLS LAST"
+
+    bbox = ALBERTA_BBOX
+    box = (
+        f"{{'min_x': {bbox['min_lon']}, 'min_y': {bbox['min_lat']}, "
+        f"'max_x': {bbox['max_lon']}, 'max_y': {bbox['max_lat']}}}::BOX_2D"
+    )
+    return (
+        f"ST_Hilbert("
+        f"least(greatest(longitude, {bbox['min_lon']}), {bbox['max_lon']}), "
+        f"least(greatest(latitude, {bbox['min_lat']}), {bbox['max_lat']}), "
+        f"{box}) NULLS LAST"
+    )
+
+
+def probe_queries(con, table, time_column) -> dict[str, str]:
+    """Filters the validation and dashboard queries use, as zone-map-prunable predicates"""
+    latest = con.execute(f"SELECT MAX({time_column}) FROM {table}").fetchone()[0]
+
+    if time_column == "reporting_month":
+        period = f"reporting_month = '{latest}'"
+    else:
+        period = f"{time_column} >= '{latest}'::DATE AND {time_column} < '{latest}'::DATE + 1"
+
+    probes = {
+        "calgary_50km_box": CALGARY_BOX,
+        "latest_period": period,
+        "box_and_period": f"{CALGARY_BOX} AND {period}",
+    }
+    if table == TABLE_SENTINEL5P_RAW:
+        probes["qa_silver"] = f"qa_value >= {SENTINEL5P_QA_THRESHOLD_SILVER}"
+        # The silver builder's watermark scan, as if the newest load were unconsumed
+        newest = con.execute(f"SELECT MAX(ingestion_timestamp) FROM {table}").fetchone()[0]
+        probes["newest_load"] = f"ingestion_timestamp >= '{newest}'"
+
+    return {
+        name: f"SELECT COUNT(*) FROM {table} WHERE {predicate}"
+        for name, predicate in probes.items()
+    }
+
+
+def scan_stats(con, queries: dict[str, str]) -> dict[str, tuple[int, float]]:
+    """(rows scanned, seconds) per query, from DuckDB's JSON profiler"""
+    stats = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profile = os.path.join(tmp, "profile.json")
+        con.execute("PRAGMA enable_profiling = 'json'")
+        con.execute(f"PRAGMA profiling_output = '{profile}'")
+        con.execute("""SET custom_profiling_settings = '{"CUMULATIVE_ROWS_SCANNED": "true"}'""")
+
+        try:
+            for name, sql in queries.items():
+                start = time.perf_counter()
+                con.execute(sql).fetchall()
+                seconds = time.perf_counter() - start
+
+                with open(profile) as f:
+                    stats[name] = (json.load(f)["cumulative_rows_scanned"], seconds)
+        finally:
+            con.execute("PRAGMA disable_profiling")
+
+    return stats
+
+
+def compact_table(con, table, time_column, key="hilbert") -> None:
+    """Re-insert every row of table in (month, sort key, time) order, in one transaction"""
+    snapshot = f"{table}__compaction"
+
+    has_cells = con.execute(
+        """
+        SELECT COUNT(*) FROM duckdb_columns()
+        WHERE schema_name || '.' || table_name = ? AND column_name = 'cell_id'
+        """,
+        [table],
+    ).fetchone()[0]
+
+    schema, name = table.split(".")
+
+    try:
+        con.execute("BEGIN TRANSACTION")
+
+        try:
+            # Dropped for the rewrite (an index left in place also keeps the
+            # deleted row groups from being reclaimed); ROLLBACK restores it
+            con.execute(f"DROP INDEX IF EXISTS {schema}.idx_{name}_cell_id")
+            con.execute(f"CREATE TABLE {snapshot} AS SELECT * FROM {table}")
+            con.execute(f"DELETE FROM {table}")
+            con.execute(f"""
+                INSERT INTO {table}
+                SELECT * FROM {snapshot}
+                ORDER BY
+                    date_trunc('month', {time_column}),
+                    {sort_key_sql(key)},
+                    {time_column}
+            """)
+            con.execute(f"DROP TABLE {snapshot}")
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+        # Reclaims the deleted row groups
+        con.execute("CHECKPOINT")
+    finally:
+        if has_cells:
+            ensure_cell_index(con, table)
+
+
+def print_stats(before, after, total_rows) -> None:
+    print(
+        f"  {'query':<20} {'rows scanned before':>20} {'after':>14} "
+        f"{'time before':>12} {'after':>8}"
+    )
+    for name in before:
+        rows_before, sec_before = before[name]
+        rows_after, sec_after = after.get(name, (None, None))
+        after_text = f"{rows_after:>14,}" if rows_after is not None else f"{'-':>14}"
+        time_text = f"{sec_after:>7.3f}s" if sec_after is not None else f"{'-':>8}"
+        print(f"  {name:<20} {rows_before:>20,} {after_text} {sec_before:>11.3f}s {time_text}")
+    print(f"  (table has {total_rows:,} rows)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--key",
+        choices=["hilbert", "h3"],
+        default="hilbert",
+        help="Space-filling sort key (h3 uses the assigned cell_id)",
+    )
+    parser.add_argument(
+        "--stats-only",
+        action="store_true",
+        help="Report scan statistics without rewriting the tables",
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Bronze compaction (sort key: {args.key})")
+    print("=" * 60)
+
+    con = connect()
+
+    for table, time_column in COMPACTION_TABLES.items():
+        print(f"\n{table}")
+
+        total_rows = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if total_rows == 0:
+            print("  empty, skipped")
+            continue
+
+        queries = probe_queries(con, table, time_column)
+        before = scan_stats(con, queries)
+
+        if args.stats_only:
+            after = {}
+        else:
+            start = time.perf_counter()
+            compact_table(con, table, time_column, key=args.key)
+            print(f"  rewrote {total_rows:,} rows in {time.perf_counter() - start:.1f} s")
+            after = scan_stats(con, queries)
+
+        print_stats(before, after, total_rows)
+
+    con.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+
+        traceback.print_exc()
+        exit(1)
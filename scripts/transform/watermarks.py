@@ -0,0 +1,63 @@
+"""
+Watermarks for incremental builders: the last upstream timestamp (bronze
+ingestion_timestamp, silver processed_at) each target table has consumed.
+A builder reads rows strictly after its watermark and advances it in the
+same transaction as its writes.
+"""
+
+from datetime import datetime
+
+from config.constants import (
+    TABLE_PIPELINE_WATERMARKS,
+    TABLE_SENTINEL5P_CLEANED,
+    TABLE_SENTINEL5P_REMOVED_DAYS,
+)
+
+
+def get_watermark(con, target_table) -> datetime | None:
+    row = con.execute(
+        f"SELECT watermark FROM {TABLE_PIPELINE_WATERMARKS} WHERE target_table = ?",
+        [target_table],
+    ).fetchone()
+    return row[0] if row else None
+
+
+def set_watermark(con, target_table, watermark: datetime) -> None:
+    con.execute(
+        f"""
+        INSERT OR REPLACE INTO {TABLE_PIPELINE_WATERMARKS} (target_table, watermark, updated_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        """,
+        [target_table, watermark],
+    )
+
+
+def stage_affected_days(con, since) -> tuple[int, datetime | None]:
+    """
+    Temp table affected_days(day) of the silver measurement dates processed
+    or removed after since (all of them when since is None); returns the
+    number of days and the watermark to advance to once they are rebuilt.
+    """
+    con.execute(
+        f"""
+        CREATE OR REPLACE TEMP TABLE affected_days AS
+        SELECT measurement_date AS day
+        FROM {TABLE_SENTINEL5P_CLEANED}
+        WHERE $since IS NULL OR processed_at > $since
+        UNION
+        SELECT measurement_date
+        FROM {TABLE_SENTINEL5P_REMOVED_DAYS}
+        WHERE $since IS NULL OR removed_at > $since
+        """,
+        {"since": since},
+    )
+    new_watermark = con.execute(f"""
+        SELECT GREATEST(
+            (SELECT MAX(processed_at) FROM {TABLE_SENTINEL5P_CLEANED}),
+            (SELECT MAX(removed_at) FROM {TABLE_SENTINEL5P_REMOVED_DAYS})
+        )
+    """).fetchone()[0]
+
+    days = con.execute("SELECT COUNT(*) FROM affected_days").fetchone()[0]
+
+    return days, new_watermark
@@ -1,121 +1,335 @@
-import os
+"""
+CH4 maps and summary plots from bronze.sentinel5p_raw
+
+The CH4 field is gridded in DuckDB and drawn as a raster with imshow, so
+figure cost depends on the grid size rather than the pixel count. Figures
+are rendered with the Agg backend in a process pool; each worker holds its
+own read-only connection with an equal share of the DuckDB thread and
+memory budget. --series day|orbit additionally writes one map per
+observation day or orbit to outputs/visualizations/series; the whole
+series is gridded in a single scan.
+
+Usage:
+    python -m scripts.visualization.visualize_ch4_data [--series day|orbit] [--workers N]
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-import duckdb
-import matplotlib.pyplot as plt
-from dotenv import load_dotenv
+import matplotlib
 
-load_dotenv()
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+from config.constants import ALBERTA_BBOX  # noqa: E402
+from scripts.lib.db import connect, connection_config  # noqa: E402
+from scripts.lib.pixels import pixel_query  # noqa: E402
 
 OUTPUT_DIR = Path("./outputs/visualizations")
-DB_PATH = os.getenv('DUCKDB_DATABASE_PATH', './emissions_ghg.duckdb')
+SERIES_DIR = OUTPUT_DIR / "series"
+
+HEATMAP_CELL_DEG = 0.05
+OVERLAY_CELL_DEG = 0.1
+CH4_HIST_RANGE = (1700, 2100)
+CH4_HIST_BINS = 50
+SERIES_DPI = 150
+MAP_MIN_QA = 0.5
 
+# Series key -> SQL expression identifying one map
+SERIES_KEYS = {
+    "day": "measurement_timestamp::DATE",
+    "orbit": "orbit_number",
+}
 
-def save_plot(fig, filename):
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    path = OUTPUT_DIR / filename
-    fig.savefig(path, dpi=300, bbox_inches='tight')
+# Per-process connection opened by the pool initializer
+_worker_con = None
+
+
+def save_plot(fig, filename, output_dir=None, dpi=300):
+    output_dir = output_dir or OUTPUT_DIR
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / filename
+    fig.savefig(path, dpi=dpi, bbox_inches="tight")
     plt.close(fig)
     return path
 
 
-def create_ch4_heatmap():
-    con = duckdb.connect(DB_PATH)
-    df = con.execute("""
-        SELECT latitude, longitude, ch4_column
-        FROM bronze.sentinel5p_raw
-        WHERE qa_value >= 0.5
-    """).fetchdf()
-    con.close()
+def grid_shape(cell_deg):
+    bbox = ALBERTA_BBOX
+    n_rows = round((bbox["max_lat"] - bbox["min_lat"]) / cell_deg)
+    n_cols = round((bbox["max_lon"] - bbox["min_lon"]) / cell_deg)
+    return n_rows, n_cols
+
+
+def grid_extent():
+    bbox = ALBERTA_BBOX
+    return (bbox["min_lon"], bbox["max_lon"], bbox["min_lat"], bbox["max_lat"])
+
+
+def ch4_cells(con, cell_deg, key_sql=None):
+    """
+    Mean QA >= 0.5 CH4 per grid cell over ALBERTA_BBOX, computed in DuckDB;
+    with key_sql, per (key, cell) and ordered by key. Returns numpy columns.
+    """
+    bbox = ALBERTA_BBOX
+    n_rows, n_cols = grid_shape(cell_deg)
+    key = f"{key_sql}::VARCHAR" if key_sql else "NULL"
+
+    pixels, params = pixel_query(
+        source="bronze",
+        columns=(
+            f"{key} AS series_key",
+            f"FLOOR((latitude - {bbox['min_lat']}) / {cell_deg})::INTEGER AS row_idx",
+            f"FLOOR((longitude - {bbox['min_lon']}) / {cell_deg})::INTEGER AS col_idx",
+            "ch4_column",
+        ),
+        bbox=bbox,
+        min_qa=MAP_MIN_QA,
+    )
+
+    return con.execute(
+        f"""
+        SELECT series_key, row_idx, col_idx, AVG(ch4_column) AS ch4
+        FROM ({pixels})
+        WHERE row_idx BETWEEN 0 AND {n_rows - 1} AND col_idx BETWEEN 0 AND {n_cols - 1}
+          AND {"series_key IS NOT NULL" if key_sql else "TRUE"}
+        GROUP BY series_key, row_idx, col_idx
+        ORDER BY series_key
+    """,
+        params,
+    ).fetchnumpy()
+
+
+def to_raster(rows, cols, values, cell_deg):
+    raster = np.full(grid_shape(cell_deg), np.nan)
+    raster[rows, cols] = values
+    return raster
+
+
+def ch4_raster(con, cell_deg=HEATMAP_CELL_DEG):
+    """Mean CH4 per cell as a 2-D array (NaN where empty); returns (array, imshow extent)"""
+    cells = ch4_cells(con, cell_deg)
+    return to_raster(cells["row_idx"], cells["col_idx"], cells["ch4"], cell_deg), grid_extent()
+
+
+def ch4_series_rasters(con, series, cell_deg=HEATMAP_CELL_DEG):
+    """{day or orbit: raster} for the whole series from one grouped scan"""
+    cells = ch4_cells(con, cell_deg, key_sql=SERIES_KEYS[series])
+    keys, starts = np.unique(cells["series_key"], return_index=True)
+    bounds = np.append(starts, len(cells["series_key"]))
+
+    return {
+        key: to_raster(
+            cells["row_idx"][lo:hi], cells["col_idx"][lo:hi], cells["ch4"][lo:hi], cell_deg
+        )
+        for key, lo, hi in zip(keys, bounds[:-1], bounds[1:])
+    }
 
-    df['lat_grid'] = (df['latitude'] / 0.05).round() * 0.05
-    df['lon_grid'] = (df['longitude'] / 0.05).round() * 0.05
-    grid = df.groupby(['lat_grid', 'lon_grid'])['ch4_column'].mean().reset_index()
+
+def ch4_color_limits(con):
+    """2nd-98th percentile of QA >= 0.5 CH4, so every map in a series shares one scale"""
+    pixels, params = pixel_query(source="bronze", columns=("ch4_column",), min_qa=MAP_MIN_QA)
+    return con.execute(
+        f"""
+        SELECT approx_quantile(ch4_column, 0.02), approx_quantile(ch4_column, 0.98)
+        FROM ({pixels})
+    """,
+        params,
+    ).fetchone()
+
+
+def draw_raster(ax, raster, extent, cmap, vmin=None, vmax=None):
+    return ax.imshow(
+        raster,
+        origin="lower",
+        extent=extent,
+        cmap=cmap,
+        vmin=vmin,
+        vmax=vmax,
+        aspect="auto",
+        interpolation="nearest",
+    )
+
+
+def create_ch4_heatmap(con):
+    raster, extent = ch4_raster(con)
 
     fig, ax = plt.subplots(figsize=(12, 10))
-    sc = ax.scatter(grid['lon_grid'], grid['lat_grid'], c=grid['ch4_column'],
-                    cmap='RdYlBu_r', s=50, alpha=0.7, edgecolors='none')
-    plt.colorbar(sc, ax=ax, label='CH₄ Column (ppb)')
-    ax.set(xlabel='Longitude (°)', ylabel='Latitude (°)',
-           title='Sentinel-5P CH₄ Concentrations - Alberta')
-    ax.plot([-120, -110, -110, -120, -120], [49, 49, 60, 60, 49], 'k--', lw=2)
+    im = draw_raster(ax, raster, extent, "RdYlBu_r")
+    plt.colorbar(im, ax=ax, label="CH₄ Column (ppb)")
+    ax.set(
+        xlabel="Longitude (°)",
+        ylabel="Latitude (°)",
+        title="Sentinel-5P CH₄ Concentrations - Alberta",
+    )
+    ax.plot([-120, -110, -110, -120, -120], [49, 49, 60, 60, 49], "k--", lw=2)
     ax.grid(True, alpha=0.3)
     return save_plot(fig, "ch4_heatmap.png")
 
 
-def create_facilities_overlay():
-    con = duckdb.connect(DB_PATH)
-    ch4_df = con.execute("""
-        SELECT ROUND(latitude,1) AS lat_grid, ROUND(longitude,1) AS lon_grid,
-               AVG(ch4_column) AS avg_ch4
-        FROM bronze.sentinel5p_raw
-        WHERE qa_value >= 0.5
-        GROUP BY lat_grid, lon_grid
-    """).fetchdf()
+def create_facilities_overlay(con):
+    raster, extent = ch4_raster(con, cell_deg=OVERLAY_CELL_DEG)
     facilities_df = con.execute("""
         SELECT latitude, longitude
         FROM bronze.aer_battery_monthly
         WHERE latitude IS NOT NULL AND longitude IS NOT NULL
         LIMIT 1000
     """).fetchdf()
-    con.close()
 
     fig, ax = plt.subplots(figsize=(14, 12))
-    sc = ax.scatter(ch4_df['lon_grid'], ch4_df['lat_grid'], c=ch4_df['avg_ch4'],
-                    cmap='YlOrRd', s=100, alpha=0.6, edgecolors='none', label='CH₄')
-    ax.scatter(facilities_df['longitude'], facilities_df['latitude'], c='blue', marker='x', s=30,
-               alpha=0.7,
-               label='AER Facilities')
-    plt.colorbar(sc, ax=ax, label='Avg CH₄ (ppb)')
-    ax.set(xlabel='Longitude (°)', ylabel='Latitude (°)',
-           title='CH₄ Concentrations with O&G Facilities - Alberta')
+    im = draw_raster(ax, raster, extent, "YlOrRd")
+    ax.scatter(
+        facilities_df["longitude"],
+        facilities_df["latitude"],
+        c="blue",
+        marker="x",
+        s=30,
+        alpha=0.7,
+        rasterized=True,
+        label="AER Facilities",
+    )
+    plt.colorbar(im, ax=ax, label="Avg CH₄ (ppb)")
+    ax.set(
+        xlabel="Longitude (°)",
+        ylabel="Latitude (°)",
+        title="CH₄ Concentrations with O&G Facilities - Alberta",
+    )
     ax.grid(True, alpha=0.3)
     ax.legend()
     return save_plot(fig, "ch4_facilities_overlay.png")
 
 
-def create_summary_stats_plot():
-    con = duckdb.connect(DB_PATH)
-    qa_df = con.execute("""
+def ch4_histogram(con):
+    """Fixed-width CH4 bins counted in DuckDB; the per-bin sum gives the exact mean"""
+    low, high = CH4_HIST_RANGE
+    width = (high - low) / CH4_HIST_BINS
+    pixels, params = pixel_query(source="bronze", columns=("ch4_column",))
+    return con.execute(
+        f"""
+        SELECT {low} + bin * {width} AS bin_start,
+               COUNT(*) AS count,
+               SUM(ch4_column) AS ch4_sum
+        FROM (
+            SELECT least(FLOOR((ch4_column - {low}) / {width}), {CH4_HIST_BINS - 1}) AS bin,
+                   ch4_column
+            FROM ({pixels})
+            WHERE ch4_column BETWEEN {low} AND {high}
+        )
+        GROUP BY bin
+        ORDER BY bin
+    """,
+        params,
+    ).fetchdf()
+
+
+def create_summary_stats_plot(con):
+    pixels, params = pixel_query(source="bronze", columns=("qa_value",))
+    qa_df = con.execute(
+        f"""
         SELECT ROUND(qa_value,1) AS qa_bin, COUNT(*) AS count
-        FROM bronze.sentinel5p_raw
+        FROM ({pixels})
         GROUP BY qa_bin
         ORDER BY qa_bin
-    """).fetchdf()
-    ch4_df = con.execute("""
-        SELECT ch4_column
-        FROM bronze.sentinel5p_raw
-        WHERE ch4_column BETWEEN 1700 AND 2100
-    """).fetchdf()
-    con.close()
+    """,
+        params,
+    ).fetchdf()
+    ch4_df = ch4_histogram(con)
 
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
-    ax1.bar(qa_df['qa_bin'], qa_df['count'], width=0.08, color='steelblue', alpha=0.7)
-    ax1.set(xlabel='QA Value', ylabel='Pixel Count', title='QA Value Distribution')
-    ax1.axvline(0.5, color='red', linestyle='--', lw=2, label='High QA Threshold')
-    ax1.grid(True, alpha=0.3, axis='y')
+    ax1.bar(qa_df["qa_bin"], qa_df["count"], width=0.08, color="steelblue", alpha=0.7)
+    ax1.set(xlabel="QA Value", ylabel="Pixel Count", title="QA Value Distribution")
+    ax1.axvline(MAP_MIN_QA, color="red", linestyle="--", lw=2, label="High QA Threshold")
+    ax1.grid(True, alpha=0.3, axis="y")
     ax1.legend()
 
-    ax2.hist(ch4_df['ch4_column'], bins=50, color='coral', alpha=0.7, edgecolor='black')
-    mean_ch4 = ch4_df['ch4_column'].mean()
-    ax2.axvline(mean_ch4, color='red', linestyle='--', lw=2, label=f'Mean: {mean_ch4:.1f} ppb')
-    ax2.set(xlabel='CH₄ Column (ppb)', ylabel='Pixel Count', title='CH₄ Concentration Distribution')
-    ax2.grid(True, alpha=0.3, axis='y')
+    low, high = CH4_HIST_RANGE
+    ax2.hist(
+        ch4_df["bin_start"],
+        bins=np.linspace(low, high, CH4_HIST_BINS + 1),
+        weights=ch4_df["count"],
+        color="coral",
+        alpha=0.7,
+        edgecolor="black",
+    )
+    mean_ch4 = ch4_df["ch4_sum"].sum() / ch4_df["count"].sum()
+    ax2.axvline(mean_ch4, color="red", linestyle="--", lw=2, label=f"Mean: {mean_ch4:.1f} ppb")
+    ax2.set(xlabel="CH₄ Column (ppb)", ylabel="Pixel Count", title="CH₄ Concentration Distribution")
+    ax2.grid(True, alpha=0.3, axis="y")
     ax2.legend()
 
     plt.tight_layout()
     return save_plot(fig, "summary_statistics.png")
 
 
+def create_series_map(series, key, raster, vmin, vmax):
+    """One CH4 map for a single day or orbit, on the series-wide color scale"""
+    fig, ax = plt.subplots(figsize=(8, 8))
+    im = draw_raster(ax, raster, grid_extent(), "RdYlBu_r", vmin=vmin, vmax=vmax)
+    plt.colorbar(im, ax=ax, label="CH₄ Column (ppb)")
+    ax.set(xlabel="Longitude (°)", ylabel="Latitude (°)", title=f"Sentinel-5P CH₄ - {series} {key}")
+    ax.grid(True, alpha=0.3)
+    return save_plot(fig, f"ch4_{series}_{key}.png", output_dir=SERIES_DIR, dpi=SERIES_DPI)
+
+
+def _init_worker(workers):
+    global _worker_con
+    _worker_con = connect(read_only=True, share=workers)
+
+
+def _render(func, *args):
+    return func(_worker_con, *args)
+
+
 def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--series",
+        choices=sorted(SERIES_KEYS),
+        help="Also render one map per observation day or orbit",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(connection_config()["threads"]),
+        help="Rendering processes, each with 1/N of the DuckDB thread and "
+        "memory budget (default: DUCKDB_THREADS)",
+    )
+    args = parser.parse_args()
+
+    # (pool function, job name, args); the summary figures query through the
+    # worker's connection, series maps arrive already gridded
+    jobs = [
+        (_render, func.__name__, (func,))
+        for func in [create_ch4_heatmap, create_facilities_overlay, create_summary_stats_plot]
+    ]
+
+    if args.series:
+        con = connect(read_only=True)
+        vmin, vmax = ch4_color_limits(con)
+        rasters = ch4_series_rasters(con, args.series)
+        con.close()
+        jobs += [
+            (create_series_map, f"{args.series} {key}", (args.series, key, raster, vmin, vmax))
+            for key, raster in rasters.items()
+        ]
+        print(f"Rendering {len(rasters)} {args.series} map(s)")
+
     visualizations = []
-    for func in [create_ch4_heatmap, create_facilities_overlay, create_summary_stats_plot]:
-        try:
-            visualizations.append(func())
-        except Exception as e:
-            print(f"ERROR in {func.__name__}: {e}")
+    with ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_init_worker, initargs=(args.workers,)
+    ) as pool:
+        futures = {pool.submit(func, *job_args): name for func, name, job_args in jobs}
+        for future in as_completed(futures):
+            try:
+                visualizations.append(future.result())
+            except Exception as e:
+                print(f"ERROR in {futures[future]}: {e}")
+
     print(f"Generated {len(visualizations)} visualization(s):")
-    for v in visualizations:
+    for v in sorted(visualizations):
         print(f"  - {v}")
     return True
 
@@ -123,6 +337,7 @@ def main():
 if __name__ == "__main__":
     import sys
     import traceback
+
     try:
         success = main()
         sys.exit(0 if success else 1)